@@ -1,7 +1,13 @@
-from agents.base import Agent, AgentResult
-from agents.direct_answer_agent import DirectAnswerAgent
-from agents.doc_search_agent import DocSearchAgent
-from agents.orchestrator import Orchestrator
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from agents.base import Agent, AgentResult
+    from agents.direct_answer_agent import DirectAnswerAgent
+    from agents.doc_search_agent import DocSearchAgent
+    from agents.orchestrator import Orchestrator
 
 __all__ = [
     "Agent",
@@ -10,3 +16,19 @@ __all__ = [
     "DocSearchAgent",
     "Orchestrator",
 ]
+
+# Resolved on first attribute access so importing one submodule does not load them all.
+_EXPORTS = {
+    "Agent": "agents.base",
+    "AgentResult": "agents.base",
+    "DirectAnswerAgent": "agents.direct_answer_agent",
+    "DocSearchAgent": "agents.doc_search_agent",
+    "Orchestrator": "agents.orchestrator",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'agents' has no attribute {name!r}")
+    return getattr(importlib.import_module(module), name)
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Protocol
+from typing import TYPE_CHECKING, Any, Callable, Protocol
+
+if TYPE_CHECKING:
+    from agents.query_context import QueryContext
 
 
 @dataclass(frozen=True)
@@ -12,6 +15,11 @@ class AgentResult:
     usage: dict[str, int] | None = None
     model: str | None = None
     workflow: dict[str, Any] | None = None
+    metrics: dict[str, Any] | None = None
+    # True when a time budget forced a partial answer (a stage skipped or cut short).
+    degraded: bool = False
+    # Set by dry runs: writes the records the run skipped and returns the final result.
+    commit: Callable[[], AgentResult] | None = None
 
 
 class Agent(Protocol):
@@ -22,4 +30,5 @@ class Agent(Protocol):
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult: ...
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import json
+import logging
+import math
+import random
+import re
+import threading
+import zlib
+from pathlib import Path
+from typing import Callable, Final, Iterable, Sequence
+
+_TOKEN_RE: Final[re.Pattern[str]] = re.compile(r"[0-9a-z가-힣]+")
+_NON_WORD_RE: Final[re.Pattern[str]] = re.compile(r"[^0-9a-z가-힣]+")
+_CHAR_NGRAM: Final[int] = 3
+_TOKEN_CACHE_MAX: Final[int] = 16384
+
+logger = logging.getLogger("classifier")
+
+# (token, dim) -> buckets; questions reuse a small vocabulary, so hashing is mostly cached.
+# Character trigrams share the cache under a negated dim.
+_token_cache: dict[tuple[str, int], tuple[int, ...]] = {}
+
+
+def hashed_features(text: str, dim: int) -> list[int]:
+    """Bucket ids for the word unigrams and padded character trigrams of ``text``.
+
+    Buckets come from CRC32 so a model trained in one process scores the same in
+    another (``hash()`` is salted per process). ``dim`` must be a power of two.
+    """
+    buckets: set[int] = set()
+    cache = _token_cache
+    for token in _TOKEN_RE.findall(text.lower()):
+        key = (token, dim)
+        token_buckets = cache.get(key)
+        if token_buckets is None:
+            if len(cache) >= _TOKEN_CACHE_MAX:
+                cache.clear()
+            token_buckets = cache[key] = _token_buckets(token, dim - 1)
+        buckets.update(token_buckets)
+    return list(buckets)
+
+
+def hashed_char_features(text: str, dim: int) -> list[int]:
+    """Bucket ids for the character trigrams of ``text`` with separators removed.
+
+    Dropping spaces and punctuation first means spaced-out or dotted spellings
+    ("p r o m p t", "pass.word") produce the same trigrams as the plain word.
+    """
+    compact = _NON_WORD_RE.sub("", text.lower())
+    cache = _token_cache
+    mask = dim - 1
+    buckets: set[int] = set()
+    for i in range(len(compact) - _CHAR_NGRAM + 1):
+        key = (compact[i : i + _CHAR_NGRAM], -dim)
+        bucket = cache.get(key)
+        if bucket is None:
+            if len(cache) >= _TOKEN_CACHE_MAX:
+                cache.clear()
+            bucket = cache[key] = (zlib.crc32(b"c:" + key[0].encode()) & mask,)
+        buckets.add(bucket[0])
+    return list(buckets)
+
+
+FEATURIZERS: Final[dict[str, Callable[[str, int], list[int]]]] = {
+    "word": hashed_features,
+    "char": hashed_char_features,
+}
+
+
+def _token_buckets(token: str, mask: int) -> tuple[int, ...]:
+    crc32 = zlib.crc32
+    padded = f"<{token}>"
+    grams = [crc32(b"w:" + token.encode()) & mask]
+    for i in range(len(padded) - _CHAR_NGRAM + 1):
+        grams.append(crc32(padded[i : i + _CHAR_NGRAM].encode()) & mask)
+    return tuple(grams)
+
+
+class HashedNgramClassifier:
+    """Multinomial logistic regression over hashed n-gram features.
+
+    Weights are stored sparsely, one row of per-label weights for each bucket the
+    training data touched, so scoring a question costs one row lookup per
+    feature rather than a pass over the whole ``dim`` x ``labels`` matrix.
+    """
+
+    def __init__(
+        self,
+        labels: Sequence[str],
+        dim: int,
+        bias: Sequence[float],
+        rows: dict[int, tuple[float, ...]],
+        version: int = 1,
+        analyzer: str = "word",
+    ) -> None:
+        if dim <= 0 or dim & (dim - 1):
+            raise ValueError("dim must be a power of two")
+        if analyzer not in FEATURIZERS:
+            raise ValueError(f"unknown analyzer: {analyzer}")
+        if len(bias) != len(labels):
+            raise ValueError("bias must have one entry per label")
+        self.labels = tuple(labels)
+        self.dim = dim
+        self.version = version
+        self.analyzer = analyzer
+        self._featurize = FEATURIZERS[analyzer]
+        self._bias = tuple(bias)
+        self._rows = rows
+
+    def scores(self, text: str) -> list[float]:
+        """Label probabilities for ``text``, in ``labels`` order."""
+        get = self._rows.get
+        active = [row for row in map(get, self._featurize(text, self.dim)) if row is not None]
+        # Column sums over the active rows: the sparse equivalent of x @ W + b.
+        return _softmax(list(map(sum, zip(self._bias, *active))))
+
+    def predict(self, text: str) -> tuple[str, float]:
+        """Most likely label and its probability."""
+        probs = self.scores(text)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+    def predict_batch(self, texts: Iterable[str]) -> list[tuple[str, float]]:
+        """Classify many texts, featurizing each distinct text once."""
+        seen: dict[str, tuple[str, float]] = {}
+        out: list[tuple[str, float]] = []
+        for text in texts:
+            result = seen.get(text)
+            if result is None:
+                result = seen[text] = self.predict(text)
+            out.append(result)
+        return out
+
+    def to_dict(self) -> dict[str, object]:
+        return {
+            "version": self.version,
+            "analyzer": self.analyzer,
+            "labels": list(self.labels),
+            "dim": self.dim,
+            "bias": [round(b, 6) for b in self._bias],
+            "rows": {
+                str(bucket): [round(w, 6) for w in row]
+                for bucket, row in sorted(self._rows.items())
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, object]) -> HashedNgramClassifier:
+        labels = [str(label) for label in payload["labels"]]  # type: ignore[union-attr]
+        rows = {
+            int(bucket): tuple(float(w) for w in row)
+            for bucket, row in payload.get("rows", {}).items()  # type: ignore[union-attr]
+        }
+        for row in rows.values():
+            if len(row) != len(labels):
+                raise ValueError("every weight row needs one entry per label")
+        return cls(
+            labels=labels,
+            dim=int(payload["dim"]),  # type: ignore[arg-type]
+            bias=[float(b) for b in payload["bias"]],  # type: ignore[union-attr]
+            rows=rows,
+            version=int(payload.get("version") or 1),  # type: ignore[arg-type]
+            analyzer=str(payload.get("analyzer") or "word"),
+        )
+
+    def save(self, path: str | Path) -> None:
+        Path(path).write_text(json.dumps(self.to_dict(), separators=(",", ":")), encoding="utf-8")
+
+    @classmethod
+    def load(cls, path: str | Path) -> HashedNgramClassifier:
+        return cls.from_dict(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def train_classifier(
+    examples: Sequence[tuple[str, str]],
+    dim: int = 4096,
+    epochs: int = 60,
+    learning_rate: float = 0.5,
+    l2: float = 1e-4,
+    seed: int = 0,
+    analyzer: str = "word",
+) -> HashedNgramClassifier:
+    """Fit a classifier on ``(text, label)`` pairs with plain SGD on the log loss."""
+    labels = sorted({label for _, label in examples})
+    if len(labels) < 2:
+        raise ValueError("training needs at least two labels")
+    index = {label: i for i, label in enumerate(labels)}
+    featurize = FEATURIZERS[analyzer]
+    data = [(featurize(text, dim), index[label]) for text, label in examples]
+    n = len(labels)
+    bias = [0.0] * n
+    rows: dict[int, list[float]] = {}
+    rng = random.Random(seed)
+    for epoch in range(epochs):
+        rng.shuffle(data)
+        rate = learning_rate / (1 + epoch * 0.1)
+        for features, target in data:
+            logits = list(bias)
+            for bucket in features:
+                row = rows.get(bucket)
+                if row is not None:
+                    for c in range(n):
+                        logits[c] += row[c]
+            probs = _softmax(logits)
+            for c in range(n):
+                grad = probs[c] - (1.0 if c == target else 0.0)
+                bias[c] -= rate * grad
+                for bucket in features:
+                    row = rows.setdefault(bucket, [0.0] * n)
+                    row[c] -= rate * (grad + l2 * row[c])
+    return HashedNgramClassifier(
+        labels=labels,
+        dim=dim,
+        bias=bias,
+        rows={bucket: tuple(row) for bucket, row in rows.items()},
+        analyzer=analyzer,
+    )
+
+
+_loaded_lock = threading.Lock()
+_loaded: dict[str, HashedNgramClassifier | None] = {}
+
+
+def load_classifier(path: str) -> HashedNgramClassifier | None:
+    """Load a model once per path; a missing or unreadable file is logged and gives None."""
+    if path in _loaded:
+        return _loaded[path]
+    with _loaded_lock:
+        if path not in _loaded:
+            try:
+                _loaded[path] = HashedNgramClassifier.load(path)
+            except (OSError, ValueError, KeyError) as exc:
+                logger.error(
+                    json.dumps(
+                        {"event": "model_load_failed", "path": path, "error": str(exc)},
+                        ensure_ascii=False,
+                    )
+                )
+                _loaded[path] = None
+        return _loaded[path]
+
+
+def _softmax(logits: list[float]) -> list[float]:
+    top = max(logits)
+    exps = [math.exp(x - top) for x in logits]
+    total = sum(exps)
+    return [e / total for e in exps]
@@ -1,10 +1,10 @@
 from __future__ import annotations
 
-import json
 import re
 from uuid import uuid4
 
 from agents.base import AgentResult
+from agents.query_context import QueryContext, ensure_context
 from app.portfolio_store import PortfolioStore
 
 
@@ -16,10 +16,11 @@ class ContentCreatorAgent:
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult:
         _ = actor
         _ = trace_id
-        analysis_payload = _extract_json_payload(question)
+        analysis_payload = ensure_context(question, context).first_json_object()
         topic = _extract_topic(question) or "Crypto portfolio update"
 
         title = f"{topic}: Portfolio pulse"
@@ -69,25 +70,6 @@ def _extract_topic(question: str) -> str | None:
     return None
 
 
-def _extract_json_payload(text: str) -> dict[str, object] | None:
-    try:
-        payload = json.loads(text)
-        if isinstance(payload, dict):
-            return payload
-    except json.JSONDecodeError:
-        pass
-    match = re.search(r"\{.*\}", text, flags=re.DOTALL)
-    if not match:
-        return None
-    try:
-        payload = json.loads(match.group(0))
-        if isinstance(payload, dict):
-            return payload
-    except json.JSONDecodeError:
-        return None
-    return None
-
-
 def _build_thread(analysis_payload: dict[str, object] | None, topic: str) -> str:
     summary = "Portfolio highlights and risk notes."
     if analysis_payload and isinstance(analysis_payload.get("summary"), str):
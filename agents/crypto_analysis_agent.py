@@ -1,9 +1,10 @@
 from __future__ import annotations
 
-import json
+from functools import partial
 from uuid import uuid4
 
 from agents.base import AgentResult
+from agents.query_context import QueryContext, ensure_context
 from app.portfolio_store import PortfolioStore
 
 
@@ -15,9 +16,12 @@ class CryptoAnalysisAgent:
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        *,
+        context: QueryContext | None = None,
+        dry_run: bool = False,
     ) -> AgentResult:
         _ = actor
-        portfolio = _extract_portfolio_json(question)
+        portfolio = _extract_portfolio_json(ensure_context(question, context))
         if not portfolio:
             return AgentResult(
                 answer=(
@@ -33,19 +37,6 @@ class CryptoAnalysisAgent:
             normalized_positions, constraints
         )
 
-        snapshot_id = str(uuid4())
-        store = PortfolioStore()
-        store.save_positions(snapshot_id, normalized_positions)
-        analysis_payload = {
-            "summary": summary,
-            "risk_checklist": risk_checklist,
-            "scenarios": scenarios,
-            "next_actions": next_actions,
-            "constraints": constraints,
-            "top_positions": top_positions,
-        }
-        store.save_analysis_snapshot(snapshot_id, trace_id, analysis_payload)
-
         answer = _format_analysis_answer(
             summary,
             top_positions,
@@ -57,33 +48,43 @@ class CryptoAnalysisAgent:
         evidence = [
             f"positions={len(normalized_positions)}",
             f"top_positions={top_symbols}",
-            f"snapshot_id={snapshot_id}",
         ]
-        return AgentResult(answer=answer, evidence=evidence)
-
-
-def _extract_portfolio_json(question: str) -> dict[str, object] | None:
-    payload = _extract_json_payload(question)
-    if not isinstance(payload, dict):
-        return None
-    if "positions" not in payload:
-        return None
-    return payload
+        analysis_payload = {
+            "summary": summary,
+            "risk_checklist": risk_checklist,
+            "scenarios": scenarios,
+            "next_actions": next_actions,
+            "constraints": constraints,
+            "top_positions": top_positions,
+        }
+        save = partial(
+            _save_snapshot, answer, evidence, normalized_positions, analysis_payload, trace_id
+        )
+        if dry_run:
+            # Nothing is stored unless the caller keeps this answer and commits it.
+            return AgentResult(answer=answer, evidence=evidence, commit=save)
+        return save()
 
 
-def _extract_json_payload(text: str) -> object | None:
-    try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        pass
-    start = text.find("{")
-    end = text.rfind("}")
-    if start == -1 or end == -1 or end <= start:
-        return None
-    try:
-        return json.loads(text[start : end + 1])
-    except json.JSONDecodeError:
-        return None
+def _save_snapshot(
+    answer: str,
+    evidence: list[str],
+    positions: list[dict[str, object]],
+    analysis_payload: dict[str, object],
+    trace_id: str | None,
+) -> AgentResult:
+    snapshot_id = str(uuid4())
+    store = PortfolioStore()
+    store.save_positions(snapshot_id, positions)
+    store.save_analysis_snapshot(snapshot_id, trace_id, analysis_payload)
+    return AgentResult(answer=answer, evidence=[*evidence, f"snapshot_id={snapshot_id}"])
+
+
+def _extract_portfolio_json(ctx: QueryContext) -> dict[str, object] | None:
+    for span in ctx.json_spans:
+        if isinstance(span.value, dict) and "positions" in span.value:
+            return span.value
+    return None
 
 
 def _normalize_positions(positions: list[object]) -> list[dict[str, object]]:
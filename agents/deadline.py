@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Deadline:
+    """A point on the monotonic clock by which a request must be answered.
+
+    Carried on ``QueryContext`` so every stage can check what is left and skip
+    optional work (reranking, speculation) rather than overrun the budget.
+    """
+
+    expires_at: float
+    budget_ms: float
+
+    @classmethod
+    def after_ms(cls, budget_ms: float) -> Deadline:
+        return cls(expires_at=time.monotonic() + budget_ms / 1000.0, budget_ms=budget_ms)
+
+    def remaining(self) -> float:
+        """Seconds left, never negative."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def remaining_ms(self) -> float:
+        return self.remaining() * 1000.0
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from agents.base import AgentResult
+from agents.query_context import QueryContext
 
 
 class DirectAnswerAgent:
@@ -11,8 +12,20 @@ class DirectAnswerAgent:
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult:
         _ = actor
         _ = trace_id
         _ = question
+        _ = context
         return AgentResult(answer="아직은 임시 답변만 제공할 수 있습니다.", evidence=[])
+
+    async def arun(
+        self,
+        question: str,
+        actor: object | None = None,
+        trace_id: str | None = None,
+        context: QueryContext | None = None,
+    ) -> AgentResult:
+        # Nothing here blocks, so skip the worker-thread hop the orchestrator would add.
+        return self.run(question, actor=actor, trace_id=trace_id, context=context)
@@ -1,9 +1,31 @@
 from __future__ import annotations
 
+import json
+import logging
+import os
+import threading
 from pathlib import Path
+from typing import Any, Sequence
 
 from agents.base import AgentResult
-from agents.retrieval import SearchHit, TfidfRetriever
+from agents.deadline import Deadline
+from agents.query_context import QueryContext
+from agents.retrieval import (
+    Reranker,
+    SearchHit,
+    SearchStats,
+    TfidfRetriever,
+    run_in_search_executor,
+)
+from app.config import (
+    RERANK_BUDGET_MS,
+    RERANK_MAX_INFLIGHT,
+    RETRIEVAL_CANDIDATE_K,
+    RETRIEVAL_TOP_K,
+)
+from app.retrieval import get_retriever
+
+logger = logging.getLogger("retrieval")
 
 
 class DocSearchAgent:
@@ -13,31 +35,245 @@ class DocSearchAgent:
         self,
         docs_path: Path | None = None,
         retriever: TfidfRetriever | None = None,
+        reranker: Reranker | None = None,
+        candidate_k: int = RETRIEVAL_CANDIDATE_K,
+        top_k: int = RETRIEVAL_TOP_K,
     ) -> None:
-        self._docs_path = docs_path or Path("docs")
-        self._retriever = retriever or TfidfRetriever(root=str(self._docs_path))
+        if retriever is None and docs_path is not None:
+            retriever = TfidfRetriever(
+                root=str(docs_path),
+                analyzer=os.getenv("RETRIEVAL_ANALYZER", "word"),
+            )
+        # None means the process-wide retriever, shared with /suggest and /index/stats
+        # and swapped when the docs change.
+        self._retriever = retriever
+        self._reranker = reranker or Reranker(budget_ms=RERANK_BUDGET_MS)
+        self._candidate_k = max(candidate_k, top_k)
+        self._top_k = top_k
+        self._rerank_enabled = os.getenv("RERANK_ENABLED", "true").lower() == "true"
 
     def run(
         self,
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult:
         _ = actor
-        _ = trace_id
-        hits = self._retriever.search(question, top_k=5)
+        deadline = context.deadline if context is not None else None
+        if deadline is not None and deadline.expired():
+            return _deadline_result()
+        retriever = self._current_retriever()
+        candidates, stats = retriever.search_with_stats(question, top_k=self._candidate_k)
+        hits, rerank = self._rerank(retriever, question, candidates, trace_id, deadline)
+        return self._result(candidates, hits, stats, rerank)
+
+    async def arun(
+        self,
+        question: str,
+        actor: object | None = None,
+        trace_id: str | None = None,
+        context: QueryContext | None = None,
+    ) -> AgentResult:
+        deadline = context.deadline if context is not None else None
+        if deadline is not None and deadline.expired():
+            return _deadline_result()
+        # One executor job: resolving the shared retriever can stat the docs tree
+        # or rebuild the index, so none of it may run on the event loop.
+        return await run_in_search_executor(self.run, question, actor, trace_id, context)
+
+    def run_many(
+        self,
+        questions: Sequence[str],
+        trace_ids: Sequence[str | None],
+        contexts: Sequence[QueryContext | None] | None = None,
+    ) -> list[AgentResult]:
+        """Answer several questions with one batched retrieval pass.
+
+        Each question keeps its own context: one whose deadline has already
+        passed is answered degraded without being searched, and each rerank
+        checks the budget its own deadline has left after the shared pass.
+        """
+        deadlines = [
+            context.deadline if context is not None else None
+            for context in (contexts or [None] * len(questions))
+        ]
+        results: list[AgentResult | None] = [
+            _deadline_result() if deadline is not None and deadline.expired() else None
+            for deadline in deadlines
+        ]
+        live = [i for i, result in enumerate(results) if result is None]
+        if live:
+            retriever = self._current_retriever()
+            searched = retriever.search_many_with_stats(
+                [questions[i] for i in live], top_k=self._candidate_k
+            )
+            for i, (candidates, stats) in zip(live, searched):
+                hits, rerank = self._rerank(
+                    retriever, questions[i], candidates, trace_ids[i], deadlines[i]
+                )
+                results[i] = self._result(candidates, hits, stats, rerank)
+        return results  # type: ignore[return-value]
+
+    async def arun_many(
+        self,
+        questions: Sequence[str],
+        trace_ids: Sequence[str | None],
+        contexts: Sequence[QueryContext | None] | None = None,
+    ) -> list[AgentResult]:
+        return await run_in_search_executor(self.run_many, questions, trace_ids, contexts)
+
+    def _result(
+        self,
+        candidates: list[SearchHit],
+        hits: list[SearchHit],
+        stats: SearchStats,
+        rerank: dict[str, Any],
+    ) -> AgentResult:
         evidence = [self._format_hit(hit) for hit in hits]
-        confidence = hits[0].score if hits else 0.0
+        # Confidence stays on the first-stage cosine scale the review threshold expects.
+        confidence = candidates[0].score if candidates else 0.0
 
         if evidence:
             answer = "문서를 참고해 요약을 제공합니다."
         else:
             answer = "관련 문서를 찾지 못했습니다."
 
-        return AgentResult(answer=answer, evidence=evidence, confidence=confidence)
+        metrics: dict[str, Any] = {"retrieval": stats.to_dict(), "rerank": rerank}
+        # Skipping the rerank for time still answers, from first-stage order.
+        degraded = rerank["reason"] == "deadline"
+        if degraded:
+            metrics["degraded"] = ["rerank"]
+        return AgentResult(
+            answer=answer,
+            evidence=evidence,
+            confidence=confidence,
+            metrics=metrics,
+            degraded=degraded,
+        )
+
+    def _current_retriever(self) -> TfidfRetriever:
+        return self._retriever if self._retriever is not None else get_retriever()
+
+    def _rerank(
+        self,
+        retriever: TfidfRetriever,
+        question: str,
+        candidates: list[SearchHit],
+        trace_id: str | None,
+        deadline: Deadline | None = None,
+    ) -> tuple[list[SearchHit], dict[str, Any]]:
+        skip_reason = self._skip_reason(deadline)
+        slots = get_rerank_slots()
+        if not skip_reason and not slots.try_acquire():
+            skip_reason = "load"
+        if skip_reason:
+            self._log_rerank(trace_id, len(candidates), 0.0, True, skip_reason)
+            return candidates[: self._top_k], _rerank_metrics(0.0, True, skip_reason)
+
+        try:
+            result = self._reranker.rerank(
+                question,
+                candidates,
+                top_k=self._top_k,
+                source=retriever,
+            )
+        finally:
+            slots.release()
+        self._log_rerank(
+            trace_id, len(candidates), result.elapsed_ms, result.skipped, result.reason
+        )
+        return result.hits, _rerank_metrics(result.elapsed_ms, result.skipped, result.reason)
+
+    def _skip_reason(self, deadline: Deadline | None = None) -> str:
+        if not self._rerank_enabled:
+            return "disabled"
+        if deadline is not None and deadline.remaining_ms() < self._reranker.budget_ms:
+            return "deadline"
+        return ""
+
+    def _log_rerank(
+        self,
+        trace_id: str | None,
+        candidates: int,
+        elapsed_ms: float,
+        skipped: bool,
+        reason: str,
+    ) -> None:
+        logger.info(
+            json.dumps(
+                {
+                    "event": "rerank",
+                    "trace_id": trace_id,
+                    "candidates": candidates,
+                    "elapsed_ms": round(elapsed_ms, 3),
+                    "skipped": skipped,
+                    "reason": reason,
+                },
+                ensure_ascii=False,
+            )
+        )
 
     def _format_hit(self, hit: SearchHit) -> str:
         snippet = " ".join(hit.text.splitlines()).strip()
         if len(snippet) > 240:
             snippet = f"{snippet[:237]}..."
         return f"{hit.doc_id}:{hit.chunk_id}: {snippet}"
+
+
+class RerankSlots:
+    """Process-wide cap on concurrent reranks, shared by every DocSearchAgent.
+
+    The check and the increment happen under one lock, so concurrent requests
+    can never push the count past ``limit``; a request that finds no free slot
+    skips reranking rather than waiting for one.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._inflight >= self._limit:
+                return False
+            self._inflight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._inflight -= 1
+
+
+_slots_lock = threading.Lock()
+_slots: RerankSlots | None = None
+
+
+def get_rerank_slots() -> RerankSlots:
+    """The shared slots, sized once from ``RERANK_MAX_INFLIGHT``."""
+    global _slots
+    if _slots is None:
+        with _slots_lock:
+            if _slots is None:
+                _slots = RerankSlots(
+                    int(os.getenv("RERANK_MAX_INFLIGHT", str(RERANK_MAX_INFLIGHT)))
+                )
+    return _slots
+
+
+def _deadline_result() -> AgentResult:
+    return AgentResult(
+        answer="시간 제한 안에 문서를 검색하지 못했습니다.",
+        evidence=[],
+        metrics={"degraded": ["retrieval"]},
+        degraded=True,
+    )
+
+
+def _rerank_metrics(elapsed_ms: float, skipped: bool, reason: str) -> dict[str, Any]:
+    return {"elapsed_ms": round(elapsed_ms, 3), "skipped": skipped, "reason": reason}
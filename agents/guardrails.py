@@ -1,31 +1,278 @@
 from __future__ import annotations
 
-from typing import Final
-
-_SENSITIVE_KEYWORDS: Final[list[str]] = [
-    "system prompt",
-    "prompt",
-    "dump",
-    "password",
-    "token",
-    "악성코드",
-    "malware",
-]
-
-
-def evaluate_question(question: str) -> dict[str, str | bool]:
-    lowered = question.lower()
-    for keyword in _SENSITIVE_KEYWORDS:
-        if keyword.lower() in lowered:
-            if keyword in {"악성코드", "malware"}:
-                return {
-                    "blocked": True,
-                    "reason": "sensitive request detected: 악성코드",
-                    "category": "cyber_abuse",
-                }
-            return {
-                "blocked": True,
-                "reason": f"sensitive request detected: {keyword}",
-                "category": "prompt_injection",
-            }
-    return {"blocked": False, "reason": "", "category": ""}
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Final, Sequence
+
+from agents.classifier import HashedNgramClassifier, load_classifier
+from agents.query_context import QueryContext
+from agents.reloading import ReloadingFile
+from agents.text import normalize_text
+from app.config import (
+    GUARDRAIL_MODEL_BUDGET_US,
+    GUARDRAIL_MODEL_MAX_CHARS,
+    GUARDRAIL_MODEL_THRESHOLD,
+)
+
+_CONFIG_DIR: Final[Path] = Path(__file__).resolve().parent.parent / "config"
+DEFAULT_GUARDRAILS_CONFIG: Final[Path] = _CONFIG_DIR / "guardrails.json"
+DEFAULT_GUARDRAIL_MODEL: Final[Path] = _CONFIG_DIR / "guardrail_model.json"
+BENIGN_LABEL: Final[str] = "benign"
+
+logger = logging.getLogger("guardrails")
+
+
+@dataclass(frozen=True)
+class GuardrailRule:
+    """One blocklist entry: a literal keyword or a regex, tagged with a category.
+
+    Rules are ordered; when several match, the earliest one names the reason.
+    A "review" rule only blocks on its own when no second-stage model is
+    configured; otherwise the model decides.
+    """
+
+    pattern: str
+    category: str
+    is_regex: bool = False
+    label: str = ""
+    action: str = "block"
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: one pass over the text finds every pattern."""
+
+    def __init__(self, patterns: Sequence[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        outputs: list[list[int]] = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(pattern_id)
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                # Fold the suffix state's matches in so the scan never walks fail links to report.
+                outputs[nxt].extend(outputs[self._fail[nxt]])
+        self._outputs = [tuple(out) for out in outputs]
+
+    def find(self, text: str) -> set[int]:
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found: set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
+
+
+class GuardrailEngine:
+    """A blocklist compiled into one Aho-Corasick automaton and one combined regex.
+
+    Keywords are matched case-insensitively as substrings in a single scan. The
+    regexes are joined into one alternation that serves as a prefilter: a
+    question none of them matches is rejected in one scan, and only a question
+    that hits the prefilter is checked rule by rule, so every matching regex
+    category is reported even when two rules match the same span.
+    """
+
+    def __init__(self, rules: Sequence[GuardrailRule], version: int = 1) -> None:
+        self.rules = tuple(rules)
+        self.version = version
+        keyword_ids = [i for i, rule in enumerate(self.rules) if not rule.is_regex]
+        self._keyword_ids = keyword_ids
+        self._automaton = AhoCorasick([normalize_text(self.rules[i].pattern) for i in keyword_ids])
+        self._regex_rules = tuple(
+            (i, re.compile(rule.pattern, re.IGNORECASE))
+            for i, rule in enumerate(self.rules)
+            if rule.is_regex
+        )
+        self._regex = (
+            re.compile(
+                "|".join(f"(?:{pattern.pattern})" for _, pattern in self._regex_rules),
+                re.IGNORECASE,
+            )
+            if self._regex_rules
+            else None
+        )
+
+    def matches(self, question: str, normalized: bool = False) -> list[int]:
+        """Ids of every rule matching ``question``, in rule order.
+
+        Pass ``normalized=True`` when ``question`` already went through normalize_text.
+        """
+        text = question if normalized else normalize_text(question)
+        found = {self._keyword_ids[i] for i in self._automaton.find(text)}
+        if self._regex is not None and self._regex.search(text):
+            found.update(i for i, pattern in self._regex_rules if pattern.search(text))
+        return sorted(found)
+
+    def evaluate(
+        self, question: str, review_blocks: bool = True, normalized: bool = False
+    ) -> dict[str, Any]:
+        """Keyword-stage verdict; with ``review_blocks=False`` review-only hits pass."""
+        matched = self.matches(question, normalized=normalized)
+        if not review_blocks:
+            matched = [rule_id for rule_id in matched if self.rules[rule_id].action == "block"]
+        if not matched:
+            return {"blocked": False, "reason": "", "category": "", "categories": []}
+        first = self.rules[matched[0]]
+        categories: list[str] = []
+        for rule_id in matched:
+            category = self.rules[rule_id].category
+            if category not in categories:
+                categories.append(category)
+        return {
+            "blocked": True,
+            "reason": f"sensitive request detected: {first.label or first.pattern}",
+            "category": first.category,
+            "categories": categories,
+        }
+
+
+def parse_guardrail_config(payload: object) -> GuardrailEngine:
+    """Compile a decoded blocklist; raises ValueError on malformed input."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("rules"), list):
+        raise ValueError("guardrail config needs a 'rules' list")
+    rules: list[GuardrailRule] = []
+    for raw in payload["rules"]:
+        if not isinstance(raw, dict) or not raw.get("category"):
+            raise ValueError("each guardrail rule needs a 'category'")
+        category, label = str(raw["category"]), str(raw.get("label") or "")
+        action = str(raw.get("action") or "block")
+        if action not in {"block", "review"}:
+            raise ValueError(f"unknown guardrail action: {action}")
+        if raw.get("regex"):
+            try:
+                compiled = re.compile(str(raw["regex"]))
+            except re.error as exc:
+                raise ValueError(f"invalid guardrail regex {raw['regex']!r}: {exc}") from exc
+            # Groups (and so backreferences) would clash once the rules share one pattern.
+            if compiled.groups:
+                raise ValueError(
+                    f"guardrail regex {raw['regex']!r} must not use capturing groups; "
+                    "use (?:...) instead"
+                )
+            rules.append(GuardrailRule(str(raw["regex"]), category, True, label, action))
+        elif raw.get("keyword"):
+            rules.append(GuardrailRule(str(raw["keyword"]), category, False, label, action))
+        else:
+            raise ValueError("each guardrail rule needs a 'keyword' or 'regex'")
+    try:
+        return GuardrailEngine(rules, version=int(payload.get("version") or 1))
+    except re.error as exc:
+        raise ValueError(f"guardrail regexes do not combine: {exc}") from exc
+
+
+def load_guardrail_config(path: str | Path = DEFAULT_GUARDRAILS_CONFIG) -> GuardrailEngine:
+    with open(path, encoding="utf-8") as handle:
+        return parse_guardrail_config(json.load(handle))
+
+
+_reloading_lock = threading.Lock()
+_reloading: ReloadingFile[GuardrailEngine] | None = None
+
+
+def get_guardrails() -> GuardrailEngine:
+    """Process-wide engine for ``GUARDRAILS_CONFIG`` (default ``config/guardrails.json``)."""
+    global _reloading
+    if _reloading is None:
+        with _reloading_lock:
+            if _reloading is None:
+                _reloading = ReloadingFile(
+                    os.getenv("GUARDRAILS_CONFIG") or DEFAULT_GUARDRAILS_CONFIG,
+                    load_guardrail_config,
+                    interval=float(os.getenv("GUARDRAILS_RELOAD_SECONDS", "5")),
+                    name="guardrails",
+                )
+    return _reloading.current()
+
+
+def get_guardrail_model() -> HashedNgramClassifier | None:
+    """The second-stage classifier when ``GUARDRAIL_MODEL=true``, else None."""
+    if os.getenv("GUARDRAIL_MODEL", "false").lower() != "true":
+        return None
+    return load_classifier(os.getenv("GUARDRAIL_MODEL_PATH") or str(DEFAULT_GUARDRAIL_MODEL))
+
+
+def evaluate_question(question: str, context: QueryContext | None = None) -> dict[str, Any]:
+    text = context.text if context is not None else normalize_text(question)
+    engine = get_guardrails()
+    model = get_guardrail_model()
+    if model is None:
+        return engine.evaluate(text, normalized=True)
+    result = engine.evaluate(text, review_blocks=False, normalized=True)
+    if result["blocked"]:
+        return result
+    verdict = _model_stage(model, text)
+    if verdict is None:
+        # Inconclusive: the keyword stage decides, review rules included.
+        return engine.evaluate(text, normalized=True)
+    return verdict
+
+
+def _model_stage(model: HashedNgramClassifier, question: str) -> dict[str, Any] | None:
+    """Classifier verdict, or None when it cannot clear the question.
+
+    Scoring is linear in the text, so only the first ``GUARDRAIL_MODEL_MAX_CHARS``
+    are scored. A flag always blocks, but a clean score only clears the
+    question when the model saw all of it within ``GUARDRAIL_MODEL_BUDGET_US``;
+    otherwise padding could push an injection out of view.
+    """
+    max_chars = int(os.getenv("GUARDRAIL_MODEL_MAX_CHARS", str(GUARDRAIL_MODEL_MAX_CHARS)))
+    budget_us = float(os.getenv("GUARDRAIL_MODEL_BUDGET_US", str(GUARDRAIL_MODEL_BUDGET_US)))
+    threshold = float(os.getenv("GUARDRAIL_MODEL_THRESHOLD", str(GUARDRAIL_MODEL_THRESHOLD)))
+    start = time.perf_counter()
+    probs = model.scores(question[:max_chars])
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    harmful = [i for i, label in enumerate(model.labels) if label != BENIGN_LABEL]
+    best = max(harmful, key=probs.__getitem__) if harmful else None
+    score = round(probs[best], 4) if best is not None else 0.0
+    if best is not None and score >= threshold:
+        category = model.labels[best]
+        return {
+            "blocked": True,
+            "reason": f"classifier flagged: {category}",
+            "category": category,
+            "categories": [category],
+            "score": score,
+        }
+    over_budget = elapsed_us > budget_us
+    if over_budget:
+        logger.warning(
+            json.dumps(
+                {
+                    "event": "guardrail_model_over_budget",
+                    "elapsed_us": round(elapsed_us, 1),
+                    "budget_us": budget_us,
+                },
+                ensure_ascii=False,
+            )
+        )
+    if over_budget or len(question) > max_chars:
+        return None
+    return {"blocked": False, "reason": "", "category": "", "categories": [], "score": score}
@@ -1,15 +1,139 @@
 from __future__ import annotations
 
+import concurrent.futures
+import importlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, replace
+from functools import partial
+from typing import Any, Callable, Mapping, Sequence
+
+import anyio.to_thread
+
 from agents.base import Agent, AgentResult
-from agents.content_creator_agent import ContentCreatorAgent
-from agents.crypto_analysis_agent import CryptoAnalysisAgent
-from agents.direct_answer_agent import DirectAnswerAgent
-from agents.doc_search_agent import DocSearchAgent
-from agents.portfolio_manager_workflow import PortfolioManagerWorkflow
-from agents.workflow_agent import WorkflowAgent
+from agents.classifier import HashedNgramClassifier
+from agents.query_context import QueryContext
+from agents.routing import RouteExplanation, Router, get_route_classifier, get_router
+from app.config import (
+    RETRIEVAL_CONFIDENCE_THRESHOLD,
+    SPECULATION_DEADLINE_MS,
+    SPECULATION_MAX_WORKERS,
+)
+
+AgentFactory = Callable[[], Agent]
+
+
+def lazy_factory(module: str, name: str) -> AgentFactory:
+    """A factory that imports ``module`` only when the agent is first built."""
+
+    def build() -> Agent:
+        return getattr(importlib.import_module(module), name)()
+
+    build.__qualname__ = name
+    return build
+
+
+# Agent modules (and what they pull in: the retriever, sqlite stores, the tool
+# registry) are imported on first use rather than when the app starts.
+DEFAULT_AGENT_FACTORIES: dict[str, AgentFactory] = {
+    "doc_search": lazy_factory("agents.doc_search_agent", "DocSearchAgent"),
+    "direct_answer": lazy_factory("agents.direct_answer_agent", "DirectAnswerAgent"),
+    "workflow": lazy_factory("agents.workflow_agent", "WorkflowAgent"),
+    "crypto_analysis": lazy_factory("agents.crypto_analysis_agent", "CryptoAnalysisAgent"),
+    "content_creator": lazy_factory("agents.content_creator_agent", "ContentCreatorAgent"),
+    "portfolio_workflow": lazy_factory(
+        "agents.portfolio_manager_workflow", "PortfolioManagerWorkflow"
+    ),
+}
+
+# Routes without side effects that speculative routing may run concurrently,
+# with the extra run() arguments that keep them read-only. A dry run's result
+# carries a ``commit`` that the winner's side records are written through.
+SPECULATIVE_ROUTES: dict[str, dict[str, Any]] = {
+    "doc_search": {},
+    "crypto_analysis": {"dry_run": True},
+    "direct_answer": {},
+}
+
+# Routes whose answers depend only on the question and the indexed docs.
+READ_ONLY_ROUTES: frozenset[str] = frozenset({"doc_search", "direct_answer"})
+
+# Routes whose agents answer many questions in one call (``arun_many``) when batched.
+_BATCHED_ROUTES: frozenset[str] = frozenset({"doc_search"})
+
+
+@dataclass(frozen=True)
+class RouteRequest:
+    question: str
+    actor: object | None = None
+    trace_id: str | None = None
+    context: QueryContext | None = None
+
+
+logger = logging.getLogger("routing")
+_speculation_pool: concurrent.futures.ThreadPoolExecutor | None = None
+_speculation_slots: threading.BoundedSemaphore | None = None
+_speculation_pool_lock = threading.Lock()
+
+
+def _speculation_executor() -> (
+    tuple[concurrent.futures.ThreadPoolExecutor, threading.BoundedSemaphore]
+):
+    """The pool for synchronous speculation and one slot per worker in it.
+
+    Sized by ``SPECULATION_MAX_WORKERS``. A candidate is submitted only after
+    taking a slot, so it always starts on an idle worker instead of queueing
+    behind abandoned candidates from other requests.
+    """
+    global _speculation_pool, _speculation_slots
+    if _speculation_pool is None or _speculation_slots is None:
+        with _speculation_pool_lock:
+            if _speculation_pool is None or _speculation_slots is None:
+                workers = max(
+                    1, int(os.getenv("SPECULATION_MAX_WORKERS", str(SPECULATION_MAX_WORKERS)))
+                )
+                _speculation_slots = threading.BoundedSemaphore(workers)
+                _speculation_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix="speculation"
+                )
+    return _speculation_pool, _speculation_slots
+
+
+def _speculation_score(route: str, result: AgentResult) -> float:
+    """Comparable answer quality for a speculative candidate."""
+    if route == "crypto_analysis":
+        # Evidence is only produced when a portfolio was actually parsed.
+        return 1.0 if result.evidence else 0.0
+    if result.confidence is not None:
+        return result.confidence
+    # Answers without a confidence win only when retrieval is below the review bar.
+    return RETRIEVAL_CONFIDENCE_THRESHOLD
+
+
+# Agents whose name differs from their route key, for answers built without the agent.
+_ROUTE_AGENT_NAMES: dict[str, str] = {"portfolio_workflow": "portfolio_manager"}
+
+
+def _deadline_result(agent_name: str) -> AgentResult:
+    return AgentResult(
+        answer="시간 제한 안에 답변을 완성하지 못했습니다.",
+        evidence=[],
+        metrics={"degraded": [agent_name]},
+        degraded=True,
+    )
 
 
 class Orchestrator:
+    """Routes questions to agents, constructing each agent on first use.
+
+    Agents passed in explicitly are used as-is; every other route is built by
+    its registered factory the first time a question needs it, so a process
+    that only ever routes to ``workflow`` never loads the retrieval index.
+    """
+
     def __init__(
         self,
         doc_search: Agent | None = None,
@@ -18,146 +142,499 @@ class Orchestrator:
         crypto_analysis: Agent | None = None,
         content_creator: Agent | None = None,
         portfolio_workflow: Agent | None = None,
+        router: Router | None = None,
+        factories: Mapping[str, AgentFactory] | None = None,
+        classifier: HashedNgramClassifier | None = None,
+        classifier_threshold: float | None = None,
+        speculative: bool | None = None,
+        speculation_deadline_ms: float | None = None,
     ) -> None:
-        self._doc_search = doc_search or DocSearchAgent()
-        self._direct_answer = direct_answer or DirectAnswerAgent()
-        self._workflow = workflow or WorkflowAgent()
-        self._crypto_analysis = crypto_analysis or CryptoAnalysisAgent()
-        self._content_creator = content_creator or ContentCreatorAgent()
-        self._portfolio_workflow = portfolio_workflow or PortfolioManagerWorkflow()
+        self._factories: dict[str, AgentFactory] = dict(DEFAULT_AGENT_FACTORIES)
+        self._factories.update(factories or {})
+        self._agents: dict[str, Agent] = {}
+        self._locks: dict[str, threading.Lock] = {
+            route: threading.Lock() for route in self._factories
+        }
+        self._registry_lock = threading.Lock()
+        provided = {
+            "doc_search": doc_search,
+            "direct_answer": direct_answer,
+            "workflow": workflow,
+            "crypto_analysis": crypto_analysis,
+            "content_creator": content_creator,
+            "portfolio_workflow": portfolio_workflow,
+        }
+        for route, agent in provided.items():
+            if agent is not None:
+                self._agents[route] = agent
+        self._router = router
+        self._classifier = classifier
+        self._speculative = (
+            speculative
+            if speculative is not None
+            else os.getenv("SPECULATIVE_ROUTING", "false").lower() == "true"
+        )
+        self._speculation_deadline_ms = (
+            speculation_deadline_ms
+            if speculation_deadline_ms is not None
+            else float(os.getenv("SPECULATION_DEADLINE_MS", str(SPECULATION_DEADLINE_MS)))
+        )
+        self._classifier_threshold = (
+            classifier_threshold
+            if classifier_threshold is not None
+            else float(os.getenv("ROUTING_CLASSIFIER_THRESHOLD", "0.9"))
+        )
+
+    def register(self, route: str, factory: AgentFactory) -> None:
+        """Register (or replace) the factory for ``route``; takes effect on next build."""
+        with self._registry_lock:
+            self._factories[route] = factory
+            self._locks.setdefault(route, threading.Lock())
+            self._agents.pop(route, None)
+
+    def is_loaded(self, route: str) -> bool:
+        return route in self._agents
+
+    def agent_name(self, route: str) -> str:
+        """The ``chosen_agent`` name ``route`` answers under, without building its agent."""
+        agent = self._agents.get(route)
+        if agent is not None:
+            return agent.name
+        return _ROUTE_AGENT_NAMES.get(route, route)
+
+    def deadline_answer(self, route: str) -> tuple[str, AgentResult]:
+        """The degraded ``(agent name, result)`` for ``route`` when time has run out."""
+        name = self.agent_name(route)
+        return name, _deadline_result(name)
 
     def route(
         self,
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult:
-        return self.route_with_choice(question, actor=actor, trace_id=trace_id)[1]
+        return self.route_with_choice(question, actor=actor, trace_id=trace_id, context=context)[1]
 
     def route_with_choice(
         self,
         question: str,
         actor: object | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> tuple[str, AgentResult]:
-        if self._is_portfolio_action_request(question):
-            return (
-                self._portfolio_workflow.name,
-                self._portfolio_workflow.run(question, actor=actor, trace_id=trace_id),
-            )
-        if self._is_content_request(question):
-            return (
-                self._content_creator.name,
-                self._content_creator.run(question, actor=actor, trace_id=trace_id),
-            )
-        if self._is_crypto_analysis_request(question):
-            return (
-                self._crypto_analysis.name,
-                self._crypto_analysis.run(question, actor=actor, trace_id=trace_id),
+        ctx = self._context(question, context)
+        candidates = self.speculation_candidates(question, ctx)
+        if candidates:
+            return self._speculate(candidates, ctx, actor, trace_id)
+        route = self.choose(question, ctx)
+        if ctx.deadline is not None and ctx.deadline.expired():
+            return self.deadline_answer(route)
+        agent = self.agent(route)
+        return agent.name, agent.run(question, actor=actor, trace_id=trace_id, context=ctx)
+
+    async def aroute_with_choice(
+        self,
+        question: str,
+        actor: object | None = None,
+        trace_id: str | None = None,
+        context: QueryContext | None = None,
+    ) -> tuple[str, AgentResult]:
+        ctx = self._context(question, context)
+        candidates = self.speculation_candidates(question, ctx)
+        if candidates:
+            return await self._aspeculate(candidates, ctx, actor, trace_id)
+        route = self.choose(question, ctx)
+        return await self._arun(route, ctx, actor, trace_id)
+
+    async def aroute_many(
+        self,
+        requests: Sequence[RouteRequest],
+    ) -> list[tuple[str, AgentResult]]:
+        """Route a batch of questions and answer them concurrently, in request order.
+
+        Two or more questions bound for a batched route (doc search) are handed
+        to its agent's ``arun_many`` together; every other question runs on its
+        own, speculative ones included.
+        """
+        results: list[tuple[str, AgentResult]] = [None] * len(requests)  # type: ignore[list-item]
+        contexts = [self._context(req.question, req.context) for req in requests]
+        speculative: list[int] = []
+        direct: list[int] = []
+        for i, ctx in enumerate(contexts):
+            (speculative if self.speculation_candidates(ctx.question, ctx) else direct).append(i)
+        routes = self.choose_batch(
+            [contexts[i].question for i in direct], [contexts[i] for i in direct]
+        )
+        grouped: dict[str, list[int]] = {}
+        for i, route in zip(direct, routes):
+            grouped.setdefault(route, []).append(i)
+
+        async def run_speculative(i: int) -> None:
+            req = requests[i]
+            results[i] = await self.aroute_with_choice(
+                req.question, actor=req.actor, trace_id=req.trace_id, context=contexts[i]
             )
-        if self._is_action_request(question):
-            return self._workflow.name, self._workflow.run(question, actor=actor, trace_id=trace_id)
-        if self._is_doc_question(question):
-            return self._doc_search.name, self._doc_search.run(
-                question,
-                actor=actor,
-                trace_id=trace_id,
+
+        async def run_one(route: str, i: int) -> None:
+            req = requests[i]
+            results[i] = await self._arun(route, contexts[i], req.actor, req.trace_id)
+
+        async def run_group(route: str, indexes: list[int]) -> None:
+            if self.is_loaded(route):
+                agent = self.agent(route)
+            else:
+                agent = await anyio.to_thread.run_sync(self.agent, route)
+            arun_many = getattr(agent, "arun_many", None)
+            if arun_many is None:
+                for i in indexes:
+                    await run_one(route, i)
+                return
+            answers = await arun_many(
+                [requests[i].question for i in indexes],
+                [requests[i].trace_id for i in indexes],
+                contexts=[contexts[i] for i in indexes],
             )
-        return self._direct_answer.name, self._direct_answer.run(
-            question,
-            actor=actor,
-            trace_id=trace_id,
+            for i, result in zip(indexes, answers):
+                results[i] = (agent.name, result)
+
+        async with anyio.create_task_group() as tg:
+            for route, indexes in grouped.items():
+                if route in _BATCHED_ROUTES and len(indexes) > 1:
+                    tg.start_soon(run_group, route, indexes)
+                    continue
+                for i in indexes:
+                    tg.start_soon(run_one, route, i)
+            for i in speculative:
+                tg.start_soon(run_speculative, i)
+        return results
+
+    def _context(self, question: str, context: QueryContext | None) -> QueryContext:
+        if context is not None and context.question == question:
+            return context
+        return QueryContext.build(question, router=self._current_router())
+
+    async def _arun(
+        self,
+        route: str,
+        ctx: QueryContext,
+        actor: object | None,
+        trace_id: str | None,
+        abandon_on_cancel: bool = False,
+        **kwargs: Any,
+    ) -> tuple[str, AgentResult]:
+        """Run one agent, within ``ctx.deadline`` when there is one.
+
+        Read-only and dry-run agents are abandoned when the budget runs out and
+        a degraded result stands in for theirs. Agents with side effects are
+        never cut off mid-run; they get the deadline on ``ctx`` and check it
+        themselves (the workflow agent caps each tool call with it).
+        """
+        deadline = ctx.deadline
+        if deadline is None:
+            return await self._arun_agent(route, ctx, actor, trace_id, abandon_on_cancel, **kwargs)
+        if deadline.expired():
+            return self.deadline_answer(route)
+        if route not in READ_ONLY_ROUTES and not kwargs:
+            return await self._arun_agent(route, ctx, actor, trace_id, abandon_on_cancel)
+        with anyio.move_on_after(deadline.remaining()):
+            return await self._arun_agent(route, ctx, actor, trace_id, True, **kwargs)
+        return self.deadline_answer(route)
+
+    async def _arun_agent(
+        self,
+        route: str,
+        ctx: QueryContext,
+        actor: object | None,
+        trace_id: str | None,
+        abandon_on_cancel: bool,
+        **kwargs: Any,
+    ) -> tuple[str, AgentResult]:
+        if self.is_loaded(route):
+            agent = self.agent(route)
+        else:
+            # First use may load an index from disk; keep that off the event loop.
+            agent = await anyio.to_thread.run_sync(self.agent, route)
+        arun = getattr(agent, "arun", None)
+        if arun is not None and not kwargs:
+            return agent.name, await arun(ctx.question, actor=actor, trace_id=trace_id, context=ctx)
+        result = await anyio.to_thread.run_sync(
+            partial(agent.run, ctx.question, actor=actor, trace_id=trace_id, context=ctx, **kwargs),
+            abandon_on_cancel=abandon_on_cancel,
         )
+        return agent.name, result
 
-    def chosen_agent(self, question: str) -> str:
-        return self.route_with_choice(question)[0]
-
-    def _is_doc_question(self, question: str) -> bool:
-        lowered = question.lower()
-        doc_keywords = [
-            "docs",
-            "readme",
-            "runbook",
-            "architecture",
-            "decisions",
-            "eval",
-            "day-1",
-            "day1",
-            "ask",
-            "/ask",
-            "endpoint",
-            "엔드포인트",
-            "백업",
-            "복구",
-            "검증",
-            "절차",
-            "런북",
-            "운영",
-            "체크리스트",
-            "장애",
-            "원인",
-            "모니터링",
-            "티켓",
-            "알림",
-            "incident",
-        ]
-        return any(keyword in lowered for keyword in doc_keywords)
-
-    def _is_crypto_analysis_request(self, question: str) -> bool:
-        lowered = question.lower()
-        primary = ["portfolio", "positions", "crypto"]
-        secondary = ["analysis", "analyze", "summary", "risk", "concentration"]
-        if any(keyword in lowered for keyword in primary):
-            return True
-        if any(keyword in lowered for keyword in secondary) and "positions" in lowered:
-            return True
-        return False
-
-    def _is_content_request(self, question: str) -> bool:
-        lowered = question.lower()
-        keywords = [
-            "draft",
-            "thread",
-            "tweet",
-            "write",
-            "create post",
-            "x post",
-            "content",
-        ]
-        return any(keyword in lowered for keyword in keywords)
-
-    def _is_portfolio_action_request(self, question: str) -> bool:
-        lowered = question.lower()
-        keywords = [
-            "rebalance",
-            "rebalancing",
-            "execute",
-            "publish",
-            "post now",
-            "trade",
-        ]
-        return any(keyword in lowered for keyword in keywords)
-
-    def _is_action_request(self, question: str) -> bool:
-        lowered = question.lower()
-        if "webhook" in lowered or "http post" in lowered or "http_post" in lowered:
-            return True
-        if "restart" in lowered or "재시작" in question:
-            return True
-        if "notify" in lowered or "알림" in question:
-            return True
-        ticket_requested = "ticket" in lowered and any(
-            verb in lowered for verb in ("create", "make", "open", "raise")
+    def speculation_candidates(
+        self, question: str, context: QueryContext | None = None
+    ) -> list[str]:
+        """Read-only routes worth running side by side for ``question``.
+
+        Empty unless speculation is enabled, the priority route is read-only and
+        at least two read-only intents matched. The default route joins as a
+        fallback candidate. Side-effecting routes are never speculated on.
+        """
+        if not self._speculative:
+            return []
+        primary = self.choose(question, context)
+        if primary not in SPECULATIVE_ROUTES:
+            return []
+        router = self._current_router()
+        mask = context.mask_for(router) if context is not None else router.matcher.scan(question)
+        fired = [r for r in router.routes(mask) if r in SPECULATIVE_ROUTES]
+        if len(fired) < 2:
+            return []
+        candidates = [primary] + [r for r in fired if r != primary]
+        if router.default in SPECULATIVE_ROUTES and router.default not in candidates:
+            candidates.append(router.default)
+        return candidates
+
+    def _speculate(
+        self,
+        candidates: list[str],
+        ctx: QueryContext,
+        actor: object | None,
+        trace_id: str | None,
+    ) -> tuple[str, AgentResult]:
+        started = time.perf_counter()
+        deadline = started + self._speculation_budget(ctx)
+        primary = candidates[0]
+        pool, slots = _speculation_executor()
+        futures: dict[str, concurrent.futures.Future[tuple[str, AgentResult, float]]] = {}
+        for route in candidates:
+            # Candidates that find no idle worker are not speculated on at all.
+            if not slots.acquire(blocking=False):
+                break
+            futures[route] = pool.submit(self._timed_run, route, ctx, actor, trace_id, started)
+            futures[route].add_done_callback(lambda _: slots.release())
+        done: dict[str, tuple[str, AgentResult, float]] = {}
+        if primary not in futures:
+            # Saturated pool: answer with the primary alone, on this thread.
+            done[primary] = self._timed_run(primary, ctx, actor, trace_id, started)
+        for route, future in futures.items():
+            # The primary is awaited for as long as the request allows, so there
+            # is an answer to fall back on; the others get the speculation budget.
+            if route == primary:
+                timeout = ctx.deadline.remaining() if ctx.deadline is not None else None
+            else:
+                timeout = max(0.0, deadline - time.perf_counter())
+            try:
+                done[route] = future.result(timeout=timeout)
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                if route == primary:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    done[route] = (*self.deadline_answer(route), elapsed_ms)
+        winner = self._speculation_winner(candidates, done)
+        name, result = done[winner][0], done[winner][1]
+        if result.commit is not None:
+            # The winner ran in dry-run mode; persist the records it skipped.
+            result = result.commit()
+        return name, self._with_speculation_metrics(candidates, done, winner, result, trace_id)
+
+    async def _aspeculate(
+        self,
+        candidates: list[str],
+        ctx: QueryContext,
+        actor: object | None,
+        trace_id: str | None,
+    ) -> tuple[str, AgentResult]:
+        started = time.perf_counter()
+        done: dict[str, tuple[str, AgentResult, float]] = {}
+
+        async def run(route: str) -> None:
+            name, result = await self._arun(
+                route,
+                ctx,
+                actor,
+                trace_id,
+                abandon_on_cancel=route != candidates[0],
+                **SPECULATIVE_ROUTES[route],
+            )
+            done[route] = (name, result, (time.perf_counter() - started) * 1000)
+
+        async with anyio.create_task_group() as primary_group:
+            primary_group.start_soon(run, candidates[0])
+            with anyio.move_on_after(self._speculation_budget(ctx)):
+                async with anyio.create_task_group() as others:
+                    for route in candidates[1:]:
+                        others.start_soon(run, route)
+
+        winner = self._speculation_winner(candidates, done)
+        name, result = done[winner][0], done[winner][1]
+        if result.commit is not None:
+            result = await anyio.to_thread.run_sync(result.commit)
+        return name, self._with_speculation_metrics(candidates, done, winner, result, trace_id)
+
+    def _speculation_budget(self, ctx: QueryContext) -> float:
+        """Seconds the non-primary candidates get: the speculation deadline, capped by ctx's."""
+        budget = self._speculation_deadline_ms / 1000.0
+        if ctx.deadline is not None:
+            budget = min(budget, ctx.deadline.remaining())
+        return budget
+
+    def _timed_run(
+        self,
+        route: str,
+        ctx: QueryContext,
+        actor: object | None,
+        trace_id: str | None,
+        started: float,
+    ) -> tuple[str, AgentResult, float]:
+        agent = self.agent(route)
+        result = agent.run(
+            ctx.question, actor=actor, trace_id=trace_id, context=ctx, **SPECULATIVE_ROUTES[route]
         )
-        ticket_requested = ticket_requested or (
-            "티켓" in question and any(verb in question for verb in ("만들", "생성"))
+        return agent.name, result, (time.perf_counter() - started) * 1000
+
+    def _speculation_winner(
+        self,
+        candidates: list[str],
+        done: Mapping[str, tuple[str, AgentResult, float]],
+    ) -> str:
+        # max() keeps the first of equal scores, so ties go to the higher-priority route.
+        return max(
+            (route for route in candidates if route in done),
+            key=lambda route: _speculation_score(route, done[route][1]),
         )
-        if ticket_requested:
-            return True
-        runbook_requested = "runbook" in lowered and any(
-            verb in lowered for verb in ("generate", "create", "make", "write")
+
+    def _with_speculation_metrics(
+        self,
+        candidates: list[str],
+        done: Mapping[str, tuple[str, AgentResult, float]],
+        winner: str,
+        result: AgentResult,
+        trace_id: str | None,
+    ) -> AgentResult:
+        per_candidate = {
+            route: (
+                {
+                    "completed": True,
+                    "latency_ms": round(done[route][2], 3),
+                    "score": round(_speculation_score(route, done[route][1]), 4),
+                }
+                if route in done
+                else {"completed": False}
+            )
+            for route in candidates
+        }
+        speculation = {
+            "winner": winner,
+            "deadline_ms": self._speculation_deadline_ms,
+            "candidates": per_candidate,
+        }
+        logger.info(
+            json.dumps(
+                {"event": "speculation", "trace_id": trace_id, **speculation}, ensure_ascii=False
+            )
         )
-        runbook_requested = runbook_requested or (
-            "런북" in question and any(verb in question for verb in ("작성", "만들"))
+        return replace(result, metrics={**(result.metrics or {}), "speculation": speculation})
+
+    def choose(self, question: str, context: QueryContext | None = None) -> str:
+        """Return the route key for ``question`` without running any agent."""
+        router = self._current_router()
+        if context is not None:
+            rule_route = router.resolve(context.mask_for(router))
+        else:
+            rule_route = router.route(question)
+        classifier = self._current_classifier()
+        if classifier is None:
+            return rule_route
+        label, confidence = classifier.predict(context.text if context is not None else question)
+        return self._pick(classifier, rule_route, label, confidence)
+
+    def choose_batch(
+        self,
+        questions: Sequence[str],
+        contexts: Sequence[QueryContext] | None = None,
+    ) -> list[str]:
+        """Route keys for many questions, classifying them in one batch."""
+        router = self._current_router()
+        if contexts is not None:
+            rule_routes = [router.resolve(ctx.mask_for(router)) for ctx in contexts]
+            texts: Sequence[str] = [ctx.text for ctx in contexts]
+        else:
+            rule_routes = [router.route(question) for question in questions]
+            texts = questions
+        classifier = self._current_classifier()
+        if classifier is None:
+            return rule_routes
+        predictions = classifier.predict_batch(texts)
+        return [
+            self._pick(classifier, rule_route, label, confidence)
+            for rule_route, (label, confidence) in zip(rule_routes, predictions)
+        ]
+
+    def route_explain(self, question: str) -> RouteExplanation:
+        """Return the route for ``question`` and the rule (or model) that selected it."""
+        explanation = self._current_router().explain(question)
+        classifier = self._current_classifier()
+        if classifier is None:
+            return explanation
+        label, confidence = classifier.predict(question)
+        if self._pick(classifier, explanation.route, label, confidence) == explanation.route:
+            return explanation
+        return replace(
+            explanation,
+            route=label,
+            intent=label,
+            priority=None,
+            clause=(),
+            language=None,
+            keywords=(),
+            source="classifier",
+            confidence=confidence,
         )
-        return runbook_requested
+
+    def _pick(
+        self,
+        classifier: HashedNgramClassifier,
+        rule_route: str,
+        label: str,
+        confidence: float,
+    ) -> str:
+        # Below the threshold the keyword rules decide. The model also cannot
+        # overrule an intent it was never trained on.
+        if confidence < self._classifier_threshold or rule_route not in classifier.labels:
+            return rule_route
+        return label
+
+    def _current_classifier(self) -> HashedNgramClassifier | None:
+        return self._classifier if self._classifier is not None else get_route_classifier()
+
+    def _current_router(self) -> Router:
+        return self._router if self._router is not None else get_router()
+
+    def agent(self, route: str) -> Agent:
+        agent = self._agents.get(route)
+        if agent is not None:
+            return agent
+        lock = self._locks.get(route)
+        if lock is None:
+            raise KeyError(f"no agent registered for route: {route}")
+        with lock:
+            agent = self._agents.get(route)
+            if agent is None:
+                agent = self._factories[route]()
+                self._agents[route] = agent
+        return agent
+
+    def chosen_agent(self, question: str) -> str:
+        return self.agent(self.choose(question)).name
+
+
+_instance_lock = threading.Lock()
+_instance: Orchestrator | None = None
+
+
+def get_orchestrator() -> Orchestrator:
+    """Process-wide orchestrator, so each agent is built once and keeps its state.
+
+    Routing config and the classifier are still looked up per question, so
+    reloads take effect without replacing the orchestrator.
+    """
+    global _instance
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = Orchestrator()
+    return _instance
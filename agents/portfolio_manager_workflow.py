@@ -4,6 +4,7 @@ import re
 from uuid import uuid4
 
 from agents.base import AgentResult
+from agents.query_context import QueryContext, ensure_context
 from app.policy import Actor, decision_entry, evaluate_tool_access, resolve_actor
 
 ActionDict = dict[str, object]
@@ -17,8 +18,9 @@ class PortfolioManagerWorkflow:
         question: str,
         actor: Actor | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult:
-        plan, actions = self._build_plan_and_actions(question)
+        plan, actions = self._build_plan_and_actions(ensure_context(question, context))
         resolved_actor = actor if isinstance(actor, Actor) else resolve_actor(None, None)
         pending_actions: list[ActionDict] = []
         policy_decisions: list[dict[str, object]] = []
@@ -57,8 +59,8 @@ class PortfolioManagerWorkflow:
         }
         return AgentResult(answer=answer, evidence=[], workflow=workflow)
 
-    def _build_plan_and_actions(self, question: str) -> tuple[list[str], list[ActionDict]]:
-        lowered = question.lower()
+    def _build_plan_and_actions(self, ctx: QueryContext) -> tuple[list[str], list[ActionDict]]:
+        question, lowered = ctx.question, ctx.text
         actions: list[ActionDict] = []
 
         if "rebalance" in lowered or "rebalancing" in lowered:
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Final
+
+from agents.deadline import Deadline
+from agents.routing import Router, get_router
+from agents.text import normalize_text
+
+_TOKEN_RE: Final[re.Pattern[str]] = re.compile(r"[0-9a-z가-힣]+")
+_URL_WITH_LABEL: Final[re.Pattern[str]] = re.compile(r"url\s*[:=]\s*(https?://\S+)", re.IGNORECASE)
+_URL_ANY: Final[re.Pattern[str]] = re.compile(r"https?://\S+", re.IGNORECASE)
+_URL_TRAILING: Final[str] = ").,]"
+
+
+def extract_url(text: str) -> str | None:
+    """The ``url=``/``url:`` labelled URL in ``text``, else the first URL."""
+    if not text:
+        return None
+    match = _URL_WITH_LABEL.search(text)
+    if match:
+        return match.group(1).rstrip(_URL_TRAILING)
+    match = _URL_ANY.search(text)
+    if not match:
+        return None
+    return match.group(0).rstrip(_URL_TRAILING)
+
+
+@dataclass(frozen=True)
+class JsonSpan:
+    start: int
+    end: int
+    value: Any
+
+
+def extract_json_spans(text: str) -> tuple[JsonSpan, ...]:
+    """Every top-level JSON object embedded in ``text``, in order of appearance."""
+    decoder = json.JSONDecoder()
+    spans: list[JsonSpan] = []
+    index = text.find("{")
+    while index != -1:
+        try:
+            value, end = decoder.raw_decode(text, index)
+        except json.JSONDecodeError:
+            index = text.find("{", index + 1)
+            continue
+        spans.append(JsonSpan(index, end, value))
+        index = text.find("{", end)
+    return tuple(spans)
+
+
+@dataclass(frozen=True)
+class QueryContext:
+    """Everything derived from the question text, computed once per request.
+
+    ``text`` is NFKC-normalized and casefolded; URLs and JSON spans are taken
+    from the original question so their contents keep their case. ``mask`` is
+    the routing feature bitmask for ``router``. ``deadline``, when set, is the
+    time budget every stage answering the question should respect.
+    """
+
+    question: str
+    text: str
+    tokens: tuple[str, ...]
+    mask: int
+    features: frozenset[str]
+    urls: tuple[str, ...]
+    url: str | None
+    json_spans: tuple[JsonSpan, ...]
+    router: Router | None = field(default=None, compare=False, repr=False)
+    deadline: Deadline | None = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def build(
+        cls,
+        question: str,
+        router: Router | None = None,
+        deadline: Deadline | None = None,
+    ) -> QueryContext:
+        router = router or get_router()
+        text = normalize_text(question)
+        mask = router.matcher.scan(text, normalized=True)
+        return cls(
+            question=question,
+            text=text,
+            tokens=tuple(_TOKEN_RE.findall(text)),
+            mask=mask,
+            features=frozenset(router.matcher.features(mask)),
+            urls=tuple(m.group(0).rstrip(_URL_TRAILING) for m in _URL_ANY.finditer(question)),
+            url=extract_url(question),
+            json_spans=extract_json_spans(question) if "{" in question else (),
+            router=router,
+            deadline=deadline,
+        )
+
+    def mask_for(self, router: Router) -> int:
+        """The feature mask under ``router``, rescanning only if it is not the one used here."""
+        if router is self.router:
+            return self.mask
+        return router.matcher.scan(self.text, normalized=True)
+
+    def has_any(self, keywords: tuple[str, ...] | list[str]) -> bool:
+        text = self.text
+        return any(keyword in text for keyword in keywords)
+
+    def json_at(self, index: int) -> JsonSpan | None:
+        for span in self.json_spans:
+            if span.start == index:
+                return span
+        return None
+
+    def first_json_object(self) -> dict[str, Any] | None:
+        for span in self.json_spans:
+            if isinstance(span.value, dict):
+                return span.value
+        return None
+
+
+def ensure_context(question: str, context: QueryContext | None) -> QueryContext:
+    """``context`` when it was built for ``question``, else a fresh one."""
+    if context is not None and context.question == question:
+        return context
+    return QueryContext.build(question)
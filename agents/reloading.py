@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+logger = logging.getLogger("reloading")
+
+
+class ReloadingFile(Generic[T]):
+    """Holds a value compiled from a config file and swaps it when the file changes.
+
+    The file's mtime is checked at most every ``interval`` seconds. A new value
+    is built completely before it replaces the old one, so callers see either
+    the old config or the new one, never a mix; a file that fails to build is
+    logged and the previous value stays in place.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        build: Callable[[Path], T],
+        interval: float = 5.0,
+        name: str = "config",
+    ) -> None:
+        self._path = Path(path)
+        self._build = build
+        self._interval = interval
+        self._name = name
+        self._lock = threading.Lock()
+        self._mtime = self._stat()
+        self._value = build(self._path)
+        self._checked_at = time.monotonic()
+
+    def current(self) -> T:
+        now = time.monotonic()
+        value = self._value
+        if now - self._checked_at < self._interval:
+            return value
+        with self._lock:
+            if now - self._checked_at >= self._interval:
+                self._checked_at = now
+                mtime = self._stat()
+                if mtime != self._mtime:
+                    self._reload(mtime)
+            return self._value
+
+    def _reload(self, mtime: float | None) -> None:
+        try:
+            value = self._build(self._path)
+        except Exception as exc:  # any parse failure keeps the last good value
+            logger.error(
+                json.dumps(
+                    {
+                        "event": f"{self._name}_reload_failed",
+                        "path": str(self._path),
+                        "error": str(exc),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        else:
+            self._value = value
+            logger.info(
+                json.dumps(
+                    {
+                        "event": f"{self._name}_reloaded",
+                        "path": str(self._path),
+                        "version": getattr(value, "version", None),
+                    },
+                    ensure_ascii=False,
+                )
+            )
+        # Record the mtime either way so a broken file is not re-parsed every check.
+        self._mtime = mtime
+
+    def _stat(self) -> float | None:
+        try:
+            return self._path.stat().st_mtime
+        except OSError:
+            return None
@@ -1,5 +1,17 @@
-from .base import SearchHit
+from .base import SearchHit, SearchStats
+from .executor import get_search_executor, run_in_executor, run_in_search_executor
 from .keyword import KeywordRetriever
+from .rerank import Reranker, RerankResult
 from .tfidf import TfidfRetriever
 
-__all__ = ["SearchHit", "KeywordRetriever", "TfidfRetriever"]
+__all__ = [
+    "SearchHit",
+    "SearchStats",
+    "KeywordRetriever",
+    "Reranker",
+    "RerankResult",
+    "TfidfRetriever",
+    "get_search_executor",
+    "run_in_executor",
+    "run_in_search_executor",
+]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol
+from dataclasses import dataclass, field
+from typing import Any, Protocol
 
 
 @dataclass(frozen=True)
@@ -12,5 +12,27 @@ class SearchHit:
     text: str
 
 
+@dataclass(frozen=True)
+class SearchStats:
+    query_terms: int = 0
+    postings_scanned: int = 0
+    candidates_scored: int = 0
+    pruned: int = 0
+    cache_hit: bool = False
+    stage_us: dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "query_terms": self.query_terms,
+            "postings_scanned": self.postings_scanned,
+            "candidates_scored": self.candidates_scored,
+            "pruned": self.pruned,
+            "cache_hit": self.cache_hit,
+            "stage_us": {stage: round(us, 1) for stage, us in self.stage_us.items()},
+        }
+
+
 class Retriever(Protocol):
     def search(self, query: str, top_k: int = 5) -> list[SearchHit]: ...
+
+    async def asearch(self, query: str, top_k: int = 5) -> list[SearchHit]: ...
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, TypeVar
+
+import anyio
+import anyio.from_thread
+import anyio.lowlevel
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_search_executor() -> ThreadPoolExecutor:
+    """Dedicated pool for CPU-heavy retrieval work.
+
+    Sized by ``RETRIEVAL_MAX_WORKERS`` independently of Starlette's default
+    threadpool, so slow searches queue here instead of starving other handlers.
+    """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = max(1, int(os.getenv("RETRIEVAL_MAX_WORKERS", "4")))
+                _executor = ThreadPoolExecutor(
+                    max_workers=workers,
+                    thread_name_prefix="retrieval",
+                )
+    return _executor
+
+
+def shutdown_search_executor() -> None:
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def run_in_search_executor(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn`` on the retrieval pool and await it from asyncio or trio."""
+    return await run_in_executor(get_search_executor(), fn, *args, **kwargs)
+
+
+async def run_in_executor(
+    executor: Executor,
+    fn: Callable[..., T],
+    *args: Any,
+    **kwargs: Any,
+) -> T:
+    """Run ``fn`` on ``executor`` and await it from asyncio or trio."""
+    done = anyio.Event()
+    token = anyio.lowlevel.current_token()
+    loop_thread = threading.get_ident()
+
+    def _wake(_: object) -> None:
+        # add_done_callback runs inline when the future has already finished.
+        if threading.get_ident() == loop_thread:
+            done.set()
+        else:
+            anyio.from_thread.run_sync(done.set, token=token)
+
+    future = executor.submit(partial(fn, *args, **kwargs))
+    future.add_done_callback(_wake)
+    try:
+        await done.wait()
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
@@ -4,6 +4,7 @@ import re
 from collections import Counter
 
 from .base import SearchHit
+from .executor import run_in_search_executor
 
 
 def _tokens(s: str) -> list[str]:
@@ -27,3 +28,6 @@ class KeywordRetriever:
             hits.append(SearchHit(score=score, doc_id=doc_id, chunk_id="full", text=text[:800]))
         hits.sort(key=lambda h: (-h.score, h.doc_id))
         return hits[:top_k]
+
+    async def asearch(self, query: str, top_k: int = 5) -> list[SearchHit]:
+        return await run_in_search_executor(self.search, query, top_k)
@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import math
+import re
+import time
+from dataclasses import dataclass
+from typing import Final, Protocol, Sequence
+
+from .base import SearchHit
+
+_TOKEN_RE: Final[re.Pattern[str]] = re.compile(r"[0-9A-Za-z가-힣]+")
+_SECONDS_PER_DAY: Final[float] = 86400.0
+
+
+def _tokens(s: str) -> list[str]:
+    return [t.lower() for t in _TOKEN_RE.findall(s)]
+
+
+class RerankSource(Protocol):
+    def similarities(self, hit: SearchHit, others: Sequence[SearchHit]) -> list[float]: ...
+
+    def doc_mtime(self, doc_id: str) -> float | None: ...
+
+
+@dataclass(frozen=True)
+class RerankResult:
+    hits: list[SearchHit]
+    elapsed_ms: float
+    skipped: bool
+    reason: str = ""
+
+
+class Reranker:
+    """Second-stage reranker: feature boosts followed by MMR diversification."""
+
+    def __init__(
+        self,
+        budget_ms: float = 25.0,
+        mmr_lambda: float = 0.7,
+        proximity_weight: float = 0.15,
+        heading_weight: float = 0.1,
+        freshness_weight: float = 0.05,
+        freshness_half_life_days: float = 90.0,
+    ) -> None:
+        self._budget_ms = budget_ms
+        self._mmr_lambda = mmr_lambda
+        self._proximity_weight = proximity_weight
+        self._heading_weight = heading_weight
+        self._freshness_weight = freshness_weight
+        self._half_life_days = freshness_half_life_days
+
+    @property
+    def budget_ms(self) -> float:
+        return self._budget_ms
+
+    def rerank(
+        self,
+        query: str,
+        hits: Sequence[SearchHit],
+        top_k: int,
+        source: RerankSource | None = None,
+    ) -> RerankResult:
+        start = time.perf_counter()
+        deadline = start + self._budget_ms / 1000.0
+        q_terms = set(_tokens(query))
+        if not hits or not q_terms:
+            return RerankResult(
+                hits=list(hits[:top_k]), elapsed_ms=0.0, skipped=True, reason="empty"
+            )
+
+        now = time.time()
+        scores: list[float] = []
+        over_budget = False
+        for hit in hits:
+            score = hit.score
+            # Candidates arrive in first-stage order, so once the budget is spent the
+            # remaining (lower-ranked) ones simply keep their retrieval score.
+            if not over_budget:
+                score += self._proximity_weight * _proximity(q_terms, hit.text)
+                score += self._heading_weight * _heading_match(q_terms, hit)
+                if source is not None:
+                    score += self._freshness_weight * self._freshness(source, hit.doc_id, now)
+                over_budget = time.perf_counter() > deadline
+            scores.append(score)
+
+        selected = self._mmr(hits, scores, top_k, source, deadline)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        reranked = [
+            SearchHit(
+                score=scores[i], doc_id=hits[i].doc_id, chunk_id=hits[i].chunk_id, text=hits[i].text
+            )
+            for i in selected
+        ]
+        return RerankResult(
+            hits=reranked,
+            elapsed_ms=elapsed_ms,
+            skipped=False,
+            reason="budget" if over_budget else "",
+        )
+
+    def _freshness(self, source: RerankSource, doc_id: str, now: float) -> float:
+        mtime = source.doc_mtime(doc_id)
+        if mtime is None:
+            return 0.0
+        age_days = max(0.0, now - mtime) / _SECONDS_PER_DAY
+        return math.exp(-age_days * math.log(2) / self._half_life_days)
+
+    def _mmr(
+        self,
+        hits: Sequence[SearchHit],
+        scores: list[float],
+        top_k: int,
+        source: RerankSource | None,
+        deadline: float,
+    ) -> list[int]:
+        order = sorted(
+            range(len(hits)), key=lambda i: (-scores[i], hits[i].doc_id, hits[i].chunk_id)
+        )
+        if source is None or top_k <= 1:
+            return order[:top_k]
+
+        top = scores[order[0]] or 1.0
+        relevance = [s / top for s in scores]
+        max_sim = [0.0] * len(hits)
+        remaining = list(order)
+        selected: list[int] = []
+        while remaining and len(selected) < top_k:
+            if selected and time.perf_counter() > deadline:
+                selected.extend(remaining[: top_k - len(selected)])
+                break
+            best = max(
+                remaining,
+                key=lambda i: self._mmr_lambda * relevance[i] - (1 - self._mmr_lambda) * max_sim[i],
+            )
+            selected.append(best)
+            remaining.remove(best)
+            if not remaining:
+                break
+            # One similarity row per selected hit keeps the cost at O(top_k * candidates).
+            row = source.similarities(hits[best], [hits[i] for i in remaining])
+            for i, sim in zip(remaining, row):
+                if sim > max_sim[i]:
+                    max_sim[i] = sim
+        return selected
+
+
+def _proximity(q_terms: set[str], text: str) -> float:
+    positions: list[tuple[int, str]] = [
+        (pos, tok) for pos, tok in enumerate(_tokens(text)) if tok in q_terms
+    ]
+    wanted = {tok for _, tok in positions}
+    if len(wanted) < 2:
+        return 0.0
+
+    # Smallest window covering every matched query term.
+    best = math.inf
+    counts: dict[str, int] = {}
+    left = 0
+    for right in range(len(positions)):
+        tok = positions[right][1]
+        counts[tok] = counts.get(tok, 0) + 1
+        while len(counts) == len(wanted):
+            span = positions[right][0] - positions[left][0] + 1
+            best = min(best, span)
+            ltok = positions[left][1]
+            counts[ltok] -= 1
+            if counts[ltok] == 0:
+                del counts[ltok]
+            left += 1
+    coverage = len(wanted) / len(q_terms)
+    return coverage * len(wanted) / best
+
+
+def _heading_match(q_terms: set[str], hit: SearchHit) -> float:
+    heading_terms: set[str] = set()
+    for line in hit.text.splitlines():
+        if line.lstrip().startswith("#"):
+            heading_terms.update(_tokens(line))
+    stem = hit.doc_id.rsplit("/", 1)[-1].rsplit(".", 1)[0]
+    heading_terms.update(_tokens(stem))
+    if not heading_terms:
+        return 0.0
+    return len(q_terms & heading_terms) / len(q_terms)
@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import heapq
+from array import array
+from bisect import bisect_left
+from typing import Final
+
+_HOT_PREFIX_LEN: Final[int] = 1
+_HOT_TOP_N: Final[int] = 20
+
+
+class PrefixIndex:
+    """Sorted vocabulary with binary-search prefix lookup, ranked by document frequency."""
+
+    def __init__(self, df: dict[str, int]) -> None:
+        self._terms: list[str] = sorted(df)
+        self._df = array("i", (df[t] for t in self._terms))
+        # Single-character prefixes cover the widest ranges, so their answers are precomputed.
+        self._hot: dict[str, list[tuple[str, int]]] = {}
+        for prefix in {t[:_HOT_PREFIX_LEN] for t in self._terms}:
+            self._hot[prefix] = self._scan(prefix, _HOT_TOP_N)
+
+    def __len__(self) -> int:
+        return len(self._terms)
+
+    def complete(self, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        prefix = prefix.strip().lower()
+        if not prefix or limit <= 0:
+            return []
+        hot = self._hot.get(prefix)
+        if hot is not None and limit <= _HOT_TOP_N:
+            return hot[:limit]
+        return self._scan(prefix, limit)
+
+    def _scan(self, prefix: str, limit: int) -> list[tuple[str, int]]:
+        lo = bisect_left(self._terms, prefix)
+        hi = bisect_left(self._terms, prefix + "\uffff", lo)
+        best = heapq.nsmallest(limit, range(lo, hi), key=lambda i: (-self._df[i], self._terms[i]))
+        return [(self._terms[i], self._df[i]) for i in best]
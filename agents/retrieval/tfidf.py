@@ -1,21 +1,82 @@
 from __future__ import annotations
 
+import hashlib
 import math
 import pickle
 import re
-from dataclasses import dataclass
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Final
+from typing import Final, Sequence
 
-from .base import SearchHit
+from .base import SearchHit, SearchStats
+from .executor import run_in_search_executor
+from .suggest import PrefixIndex
 
 _TOKEN_RE: Final[re.Pattern[str]] = re.compile(r"[0-9A-Za-z가-힣]+", re.IGNORECASE)
+_HANGUL_RUN_RE: Final[re.Pattern[str]] = re.compile(r"[가-힣]{2,}")
+
+ANALYZERS: Final[tuple[str, ...]] = ("word", "hangul_ngram")
+_NGRAM_SIZES: Final[tuple[int, ...]] = (2, 3)
+_NGRAM_WEIGHT: Final[float] = 0.5
+# Upper bound on posting lookups per query so long Korean questions stay cheap.
+_MAX_QUERY_GRAMS: Final[int] = 32
+_QUERY_CACHE_SIZE: Final[int] = 256
 
 
 def _tokens(s: str) -> list[str]:
     return [t.lower() for t in _TOKEN_RE.findall(s)]
 
 
+def _hangul_ngrams(s: str) -> set[str]:
+    grams: set[str] = set()
+    for run in _HANGUL_RUN_RE.findall(s):
+        for n in _NGRAM_SIZES:
+            grams.update(run[i : i + n] for i in range(len(run) - n + 1))
+    return grams
+
+
+def _intersect(candidates: set[int] | None, posting: array) -> set[int]:
+    if candidates is None:
+        return set(posting)
+    # Postings are sorted, so probing the (small) candidate set is O(c log p).
+    out: set[int] = set()
+    size = len(posting)
+    for i in candidates:
+        j = bisect_left(posting, i)
+        if j < size and posting[j] == i:
+            out.add(i)
+    return out
+
+
+def _deep_sizeof(obj: object) -> int:
+    """Approximate retained size of a container tree (shared objects counted once)."""
+    seen: set[int] = set()
+    stack = [obj]
+    total = 0
+    while stack:
+        cur = stack.pop()
+        if id(cur) in seen:
+            continue
+        seen.add(id(cur))
+        total += sys.getsizeof(cur)
+        if isinstance(cur, dict):
+            stack.extend(cur.keys())
+            stack.extend(cur.values())
+        elif isinstance(cur, (list, tuple, set, frozenset)):
+            stack.extend(cur)
+        elif hasattr(cur, "__dict__"):
+            stack.append(vars(cur))
+        elif hasattr(cur, "__slots__"):
+            stack.extend(getattr(cur, name) for name in cur.__slots__ if hasattr(cur, name))
+    return total
+
+
 def _chunk_text(text: str, max_chars: int = 900) -> list[str]:
     parts = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
     chunks: list[str] = []
@@ -39,18 +100,61 @@ class _Chunk:
     text: str
 
 
+@dataclass
+class _PendingQuery:
+    """A query vector waiting to be scored, with its dot-product accumulator."""
+
+    terms: int
+    weights: dict[str, float]
+    norm: float
+    tokenize_us: float = 0.0
+    acc: dict[int, float] = field(default_factory=dict)
+
+
 class TfidfRetriever:
-    def __init__(self, root: str = "docs", cache_dir: str = ".cache") -> None:
+    def __init__(
+        self,
+        root: str = "docs",
+        cache_dir: str = ".cache",
+        analyzer: str = "word",
+    ) -> None:
+        if analyzer not in ANALYZERS:
+            raise ValueError(f"unknown analyzer: {analyzer}")
         self._root = Path(root)
         self._cache_dir = Path(cache_dir)
         self._cache_dir.mkdir(parents=True, exist_ok=True)
+        self._analyzer = analyzer
 
         self._chunks: list[_Chunk] = []
+        self._df: dict[str, int] = {}
         self._idf: dict[str, float] = {}
         self._vecs: list[dict[str, float]] = []
-        self._norms: list[float] = []
-
+        self._norms: array = array("d")
+        # term -> (chunk indices, tf-idf weights), derived from the vectors.
+        self._postings: dict[str, tuple[array, array]] = {}
+        self._positions: dict[tuple[str, str], int] = {}
+        self._mtimes: dict[str, float] = {}
+        # Hangul character n-gram -> sorted chunk indices ("hangul_ngram" analyzer only).
+        self._ngram_postings: dict[str, array] = {}
+        self._snap: dict[str, float] = {}
+        self._generation = ""
+        self._prefix_index: PrefixIndex | None = None
+        self._query_cache: OrderedDict[tuple[str, int], tuple[SearchHit, ...]] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._build_ms = 0.0
+        self._loaded_from_cache = False
+
+        start = time.perf_counter()
         self._build_or_load()
+        self._build_ms = (time.perf_counter() - start) * 1000
+
+    @property
+    def generation(self) -> str:
+        """Fingerprint of the indexed corpus; changes whenever the index is rebuilt."""
+        return self._generation
+
+    def is_stale(self) -> bool:
+        return self._snapshot() != self._snap
 
     def _snapshot(self) -> dict[str, float]:
         snap: dict[str, float] = {}
@@ -63,7 +167,9 @@ class TfidfRetriever:
         return snap
 
     def _cache_path(self) -> Path:
-        return self._cache_dir / "tfidf_index.pkl"
+        if self._analyzer == "word":
+            return self._cache_dir / "tfidf_index.pkl"
+        return self._cache_dir / f"tfidf_index.{self._analyzer}.pkl"
 
     def _build_or_load(self) -> None:
         cache_path = self._cache_path()
@@ -73,28 +179,58 @@ class TfidfRetriever:
             try:
                 with cache_path.open("rb") as f:
                     payload = pickle.load(f)
-                if payload.get("snapshot") == snap:
+                if (
+                    payload.get("snapshot") == snap
+                    and payload.get("analyzer", "word") == self._analyzer
+                    and "df" in payload
+                ):
                     self._chunks = payload["chunks"]
+                    self._df = payload["df"]
                     self._idf = payload["idf"]
                     self._vecs = payload["vecs"]
-                    self._norms = payload["norms"]
+                    self._norms = array("d", payload["norms"])
+                    self._ngram_postings = payload.get("ngram_postings", {})
+                    self._index_chunks(snap)
+                    self._loaded_from_cache = True
                     return
             except Exception:
                 pass
 
         self._build_index()
+        self._index_chunks(snap)
         with cache_path.open("wb") as f:
             pickle.dump(
                 {
                     "snapshot": snap,
+                    "analyzer": self._analyzer,
                     "chunks": self._chunks,
+                    "df": self._df,
                     "idf": self._idf,
                     "vecs": self._vecs,
                     "norms": self._norms,
+                    "ngram_postings": self._ngram_postings,
                 },
                 f,
             )
 
+    def _index_chunks(self, snap: dict[str, float]) -> None:
+        self._positions = {(ch.doc_id, ch.chunk_id): i for i, ch in enumerate(self._chunks)}
+        self._mtimes = {path.replace("\\", "/"): mtime for path, mtime in snap.items()}
+        self._snap = snap
+        digest = hashlib.sha1(self._analyzer.encode("utf-8"))
+        for path, mtime in sorted(snap.items()):
+            digest.update(f"{path}\0{mtime}\0".encode("utf-8"))
+        self._generation = digest.hexdigest()[:12]
+        self._prefix_index = None
+
+        postings: dict[str, tuple[list[int], list[float]]] = {}
+        for i, v in enumerate(self._vecs):
+            for t, w in v.items():
+                ids, weights = postings.setdefault(t, ([], []))
+                ids.append(i)
+                weights.append(w)
+        self._postings = {t: (array("i", ids), array("d", ws)) for t, (ids, ws) in postings.items()}
+
     def _iter_markdown_files(self) -> list[Path]:
         files: list[Path] = []
         if self._root.exists():
@@ -136,6 +272,7 @@ class TfidfRetriever:
             for t in ts:
                 df[t] = df.get(t, 0) + 1
 
+        self._df = df
         self._idf = {t: (math.log((1 + N) / (1 + d)) + 1.0) for t, d in df.items()}
 
         vecs: list[dict[str, float]] = []
@@ -154,34 +291,147 @@ class TfidfRetriever:
             norms.append(n)
 
         self._vecs = vecs
-        self._norms = norms
+        self._norms = array("d", norms)
+
+        postings: dict[str, list[int]] = {}
+        if self._analyzer == "hangul_ngram":
+            for i, ch in enumerate(chunks):
+                for g in _hangul_ngrams(ch.text):
+                    postings.setdefault(g, []).append(i)
+        self._ngram_postings = {g: array("i", ids) for g, ids in postings.items()}
 
     def search(self, query: str, top_k: int = 5) -> list[SearchHit]:
-        q_toks = _tokens(query)
-        if not q_toks:
-            return []
+        return self.search_with_stats(query, top_k)[0]
+
+    def search_with_stats(
+        self,
+        query: str,
+        top_k: int = 5,
+    ) -> tuple[list[SearchHit], SearchStats]:
+        return self.search_many_with_stats([query], top_k)[0]
+
+    def search_many_with_stats(
+        self,
+        queries: Sequence[str],
+        top_k: int = 5,
+    ) -> list[tuple[list[SearchHit], SearchStats]]:
+        """Search several queries in one pass over the postings, in query order.
+
+        Each distinct query is vectorized once, and each query term's posting
+        list is walked once for the whole batch, accumulating into every query
+        that contains the term. Cached queries skip scoring entirely.
+        """
+        keys: list[tuple[str, int] | None] = []
+        done: dict[tuple[str, int], tuple[list[SearchHit], SearchStats]] = {}
+        pending: dict[tuple[str, int], _PendingQuery] = {}
+        empty: list[tuple[list[SearchHit], SearchStats]] = []
+        for query in queries:
+            t0 = time.perf_counter()
+            q_toks = _tokens(query)
+            t1 = time.perf_counter()
+            tokenize_us = (t1 - t0) * 1e6
+            if not q_toks:
+                keys.append(None)
+                empty.append(([], SearchStats(stage_us={"tokenize": tokenize_us})))
+                continue
+            key = (" ".join(q_toks), top_k)
+            keys.append(key)
+            if key in done or key in pending:
+                continue
+            with self._query_cache_lock:
+                cached = self._query_cache.get(key)
+                if cached is not None:
+                    self._query_cache.move_to_end(key)
+            if cached is not None:
+                stage_us = {"tokenize": tokenize_us, "cache": (time.perf_counter() - t1) * 1e6}
+                done[key] = (
+                    list(cached),
+                    SearchStats(query_terms=len(set(q_toks)), cache_hit=True, stage_us=stage_us),
+                )
+            else:
+                pending[key] = self._query_vector(q_toks, tokenize_us)
+        t1 = time.perf_counter()
+
+        # Dot products over the postings of the batch's query terms only; a term
+        # shared by several queries has its posting list read once.
+        by_term: dict[str, list[tuple[dict[int, float], float]]] = {}
+        for q in pending.values():
+            for t, qw in q.weights.items():
+                by_term.setdefault(t, []).append((q.acc, qw))
+        for t, targets in by_term.items():
+            ids, weights = self._postings[t]
+            if len(targets) == 1:
+                acc, qw = targets[0]
+                for i, vw in zip(ids, weights):
+                    acc[i] = acc.get(i, 0.0) + qw * vw
+            else:
+                for i, vw in zip(ids, weights):
+                    for acc, qw in targets:
+                        acc[i] = acc.get(i, 0.0) + qw * vw
+        # The shared pass is charged to the queries it scored in equal parts.
+        score_us = (time.perf_counter() - t1) * 1e6 / max(len(pending), 1)
+
+        for key, q in pending.items():
+            stage_us = {"tokenize": q.tokenize_us, "score": score_us}
+            t2 = time.perf_counter()
+            ngram_scores = self._ngram_scores(key[0]) if self._ngram_postings else {}
+            if self._ngram_postings:
+                stage_us["ngram"] = (time.perf_counter() - t2) * 1e6
+            t3 = time.perf_counter()
+            hits, candidates = self._select(q, ngram_scores, top_k)
+            stage_us["select"] = (time.perf_counter() - t3) * 1e6
+            with self._query_cache_lock:
+                self._query_cache[key] = tuple(hits)
+                if len(self._query_cache) > _QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+            done[key] = (
+                hits,
+                SearchStats(
+                    query_terms=q.terms,
+                    postings_scanned=sum(len(self._postings[t][0]) for t in q.weights),
+                    candidates_scored=candidates,
+                    pruned=candidates - len(hits),
+                    cache_hit=False,
+                    stage_us=stage_us,
+                ),
+            )
+
+        out: list[tuple[list[SearchHit], SearchStats]] = []
+        blanks = iter(empty)
+        for key in keys:
+            if key is None:
+                out.append(next(blanks))
+            else:
+                hits, stats = done[key]
+                out.append((list(hits), stats))
+        return out
 
+    def _query_vector(self, q_toks: list[str], tokenize_us: float = 0.0) -> _PendingQuery:
         q_tf: dict[str, int] = {}
         for t in q_toks:
             q_tf[t] = q_tf.get(t, 0) + 1
-
         qv: dict[str, float] = {}
         for t, c in q_tf.items():
             idf = self._idf.get(t)
             if idf is None:
                 continue
             qv[t] = (1.0 + math.log(c)) * idf
-
         qn = math.sqrt(sum(w * w for w in qv.values())) or 1.0
-
+        return _PendingQuery(terms=len(q_tf), weights=qv, norm=qn, tokenize_us=tokenize_us)
+
+    def _select(
+        self,
+        q: _PendingQuery,
+        ngram_scores: dict[int, float],
+        top_k: int,
+    ) -> tuple[list[SearchHit], int]:
+        acc = q.acc
+        candidates = acc.keys() | ngram_scores.keys() if ngram_scores else acc.keys()
         scored: list[tuple[float, int]] = []
-        for i, v in enumerate(self._vecs):
-            dot = 0.0
-            for t, qw in qv.items():
-                vw = v.get(t)
-                if vw is not None:
-                    dot += qw * vw
-            score = dot / (qn * self._norms[i])
+        for i in candidates:
+            score = acc.get(i, 0.0) / (q.norm * self._norms[i])
+            if ngram_scores:
+                score = (1.0 - _NGRAM_WEIGHT) * score + _NGRAM_WEIGHT * ngram_scores.get(i, 0.0)
             if score > 0:
                 scored.append((score, i))
 
@@ -192,5 +442,112 @@ class TfidfRetriever:
             hits.append(
                 SearchHit(score=score, doc_id=ch.doc_id, chunk_id=ch.chunk_id, text=ch.text)
             )
+        return hits, len(candidates)
+
+    async def asearch(self, query: str, top_k: int = 5) -> list[SearchHit]:
+        return (await self.asearch_with_stats(query, top_k))[0]
+
+    async def asearch_with_stats(
+        self,
+        query: str,
+        top_k: int = 5,
+    ) -> tuple[list[SearchHit], SearchStats]:
+        return await run_in_search_executor(self.search_with_stats, query, top_k)
+
+    def index_stats(self) -> dict[str, object]:
+        memory = {
+            "chunks": _deep_sizeof(self._chunks),
+            "vectors": _deep_sizeof(self._vecs) + _deep_sizeof(self._norms),
+            "postings": _deep_sizeof(self._postings),
+            "idf": _deep_sizeof(self._idf) + _deep_sizeof(self._df),
+            "ngram_postings": _deep_sizeof(self._ngram_postings),
+            "prefix_index": _deep_sizeof(self._prefix_index) if self._prefix_index else 0,
+        }
+        return {
+            "generation": self._generation,
+            "analyzer": self._analyzer,
+            "chunk_count": len(self._chunks),
+            "document_count": len({ch.doc_id for ch in self._chunks}),
+            "vocabulary_size": len(self._idf),
+            "ngram_count": len(self._ngram_postings),
+            "memory_bytes": memory,
+            "build_ms": round(self._build_ms, 3),
+            "loaded_from_cache": self._loaded_from_cache,
+        }
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[tuple[str, int]]:
+        """Vocabulary completions for ``prefix`` ranked by document frequency."""
+        if self._prefix_index is None:
+            self._prefix_index = PrefixIndex(self._df)
+        return self._prefix_index.complete(prefix, limit)
+
+    def _ngram_scores(self, query: str) -> dict[int, float]:
+        """Particle-robust Hangul matching over the n-gram postings.
+
+        Each Hangul run in the query is split greedily into the longest segments
+        whose bigram/trigram postings still intersect, so "백업을" matches chunks
+        containing "백업" and "검증절차" matches "검증" and "절차" separately.
+        Scores are normalised to [0, 1].
+        """
+        runs = _HANGUL_RUN_RE.findall(query.lower())
+        if not runs:
+            return {}
+        n_chunks = len(self._chunks) or 1
+        max_idf = math.log((1 + n_chunks) / 2) + 1.0
+        budget = _MAX_QUERY_GRAMS
+        scores: dict[int, float] = {}
+        for run in runs:
+            start = 0
+            while start < len(run) - 1 and budget > 0:
+                candidates: set[int] | None = None
+                matched = 0
+                while start + matched < len(run) - 1 and budget > 0:
+                    end = start + matched + 2
+                    grams = [run[end - 2 : end]]
+                    if matched:
+                        grams.append(run[end - 3 : end])
+                    nxt = candidates
+                    for g in grams:
+                        budget -= 1
+                        posting = self._ngram_postings.get(g)
+                        nxt = _intersect(nxt, posting) if posting is not None else set()
+                        if not nxt:
+                            break
+                    if not nxt:
+                        break
+                    candidates = nxt
+                    matched += 1
+                if candidates:
+                    coverage = (matched + 1) / len(run)
+                    idf = math.log((1 + n_chunks) / (1 + len(candidates))) + 1.0
+                    weight = coverage * idf / (max_idf * len(runs))
+                    for i in candidates:
+                        scores[i] = scores.get(i, 0.0) + weight
+                start += max(matched, 1)
+        return {i: min(score, 1.0) for i, score in scores.items()}
+
+    def similarities(self, hit: SearchHit, others: Sequence[SearchHit]) -> list[float]:
+        """Cosine similarity between one hit and many, using the stored chunk vectors."""
+        i = self._positions.get((hit.doc_id, hit.chunk_id))
+        if i is None:
+            return [0.0] * len(others)
+        v = self._vecs[i]
+        n = self._norms[i]
+        out: list[float] = []
+        for other in others:
+            j = self._positions.get((other.doc_id, other.chunk_id))
+            if j is None:
+                out.append(0.0)
+                continue
+            w = self._vecs[j]
+            small, large = (v, w) if len(v) <= len(w) else (w, v)
+            dot = 0.0
+            for t, a in small.items():
+                b = large.get(t)
+                if b is not None:
+                    dot += a * b
+            out.append(dot / (n * self._norms[j]))
+        return out
 
-        return hits
+    def doc_mtime(self, doc_id: str) -> float | None:
+        return self._mtimes.get(doc_id)
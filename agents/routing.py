@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Final, Iterable, Mapping
+
+from agents.classifier import HashedNgramClassifier, load_classifier
+from agents.reloading import ReloadingFile
+from agents.text import normalize_text
+
+logger = logging.getLogger("routing")
+
+_CONFIG_DIR: Final[Path] = Path(__file__).resolve().parent.parent / "config"
+DEFAULT_ROUTING_CONFIG: Final[Path] = _CONFIG_DIR / "routing.json"
+DEFAULT_ROUTE_MODEL: Final[Path] = _CONFIG_DIR / "router_model.json"
+
+# Routes the orchestrator has agents for (``DEFAULT_AGENT_FACTORIES``).
+AGENT_ROUTES: Final[frozenset[str]] = frozenset(
+    {
+        "doc_search",
+        "direct_answer",
+        "workflow",
+        "crypto_analysis",
+        "content_creator",
+        "portfolio_workflow",
+    }
+)
+
+
+@dataclass(frozen=True)
+class RoutingRule:
+    """One intent: fires when every feature of any clause matched.
+
+    A clause with several features is a co-occurrence requirement and must be
+    satisfied within a single language ("ticket" + "create", or "티켓" + "만들").
+    """
+
+    intent: str
+    priority: int
+    clauses: tuple[tuple[str, ...], ...]
+
+
+@dataclass(frozen=True)
+class RoutingConfig:
+    # feature -> language -> keywords
+    features: Mapping[str, Mapping[str, tuple[str, ...]]]
+    rules: tuple[RoutingRule, ...]
+    default: str = "direct_answer"
+    version: int = 1
+
+
+@dataclass(frozen=True)
+class RouteExplanation:
+    route: str
+    intent: str | None
+    priority: int | None
+    clause: tuple[str, ...]
+    language: str | None
+    keywords: tuple[str, ...]
+    version: int
+    # "rules", "default" or "classifier"; confidence is set for classifier decisions.
+    source: str = "rules"
+    confidence: float | None = None
+
+
+def parse_routing_config(payload: object, routes: Iterable[str] = AGENT_ROUTES) -> RoutingConfig:
+    """Validate a decoded routing config; raises ValueError on malformed input.
+
+    Every rule intent and the default must be one of ``routes``, so a typo in
+    the file is rejected here instead of failing when a question is dispatched.
+    """
+    known = frozenset(routes)
+    if not isinstance(payload, dict):
+        raise ValueError("routing config must be an object")
+    raw_features = payload.get("features")
+    if not isinstance(raw_features, dict) or not raw_features:
+        raise ValueError("routing config needs a non-empty 'features' object")
+    features: dict[str, dict[str, tuple[str, ...]]] = {}
+    for name, by_lang in raw_features.items():
+        if not isinstance(by_lang, dict):
+            raise ValueError(f"feature {name!r} must map languages to keyword lists")
+        for lang, keywords in by_lang.items():
+            if not isinstance(keywords, list) or not all(isinstance(k, str) for k in keywords):
+                raise ValueError(f"feature {name!r} needs {lang!r} as a list of keyword strings")
+        features[str(name)] = {
+            str(lang): tuple(normalize_text(k) for k in keywords if k.strip())
+            for lang, keywords in by_lang.items()
+        }
+
+    raw_rules = payload.get("rules")
+    if not isinstance(raw_rules, list):
+        raise ValueError("routing config needs a 'rules' list")
+    rules: list[RoutingRule] = []
+    for raw in raw_rules:
+        if not isinstance(raw, dict) or not isinstance(raw.get("intent"), str):
+            raise ValueError("each rule needs an 'intent'")
+        intent = raw["intent"]
+        if intent not in known:
+            raise ValueError(f"rule intent {intent!r} is not an agent route")
+        priority = raw.get("priority", 0)
+        if not isinstance(priority, int) or isinstance(priority, bool):
+            raise ValueError(f"rule {intent!r} needs an integer 'priority'")
+        when = raw.get("when") or []
+        if not isinstance(when, list) or not all(
+            isinstance(clause, list) and clause and all(isinstance(f, str) for f in clause)
+            for clause in when
+        ):
+            raise ValueError(f"rule {intent!r} needs 'when' as a list of feature-name lists")
+        clauses = tuple(tuple(clause) for clause in when)
+        for clause in clauses:
+            unknown = [f for f in clause if f not in features]
+            if unknown:
+                raise ValueError(f"rule {intent!r} has an invalid clause: {clause}")
+        rules.append(RoutingRule(intent, priority, clauses))
+    # Stable sort: equal priorities keep file order.
+    rules.sort(key=lambda rule: -rule.priority)
+    default = payload.get("default") or "direct_answer"
+    if default not in known:
+        raise ValueError(f"default route {default!r} is not an agent route")
+    version = payload.get("version") or 1
+    if not isinstance(version, int):
+        raise ValueError("routing config 'version' must be an integer")
+    return RoutingConfig(features=features, rules=tuple(rules), default=default, version=version)
+
+
+def load_routing_config(path: str | Path = DEFAULT_ROUTING_CONFIG) -> RoutingConfig:
+    with open(path, encoding="utf-8") as handle:
+        return parse_routing_config(json.load(handle))
+
+
+class KeywordMatcher:
+    """All keywords compiled into one regex, scanned once into a feature bitmask.
+
+    The keywords are merged into a trie-shaped pattern wrapped in a zero-width
+    lookahead, so each start position costs one walk down the trie and reports
+    its longest keyword. Shorter keywords sharing that start position are folded
+    into the longest one's mask at compile time, which makes a single scan
+    report every keyword occurrence, overlapping ones included.
+    """
+
+    def __init__(self, features: Mapping[str, Iterable[str]]) -> None:
+        self._bits: dict[str, int] = {}
+        masks: dict[str, int] = {}
+        for name, keywords in features.items():
+            bit = 1 << len(self._bits)
+            self._bits[name] = bit
+            for keyword in keywords:
+                keyword = normalize_text(keyword)
+                if keyword:
+                    masks[keyword] = masks.get(keyword, 0) | bit
+
+        self._masks: dict[str, int] = {}
+        for keyword, mask in masks.items():
+            for end in range(1, len(keyword)):
+                mask |= masks.get(keyword[:end], 0)
+            self._masks[keyword] = mask
+
+        trie = _trie_pattern(self._masks)
+        self._pattern = re.compile(f"(?=({trie}))") if trie else None
+
+    def bit(self, feature: str) -> int:
+        return self._bits[feature]
+
+    def scan(self, text: str, normalized: bool = False) -> int:
+        """Feature mask for ``text``; pass ``normalized=True`` if it went through normalize_text."""
+        if self._pattern is None:
+            return 0
+        mask = 0
+        masks = self._masks
+        for match in self._pattern.finditer(text if normalized else normalize_text(text)):
+            mask |= masks[match.group(1)]
+        return mask
+
+    def features(self, mask: int) -> set[str]:
+        return {name for name, bit in self._bits.items() if mask & bit}
+
+
+def _trie_pattern(keywords: Iterable[str]) -> str:
+    trie: dict[str, dict] = {}
+    for keyword in keywords:
+        node = trie
+        for ch in keyword:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        # Greedy optional: prefer the longer keyword, fall back to the one ending here.
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
+
+class Router:
+    """A routing config compiled into one keyword matcher and per-intent clause masks.
+
+    Routers are immutable once built; reloading the config builds a new one.
+    """
+
+    def __init__(self, config: RoutingConfig) -> None:
+        self.config = config
+        # Each (feature, language) pair gets its own bit so co-occurrence can be
+        # required within one language.
+        slots = {
+            f"{feature}:{lang}": keywords
+            for feature, by_lang in config.features.items()
+            for lang, keywords in by_lang.items()
+        }
+        self.matcher = KeywordMatcher(slots)
+        self._rules: list[tuple[RoutingRule, list[tuple[int, tuple[str, ...], str | None]]]] = []
+        for rule in config.rules:
+            masks: list[tuple[int, tuple[str, ...], str | None]] = []
+            for clause in rule.clauses:
+                if len(clause) == 1:
+                    feature = clause[0]
+                    for lang in config.features[feature]:
+                        masks.append((self.matcher.bit(f"{feature}:{lang}"), clause, lang))
+                    continue
+                shared = set.intersection(*(set(config.features[f]) for f in clause))
+                for lang in sorted(shared):
+                    mask = 0
+                    for feature in clause:
+                        mask |= self.matcher.bit(f"{feature}:{lang}")
+                    masks.append((mask, clause, lang))
+            self._rules.append((rule, masks))
+
+    @property
+    def version(self) -> int:
+        return self.config.version
+
+    @property
+    def default(self) -> str:
+        return self.config.default
+
+    def routes(self, mask: int) -> list[str]:
+        """Every intent whose rule fires for ``mask``, in priority order."""
+        return [
+            rule.intent
+            for rule, clauses in self._rules
+            if any(mask & clause == clause for clause, _, _ in clauses)
+        ]
+
+    def resolve(self, mask: int) -> str:
+        for rule, clauses in self._rules:
+            if any(mask & clause == clause for clause, _, _ in clauses):
+                return rule.intent
+        return self.config.default
+
+    def route(self, question: str) -> str:
+        return self.resolve(self.matcher.scan(question))
+
+    def explain(self, question: str) -> RouteExplanation:
+        """The route for ``question`` together with the rule and clause that fired."""
+        mask = self.matcher.scan(question)
+        for rule, clauses in self._rules:
+            for clause_mask, clause, lang in clauses:
+                if mask & clause_mask == clause_mask:
+                    return RouteExplanation(
+                        route=rule.intent,
+                        intent=rule.intent,
+                        priority=rule.priority,
+                        clause=clause,
+                        language=lang,
+                        keywords=self._keywords(question, clause, lang),
+                        version=self.config.version,
+                    )
+        return RouteExplanation(
+            route=self.config.default,
+            intent=None,
+            priority=None,
+            clause=(),
+            language=None,
+            keywords=(),
+            version=self.config.version,
+            source="default",
+        )
+
+    def _keywords(
+        self, question: str, clause: tuple[str, ...], lang: str | None
+    ) -> tuple[str, ...]:
+        text = normalize_text(question)
+        found: list[str] = []
+        for feature in clause:
+            for keyword in self.config.features[feature].get(lang or "", ()):
+                if keyword in text and keyword not in found:
+                    found.append(keyword)
+        return tuple(found)
+
+
+class ReloadingRouter(ReloadingFile[Router]):
+    """The compiled router for a routing config file, recompiled when the file changes."""
+
+    def __init__(self, path: str | Path, interval: float = 5.0) -> None:
+        super().__init__(path, _build_router, interval=interval, name="routing")
+
+
+def _build_router(path: Path) -> Router:
+    return Router(load_routing_config(path))
+
+
+_reloading_lock = threading.Lock()
+_reloading: ReloadingRouter | None = None
+
+
+def get_router() -> Router:
+    """Process-wide router for ``ROUTING_CONFIG`` (default ``config/routing.json``)."""
+    global _reloading
+    if _reloading is None:
+        with _reloading_lock:
+            if _reloading is None:
+                _reloading = ReloadingRouter(
+                    os.getenv("ROUTING_CONFIG") or DEFAULT_ROUTING_CONFIG,
+                    interval=float(os.getenv("ROUTING_RELOAD_SECONDS", "5")),
+                )
+    return _reloading.current()
+
+
+def get_route_classifier() -> HashedNgramClassifier | None:
+    """The trained routing classifier when ``ROUTING_CLASSIFIER=true``, else None.
+
+    A missing or unreadable model is logged once and routing stays rule-based.
+    """
+    if os.getenv("ROUTING_CLASSIFIER", "false").lower() != "true":
+        return None
+    return load_classifier(os.getenv("ROUTING_MODEL") or str(DEFAULT_ROUTE_MODEL))
@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+import unicodedata
+
+
+def normalize_text(text: str) -> str:
+    """NFKC-normalize and casefold, so full-width and case variants compare equal."""
+    return unicodedata.normalize("NFKC", text).casefold()
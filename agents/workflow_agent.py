@@ -1,16 +1,60 @@
 from __future__ import annotations
 
-import re
+from dataclasses import dataclass, field
 from uuid import uuid4
 
 from agents.base import AgentResult
+from agents.query_context import QueryContext, ensure_context
 from app.normalization import normalize_http_post_args
 from app.policy import Actor, decision_entry, evaluate_tool_access, resolve_actor
-from tools.registry import run_tool
+from tools.registry import arun_tool, run_tool
 
 ActionDict = dict[str, object]
 
 
+@dataclass
+class _CheckedActions:
+    """Policy-checked actions: the low-risk ones to run now and the rest."""
+
+    plan: list[str]
+    pending_actions: list[ActionDict] = field(default_factory=list)
+    runnable: list[tuple[str, dict[str, object]]] = field(default_factory=list)
+    policy_decisions: list[dict[str, object]] = field(default_factory=list)
+    denied_actions: int = 0
+
+    def result(self, executed_actions: list[dict[str, object]]) -> AgentResult:
+        requires_approval = any(action["risk"] == "high" for action in self.pending_actions)
+
+        if requires_approval:
+            answer = "Approval required before executing high-risk actions."
+        elif executed_actions:
+            answer = "Requested actions executed."
+        elif self.denied_actions:
+            answer = "Requested actions were blocked by policy."
+        else:
+            answer = "No actionable steps detected."
+
+        workflow = {
+            "plan": self.plan,
+            "requires_approval": requires_approval,
+            "pending_actions": self.pending_actions,
+            "executed_actions": executed_actions,
+            "policy_decisions": self.policy_decisions,
+        }
+        out_of_time = [
+            str(action["tool"])
+            for action in executed_actions
+            if action.get("error") == "deadline_exceeded"
+        ]
+        return AgentResult(
+            answer=answer,
+            evidence=[],
+            workflow=workflow,
+            metrics={"degraded": out_of_time} if out_of_time else None,
+            degraded=bool(out_of_time),
+        )
+
+
 class WorkflowAgent:
     name = "workflow"
 
@@ -19,58 +63,63 @@ class WorkflowAgent:
         question: str,
         actor: Actor | None = None,
         trace_id: str | None = None,
+        context: QueryContext | None = None,
+    ) -> AgentResult:
+        checked = self._check_actions(question, actor, trace_id, context)
+        deadline = context.deadline if context is not None else None
+        executed_actions = [run_tool(tool, args, deadline) for tool, args in checked.runnable]
+        return checked.result(executed_actions)
+
+    async def arun(
+        self,
+        question: str,
+        actor: Actor | None = None,
+        trace_id: str | None = None,
+        context: QueryContext | None = None,
     ) -> AgentResult:
-        plan, actions = self._build_plan_and_actions(question)
+        checked = self._check_actions(question, actor, trace_id, context)
+        deadline = context.deadline if context is not None else None
+        executed_actions = [
+            await arun_tool(tool, args, deadline) for tool, args in checked.runnable
+        ]
+        return checked.result(executed_actions)
+
+    def _check_actions(
+        self,
+        question: str,
+        actor: Actor | None,
+        trace_id: str | None,
+        context: QueryContext | None,
+    ) -> _CheckedActions:
+        ctx = ensure_context(question, context)
+        plan, actions = self._build_plan_and_actions(ctx)
         resolved_actor = actor if isinstance(actor, Actor) else resolve_actor(None, None)
-        pending_actions = []
-        executed_actions = []
-        policy_decisions = []
-        denied_actions = 0
+        checked = _CheckedActions(plan=plan)
 
         for action in actions:
             tool = str(action["tool"])
             args = dict(action.get("args", {}))
             if tool == "http_post":
-                args = normalize_http_post_args(question, args)
+                args = normalize_http_post_args(question, args, context=ctx)
                 action["args"] = args
             decision = evaluate_tool_access(resolved_actor, tool, args, trace_id=trace_id)
             action["policy"] = decision.to_dict()
-            policy_decisions.append(decision_entry(action["action_id"], tool, decision))
+            checked.policy_decisions.append(decision_entry(action["action_id"], tool, decision))
             if not decision.allowed:
-                denied_actions += 1
+                checked.denied_actions += 1
                 continue
 
             if action["risk"] == "high":
-                pending_actions.append(action)
+                checked.pending_actions.append(action)
                 continue
-            result = run_tool(tool, args)
-            executed_actions.append(result)
-
-        requires_approval = any(action["risk"] == "high" for action in pending_actions)
-
-        if requires_approval:
-            answer = "Approval required before executing high-risk actions."
-        elif executed_actions:
-            answer = "Requested actions executed."
-        elif denied_actions:
-            answer = "Requested actions were blocked by policy."
-        else:
-            answer = "No actionable steps detected."
-
-        workflow = {
-            "plan": plan,
-            "requires_approval": requires_approval,
-            "pending_actions": pending_actions,
-            "executed_actions": executed_actions,
-            "policy_decisions": policy_decisions,
-        }
-        return AgentResult(answer=answer, evidence=[], workflow=workflow)
+            checked.runnable.append((tool, args))
+        return checked
 
-    def _build_plan_and_actions(self, question: str) -> tuple[list[str], list[ActionDict]]:
-        lowered = question.lower()
+    def _build_plan_and_actions(self, ctx: QueryContext) -> tuple[list[str], list[ActionDict]]:
+        question, text = ctx.question, ctx.text
         actions: list[ActionDict] = []
 
-        if "ticket" in lowered or "티켓" in question:
+        if "ticket" in text or "티켓" in text:
             actions.append(
                 self._action(
                     tool="create_ticket",
@@ -79,7 +128,7 @@ class WorkflowAgent:
                     rationale="User requested ticket creation.",
                 )
             )
-        if "runbook" in lowered or "런북" in question:
+        if "runbook" in text or "런북" in text:
             actions.append(
                 self._action(
                     tool="generate_runbook",
@@ -88,7 +137,7 @@ class WorkflowAgent:
                     rationale="User asked for runbook.",
                 )
             )
-        if "notify" in lowered or "알림" in question:
+        if "notify" in text or "알림" in text:
             actions.append(
                 self._action(
                     tool="notify",
@@ -97,8 +146,8 @@ class WorkflowAgent:
                     rationale="User requested notification.",
                 )
             )
-        if "webhook" in lowered or "http post" in lowered or "http_post" in lowered:
-            url = self._extract_url(question)
+        if "webhook" in text or "http post" in text or "http_post" in text:
+            url = ctx.url
             args: dict[str, object] = {"payload": {"message": question}}
             if url:
                 args["url"] = url
@@ -110,9 +159,9 @@ class WorkflowAgent:
                     rationale="User requested webhook delivery.",
                 )
             )
-        if "restart" in lowered or "재시작" in question:
+        if "restart" in text or "재시작" in text:
             risk = "high"
-            is_production = "prod" in lowered or "production" in lowered or "프로덕션" in question
+            is_production = "prod" in text or "production" in text or "프로덕션" in text
             environment = "production" if is_production else "unknown"
             actions.append(
                 self._action(
@@ -122,7 +171,7 @@ class WorkflowAgent:
                     rationale="Service restart requested.",
                 )
             )
-        if "kb" in lowered or "검색" in question:
+        if "kb" in text or "검색" in text:
             actions.append(
                 self._action(
                     tool="kb_search",
@@ -150,9 +199,3 @@ class WorkflowAgent:
             "risk": risk,
             "rationale": rationale,
         }
-
-    def _extract_url(self, question: str) -> str | None:
-        match = re.search(r"https?://\\S+", question)
-        if not match:
-            return None
-        return match.group(0).rstrip(").,]")
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Mapping
+
+import anyio
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import (
+    ADMISSION_MAX_BUCKETS,
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ASK_RATE_BURST,
+    ASK_RATE_PER_SECOND,
+)
+from app.policy import Actor
+
+# Only the question-answering routes are shed under load. /approve finishes work
+# an operator already signed off on, so it bypasses the concurrency gate but is
+# still rate limited per approver; /health and /ready are probes and bypass both.
+SHEDDABLE_PATHS: frozenset[str] = frozenset({"/ask", "/ask/batch", "/ask/stream"})
+
+
+@dataclass(frozen=True)
+class Rejection:
+    status_code: int
+    reason: str
+    retry_after: int
+
+    @property
+    def headers(self) -> dict[str, str]:
+        return {"Retry-After": str(self.retry_after)}
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets refilled lazily on each call.
+
+    A bucket is two floats updated under one lock for a few arithmetic
+    operations, so contention stays negligible. Keys are kept in LRU order and
+    the least recently used bucket is dropped past ``max_buckets``; a dropped
+    key simply starts again from a full bucket.
+    """
+
+    def __init__(self, rate: float, burst: float, max_buckets: int = 10_000) -> None:
+        self._rate = rate
+        self._burst = burst
+        self._max_buckets = max_buckets
+        self._buckets: OrderedDict[str, list[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def try_acquire(self, key: str, cost: float = 1.0) -> float:
+        """0.0 when ``cost`` tokens were taken, else seconds until they would be available."""
+        return self.try_acquire_many({key: cost})
+
+    def try_acquire_many(self, costs: Mapping[str, float]) -> float:
+        """All-or-nothing ``try_acquire`` over several buckets.
+
+        Tokens are taken only when every bucket can pay its cost; otherwise none
+        are taken and the longest wait among the short buckets is returned.
+        """
+        now = time.monotonic()
+        with self._lock:
+            buckets = [(self._refill(key, now), cost) for key, cost in costs.items()]
+            wait = 0.0
+            for bucket, cost in buckets:
+                if bucket[0] >= cost:
+                    continue
+                if cost > self._burst or self._rate <= 0:
+                    return math.inf
+                wait = max(wait, (cost - bucket[0]) / self._rate)
+            if wait:
+                return wait
+            for bucket, cost in buckets:
+                bucket[0] -= cost
+            return 0.0
+
+    def _refill(self, key: str, now: float) -> list[float]:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self._burst, now]
+            if len(self._buckets) > self._max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self._burst, bucket[0] + (now - bucket[1]) * self._rate)
+            bucket[1] = now
+        return bucket
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class ConcurrencyGate:
+    """At most ``max_concurrent`` holders, with a bounded FIFO of waiters.
+
+    A caller that finds every slot taken waits up to ``queue_timeout`` seconds
+    for one to be handed over, unless ``max_queue`` callers are already
+    waiting, in which case it is turned away at once. Waiters are anyio events
+    created per call, so the gate works under any backend; it is meant to be
+    used from the event loop only.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float) -> None:
+        self._max_concurrent = max_concurrent
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._active = 0
+        self._waiters: deque[anyio.Event] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def saturated(self) -> bool:
+        return self._active >= self._max_concurrent or bool(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self._active < self._max_concurrent and not self._waiters:
+            self._active += 1
+            return True
+        if len(self._waiters) >= self._max_queue:
+            return False
+        event = anyio.Event()
+        self._waiters.append(event)
+        try:
+            with anyio.move_on_after(self._queue_timeout):
+                await event.wait()
+        except BaseException:
+            if event.is_set():
+                # Handed a slot while being cancelled: pass it on instead of leaking it.
+                self.release()
+            else:
+                self._waiters.remove(event)
+            raise
+        if not event.is_set():
+            self._waiters.remove(event)
+            return False
+        # A slot handed over by release() stays counted in _active.
+        return True
+
+    def release(self) -> None:
+        if self._waiters:
+            self._waiters.popleft().set()
+        else:
+            self._active -= 1
+
+
+class AdmissionController:
+    """Per-actor token buckets in front of a global concurrency gate for /ask routes."""
+
+    def __init__(self, limiter: TokenBucketLimiter, gate: ConcurrencyGate) -> None:
+        self._limiter = limiter
+        self._gate = gate
+        self._lock = threading.Lock()
+        self._counts = {"admitted": 0, "queued": 0, "rate_limited": 0, "shed": 0}
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def check_rate(self, actor_key: str, cost: float = 1.0) -> Rejection | None:
+        return self.check_rates({actor_key: cost})
+
+    def check_rates(self, costs: Mapping[str, float]) -> Rejection | None:
+        """Charge every bucket in ``costs`` or, if any is short, none of them."""
+        wait = self._limiter.try_acquire_many(costs)
+        if wait == 0.0:
+            return None
+        self._count("rate_limited")
+        retry_after = 60 if math.isinf(wait) else max(1, math.ceil(wait))
+        return Rejection(status_code=429, reason="rate_limited", retry_after=retry_after)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[Rejection | None]:
+        """Hold a concurrency slot for the block, or yield the 503 to send instead."""
+        queued = self._gate.saturated
+        if not await self._gate.acquire():
+            self._count("shed")
+            yield Rejection(status_code=503, reason="overloaded", retry_after=1)
+            return
+        self._count("queued" if queued else "admitted")
+        try:
+            yield None
+        finally:
+            self._gate.release()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            counts = dict(self._counts)
+        return {
+            **counts,
+            "active": self._gate.active,
+            "waiting": self._gate.waiting,
+            "buckets": len(self._limiter),
+        }
+
+
+def actor_key(actor: Actor, scope: str = "ask") -> str:
+    """Rate-limit key; requests without an ``actor_id`` share their role's anonymous bucket.
+
+    ``/approve`` is charged under its own scope, so an actor's questions and
+    approvals are limited separately.
+    """
+    key = f"{actor.role.value}:{actor.actor_id}"
+    return key if scope == "ask" else f"{scope}:{key}"
+
+
+class AdmissionMiddleware:
+    """ASGI middleware holding a concurrency slot for the whole of a sheddable request.
+
+    Wrapping the ASGI call (rather than ``call_next``) keeps the slot until the
+    last body chunk is sent, so streamed answers count for their full length.
+    Requests turned away get a 503 with ``Retry-After`` before their body is read.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        admission = get_admission()
+        if admission is None or scope["type"] != "http" or scope["path"] not in SHEDDABLE_PATHS:
+            await self.app(scope, receive, send)
+            return
+        async with admission.slot() as rejection:
+            if rejection is None:
+                await self.app(scope, receive, send)
+                return
+            scope.setdefault("state", {})["metrics"] = {"admission": rejection.reason}
+            response = JSONResponse(
+                {"detail": rejection.reason},
+                status_code=rejection.status_code,
+                headers=rejection.headers,
+            )
+            await response(scope, receive, send)
+
+
+_instance_lock = threading.Lock()
+_instance: AdmissionController | None = None
+
+
+def get_admission() -> AdmissionController | None:
+    """Process-wide controller, or None when ``ADMISSION_ENABLED`` is false."""
+    global _instance
+    if os.getenv("ADMISSION_ENABLED", "true").lower() != "true":
+        return None
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = AdmissionController(
+                    TokenBucketLimiter(
+                        rate=float(os.getenv("ASK_RATE_PER_SECOND", str(ASK_RATE_PER_SECOND))),
+                        burst=float(os.getenv("ASK_RATE_BURST", str(ASK_RATE_BURST))),
+                        max_buckets=int(
+                            os.getenv("ADMISSION_MAX_BUCKETS", str(ADMISSION_MAX_BUCKETS))
+                        ),
+                    ),
+                    ConcurrencyGate(
+                        max_concurrent=int(
+                            os.getenv("ADMISSION_MAX_CONCURRENT", str(ADMISSION_MAX_CONCURRENT))
+                        ),
+                        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", str(ADMISSION_MAX_QUEUE))),
+                        queue_timeout=float(
+                            os.getenv(
+                                "ADMISSION_QUEUE_TIMEOUT_SECONDS",
+                                str(ADMISSION_QUEUE_TIMEOUT_SECONDS),
+                            )
+                        ),
+                    ),
+                )
+    return _instance
@@ -2,15 +2,21 @@ from __future__ import annotations
 
 import os
 import subprocess
-from dataclasses import dataclass
-from functools import lru_cache
+from dataclasses import dataclass, replace
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, AsyncIterator, Sequence
 
+from agents.base import AgentResult
+from agents.deadline import Deadline
 from agents.guardrails import evaluate_question
-from agents.orchestrator import Orchestrator
+from agents.orchestrator import READ_ONLY_ROUTES, RouteRequest, get_orchestrator
+from agents.query_context import QueryContext
 from agents.usage import normalize_usage
 from app.config import RETRIEVAL_CONFIDENCE_THRESHOLD
 from app.policy import Actor, resolve_actor
 from app.schemas import AskResponse, HumanReview, Usage, Workflow
+from app.singleflight import get_singleflight
 
 _LOW_CONFIDENCE_ACTIONS = [
     "Add more context (system name, timeframe, error message).",
@@ -27,6 +33,7 @@ _MISSING_CONTEXT_ACTIONS = [
     "Specify the environment (prod/staging/dev).",
     "Share the timeframe, ticket/alert ID, and error message.",
 ]
+_TICKET_KEYWORDS = ["ticket", "incident", "alert", "case", "티켓", "알림", "인시던트"]
 _INCIDENT_KEYWORDS = [
     "지난주",
     "어제",
@@ -65,6 +72,14 @@ class AskOutcome:
     chosen_agent: str
     evidence_count: int
     usage: dict[str, int] | None
+    metrics: dict[str, Any] | None = None
+
+
+@dataclass(frozen=True)
+class AskEvent:
+    event: str
+    data: dict[str, Any]
+    outcome: AskOutcome | None = None
 
 
 def _human_review_needed(reason: str, suggested_actions: list[str]) -> HumanReview:
@@ -84,33 +99,43 @@ def _empty_workflow() -> Workflow:
     )
 
 
-def _has_ticket_id(question: str) -> bool:
-    tokens = ["ticket", "incident", "alert", "case", "티켓", "알림", "인시던트"]
-    if any(token in question for token in tokens) and any(char.isdigit() for char in question):
+def _has_ticket_id(context: QueryContext) -> bool:
+    if context.has_any(_TICKET_KEYWORDS) and any(char.isdigit() for char in context.text):
         return True
     return False
 
 
-def _has_system_or_env(question: str) -> bool:
-    return any(keyword in question for keyword in _ENV_KEYWORDS + _SYSTEM_KEYWORDS)
+def _has_system_or_env(context: QueryContext) -> bool:
+    return context.has_any(_ENV_KEYWORDS) or context.has_any(_SYSTEM_KEYWORDS)
 
 
-def _needs_missing_context(question: str) -> bool:
-    lowered = question.lower()
-    if not any(keyword in lowered for keyword in _INCIDENT_KEYWORDS):
+def _needs_missing_context(context: QueryContext) -> bool:
+    if not context.has_any(_INCIDENT_KEYWORDS):
         return False
-    if _has_ticket_id(lowered):
+    if _has_ticket_id(context):
         return False
-    if _has_system_or_env(lowered):
+    if _has_system_or_env(context):
         return False
     return True
 
 
 @lru_cache(maxsize=1)
-def _resolve_build_marker() -> str:
+def build_marker() -> str:
+    """The build identifier, resolved on first use rather than at import.
+
+    ``APP_BUILD``/``BUILD_MARKER`` win, then the marker file written at image
+    build time (``BUILD_MARKER_FILE``, default ``build_marker.txt``); only a
+    checkout with neither falls back to asking git.
+    """
     env_marker = os.getenv("APP_BUILD") or os.getenv("BUILD_MARKER")
     if env_marker:
         return env_marker
+    try:
+        file_marker = Path(os.getenv("BUILD_MARKER_FILE", "build_marker.txt")).read_text()
+    except OSError:
+        file_marker = ""
+    if file_marker.strip():
+        return file_marker.strip()
     try:
         result = subprocess.run(
             ["git", "rev-parse", "--short", "HEAD"],
@@ -123,39 +148,223 @@ def _resolve_build_marker() -> str:
     return result.stdout.strip() or "unknown"
 
 
-BUILD_MARKER = _resolve_build_marker()
+def build_ask_outcome(
+    question: str,
+    trace_id: str,
+    actor: Actor | None = None,
+    deadline: Deadline | None = None,
+) -> AskOutcome:
+    context = QueryContext.build(question, deadline=deadline)
+    guardrail = evaluate_question(question, context=context)
+    if guardrail["blocked"]:
+        return _blocked_outcome(guardrail, trace_id)
+
+    orchestrator = get_orchestrator()
+    resolved = actor or resolve_actor(None, None)
+    run = partial(
+        orchestrator.route_with_choice,
+        question,
+        actor=resolved,
+        trace_id=trace_id,
+        context=context,
+    )
+    flight = get_singleflight()
+    route = orchestrator.choose(question, context)
+    if flight is None or route not in READ_ONLY_ROUTES:
+        chosen_agent, result = run()
+    else:
+        (chosen_agent, result), coalesced = flight.do(
+            _coalescing_key(context, resolved),
+            run,
+            timeout=context.deadline.remaining() if context.deadline is not None else None,
+            on_timeout=partial(orchestrator.deadline_answer, route),
+        )
+        if _should_rerun(result, coalesced, context):
+            (chosen_agent, result), coalesced = run(), False
+        result = _mark_coalesced(result, coalesced)
+    return _agent_outcome(context, trace_id, guardrail, chosen_agent, result)
+
+
+async def abuild_ask_outcome(
+    question: str,
+    trace_id: str,
+    actor: Actor | None = None,
+    deadline: Deadline | None = None,
+) -> AskOutcome:
+    """Async variant of build_ask_outcome; retrieval runs on the search executor."""
+    outcome: AskOutcome | None = None
+    async for event in astream_ask_events(question, trace_id, actor=actor, deadline=deadline):
+        outcome = event.outcome or outcome
+    assert outcome is not None
+    return outcome
+
 
+async def astream_ask_events(
+    question: str,
+    trace_id: str,
+    actor: Actor | None = None,
+    deadline: Deadline | None = None,
+) -> AsyncIterator[AskEvent]:
+    """The /ask pipeline as a stream of events, each yielded as soon as it is known.
 
-def build_ask_outcome(question: str, trace_id: str, actor: Actor | None = None) -> AskOutcome:
-    build_marker = BUILD_MARKER
-    guardrail = evaluate_question(question)
+    Order: ``guardrail``, then (unless blocked) ``routing``, one ``evidence``
+    per snippet, ``workflow`` when the agent planned actions, and finally
+    ``answer``, which alone carries the complete outcome. With a ``deadline``,
+    stages that run out of budget are skipped or cut short and the answer is
+    marked ``degraded`` instead of the request running over.
+    """
+    context = QueryContext.build(question, deadline=deadline)
+    guardrail = evaluate_question(question, context=context)
+    yield AskEvent("guardrail", guardrail)
     if guardrail["blocked"]:
-        response = AskResponse(
-            answer="보안 정책상 해당 요청은 처리할 수 없습니다.",
-            chosen_agent="guardrail",
-            evidence=[],
-            trace_id=trace_id,
-            citations=[],
-            guardrail=guardrail,
-            workflow=_empty_workflow(),
-            usage=None,
-            model=None,
-            human_review=_human_review_needed("policy_blocked", _POLICY_BLOCKED_ACTIONS),
-            build=build_marker,
-        )
-        return AskOutcome(response=response, chosen_agent="guardrail", evidence_count=0, usage=None)
+        outcome = _blocked_outcome(guardrail, trace_id)
+        yield AskEvent("answer", outcome.response.model_dump(), outcome)
+        return
 
-    orchestrator = Orchestrator()
-    resolved_actor = actor or resolve_actor(None, None)
-    chosen_agent, result = orchestrator.route_with_choice(
+    orchestrator = get_orchestrator()
+    route = orchestrator.choose(question, context)
+    speculative = bool(orchestrator.speculation_candidates(question, context))
+    yield AskEvent("routing", {"route": route, "speculative": speculative})
+    resolved = actor or resolve_actor(None, None)
+    run = partial(
+        orchestrator.aroute_with_choice,
         question,
-        actor=resolved_actor,
+        actor=resolved,
+        trace_id=trace_id,
+        context=context,
+    )
+    flight = get_singleflight()
+    if flight is None or route not in READ_ONLY_ROUTES:
+        chosen_agent, result = await run()
+    else:
+        # Identical read-only questions in flight share one agent run; each
+        # caller still builds its own response around its own trace_id.
+        # A follower gives up on the leader when its own deadline runs out.
+        (chosen_agent, result), coalesced = await flight.ado(
+            _coalescing_key(context, resolved),
+            run,
+            timeout=context.deadline.remaining() if context.deadline is not None else None,
+            on_timeout=partial(orchestrator.deadline_answer, route),
+        )
+        if _should_rerun(result, coalesced, context):
+            (chosen_agent, result), coalesced = await run(), False
+        result = _mark_coalesced(result, coalesced)
+    for index, snippet in enumerate(result.evidence):
+        yield AskEvent("evidence", {"index": index, "text": snippet})
+    outcome = _agent_outcome(context, trace_id, guardrail, chosen_agent, result)
+    workflow = outcome.response.workflow
+    if workflow.plan or workflow.pending_actions or workflow.executed_actions:
+        yield AskEvent("workflow", workflow.model_dump())
+    yield AskEvent("answer", outcome.response.model_dump(), outcome)
+
+
+async def abuild_ask_outcomes(
+    items: Sequence[tuple[str, str, Actor | None]],
+    deadline: Deadline | None = None,
+) -> list[AskOutcome]:
+    """Outcomes for many ``(question, trace_id, actor)`` items, answered as one batch.
+
+    Guardrails run per item; the questions that pass are routed together so
+    doc-search questions share a single retrieval call. ``deadline`` covers the
+    whole batch.
+    """
+    outcomes: list[AskOutcome | None] = [None] * len(items)
+    contexts: dict[int, QueryContext] = {}
+    guardrails: dict[int, dict[str, Any]] = {}
+    requests: list[RouteRequest] = []
+    for i, (question, trace_id, actor) in enumerate(items):
+        context = QueryContext.build(question, deadline=deadline)
+        guardrail = evaluate_question(question, context=context)
+        if guardrail["blocked"]:
+            outcomes[i] = _blocked_outcome(guardrail, trace_id)
+            continue
+        contexts[i] = context
+        guardrails[i] = guardrail
+        requests.append(
+            RouteRequest(
+                question=question,
+                actor=actor or resolve_actor(None, None),
+                trace_id=trace_id,
+                context=context,
+            )
+        )
+
+    routed = await get_orchestrator().aroute_many(requests) if requests else []
+    for i, (chosen_agent, result) in zip(list(contexts), routed):
+        outcomes[i] = _agent_outcome(contexts[i], items[i][1], guardrails[i], chosen_agent, result)
+    return [outcome for outcome in outcomes if outcome is not None]
+
+
+def can_reuse_answer(question: str, chosen_agent: str, body: dict[str, Any] | None = None) -> bool:
+    """Whether a cached answer from ``chosen_agent`` may serve ``question``.
+
+    Checked on every cache hit, exact or reworded: the question must pass the
+    current guardrail on its own and still route to the same read-only agent.
+    A reworded hit also passes the cached ``body``, whose human review must be
+    the one this wording would get; the missing-context check reads the words
+    themselves, so another question's review is never replayed.
+    """
+    context = QueryContext.build(question)
+    if evaluate_question(question, context=context)["blocked"]:
+        return False
+    route = get_orchestrator().choose(question, context)
+    if route not in READ_ONLY_ROUTES or route != chosen_agent:
+        return False
+    if body is None:
+        return True
+    cached_reason = (body.get("human_review") or {}).get("reason")
+    return (cached_reason == "missing_context") == _needs_missing_context(context)
+
+
+def _coalescing_key(context: QueryContext, actor: Actor) -> tuple[str, str]:
+    return " ".join(context.text.split()), actor.role.value
+
+
+def _should_rerun(result: AgentResult, coalesced: bool, context: QueryContext) -> bool:
+    """Whether a follower should answer for itself instead of taking the leader's result.
+
+    A degraded result reflects the leader's deadline, so a follower that still
+    has budget of its own runs the question rather than inherit the shortcut.
+    """
+    if not coalesced or not result.degraded:
+        return False
+    return context.deadline is None or not context.deadline.expired()
+
+
+def _mark_coalesced(result: AgentResult, coalesced: bool) -> AgentResult:
+    if not coalesced:
+        return result
+    return replace(result, metrics={**(result.metrics or {}), "coalesced": True})
+
+
+def _blocked_outcome(guardrail: dict[str, Any], trace_id: str) -> AskOutcome:
+    response = AskResponse(
+        answer="보안 정책상 해당 요청은 처리할 수 없습니다.",
+        chosen_agent="guardrail",
+        evidence=[],
         trace_id=trace_id,
+        citations=[],
+        guardrail=guardrail,
+        workflow=_empty_workflow(),
+        usage=None,
+        model=None,
+        human_review=_human_review_needed("policy_blocked", _POLICY_BLOCKED_ACTIONS),
+        build=build_marker(),
     )
+    return AskOutcome(response=response, chosen_agent="guardrail", evidence_count=0, usage=None)
+
+
+def _agent_outcome(
+    context: QueryContext,
+    trace_id: str,
+    guardrail: dict[str, Any],
+    chosen_agent: str,
+    result: AgentResult,
+) -> AskOutcome:
     usage_dict = normalize_usage(result.usage)
     usage = Usage(**usage_dict) if usage_dict else None
     human_review = _human_review_not_needed()
-    if _needs_missing_context(question):
+    if _needs_missing_context(context):
         human_review = _human_review_needed("missing_context", _MISSING_CONTEXT_ACTIONS)
     elif result.confidence is not None and result.confidence < RETRIEVAL_CONFIDENCE_THRESHOLD:
         human_review = _human_review_needed("low_retrieval_confidence", _LOW_CONFIDENCE_ACTIONS)
@@ -175,11 +384,13 @@ def build_ask_outcome(question: str, trace_id: str, actor: Actor | None = None)
         usage=usage,
         model=result.model,
         human_review=human_review,
-        build=build_marker,
+        build=build_marker(),
+        degraded=result.degraded,
     )
     return AskOutcome(
         response=response,
         chosen_agent=chosen_agent,
         evidence_count=len(result.evidence),
         usage=usage_dict,
+        metrics=result.metrics,
     )
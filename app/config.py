@@ -1 +1,18 @@
 RETRIEVAL_CONFIDENCE_THRESHOLD = 0.15
+RETRIEVAL_CANDIDATE_K = 50
+RETRIEVAL_TOP_K = 5
+RERANK_BUDGET_MS = 25.0
+RERANK_MAX_INFLIGHT = 8
+SPECULATION_DEADLINE_MS = 200.0
+SPECULATION_MAX_WORKERS = 8
+GUARDRAIL_MODEL_THRESHOLD = 0.8
+GUARDRAIL_MODEL_MAX_CHARS = 512
+GUARDRAIL_MODEL_BUDGET_US = 200.0
+ASK_BATCH_MAX_ITEMS = 100
+ASK_RATE_PER_SECOND = 50.0
+ASK_RATE_BURST = 200.0
+ADMISSION_MAX_CONCURRENT = 64
+ADMISSION_MAX_QUEUE = 256
+ADMISSION_QUEUE_TIMEOUT_SECONDS = 2.0
+ADMISSION_MAX_BUCKETS = 10000
+REQUEST_DEADLINE_MS = 10000.0
@@ -2,13 +2,28 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from typing import Any, AsyncIterator
 from uuid import uuid4
 
-from fastapi import FastAPI, HTTPException, Request, Response
-
-from app.ask_logic import build_ask_outcome
+import anyio
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from agents.deadline import Deadline
+from agents.orchestrator import get_orchestrator
+from app.admission import AdmissionMiddleware, actor_key, get_admission
+from app.ask_logic import (
+    abuild_ask_outcome,
+    abuild_ask_outcomes,
+    astream_ask_events,
+    build_marker,
+    can_reuse_answer,
+)
+from app.config import REQUEST_DEADLINE_MS
 from app.normalization import normalize_http_post_args
 from app.pending_store import (
     STATUS_APPROVED,
@@ -19,16 +34,61 @@ from app.pending_store import (
     STATUS_RUNNING,
     PendingActionStore,
 )
-from app.policy import ActorRole, evaluate_tool_access, resolve_actor
-from app.schemas import ApproveRequest, ApproveResponse, AskRequest, AskResponse, ToolResult
-from tools.registry import run_tool
+from app.policy import Actor, ActorRole, evaluate_tool_access, resolve_actor
+from app.response_cache import (
+    CachedResponse,
+    ResponseCache,
+    etag_matches,
+    get_response_cache,
+)
+from app.responses import FastJSONResponse
+from app.retrieval import get_retriever, keep_retriever_fresh
+from app.schemas import (
+    ApproveRequest,
+    ApproveResponse,
+    AskBatchRequest,
+    AskBatchResponse,
+    AskRequest,
+    AskResponse,
+    IndexStats,
+    ReadyResponse,
+    RouteExplainResponse,
+    Suggestion,
+    SuggestResponse,
+    ToolResult,
+)
+from app.semantic_cache import get_semantic_cache
+from app.singleflight import get_singleflight
+from app.warmup import run_warmup, warmup_state
+from tools.registry import arun_tool
 
 logger = logging.getLogger("app")
 if not logger.handlers:
     logging.basicConfig(level=logging.INFO)
 
-app = FastAPI(title="Agentic RAG Lab")
 pending_store = PendingActionStore()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    """Warm up in the background so /health answers at once and /ready flips when warm.
+
+    The retriever refresher runs alongside for the life of the app.
+    """
+    warmup_state.reset()
+    async with anyio.create_task_group() as tg:
+        if os.getenv("WARMUP_ENABLED", "true").lower() == "true":
+            tg.start_soon(run_warmup, pending_store)
+        else:
+            warmup_state.finish("skipped")
+        tg.start_soon(keep_retriever_fresh)
+        yield
+        tg.cancel_scope.cancel()
+
+
+app = FastAPI(title="Agentic RAG Lab", lifespan=lifespan)
+# Registered before trace_middleware so that one stays outermost and logs 503s too.
+app.add_middleware(AdmissionMiddleware)
 RUNNING_STALE_SECONDS = 15 * 60
 
 
@@ -52,6 +112,9 @@ async def trace_middleware(request: Request, call_next) -> Response:
         log_payload["usage_prompt_tokens"] = usage.get("prompt_tokens")
         log_payload["usage_completion_tokens"] = usage.get("completion_tokens")
         log_payload["usage_total_tokens"] = usage.get("total_tokens")
+    metrics = getattr(request.state, "metrics", None)
+    if metrics:
+        log_payload["metrics"] = metrics
     logger.info(json.dumps(log_payload, ensure_ascii=False))
     return response
 
@@ -61,28 +124,257 @@ def health() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/ready", response_model=ReadyResponse)
+def ready(response: Response) -> ReadyResponse:
+    snapshot = warmup_state.snapshot()
+    is_ready = warmup_state.ready
+    if not is_ready:
+        response.status_code = 503
+    return ReadyResponse(
+        ready=is_ready,
+        # Only a warm process touches the retriever here; a cold one would build it.
+        index_generation=get_retriever().generation if is_ready else None,
+        **snapshot,
+    )
+
+
+@app.get("/suggest", response_model=SuggestResponse)
+def suggest(
+    prefix: str = Query(..., max_length=64),
+    limit: int = Query(default=10, ge=1, le=50),
+) -> SuggestResponse:
+    retriever = get_retriever()
+    return SuggestResponse(
+        prefix=prefix,
+        generation=retriever.generation,
+        suggestions=[Suggestion(term=term, df=df) for term, df in retriever.suggest(prefix, limit)],
+    )
+
+
+@app.get("/route/explain", response_model=RouteExplainResponse)
+def route_explain(question: str = Query(..., min_length=1)) -> RouteExplainResponse:
+    explanation = get_orchestrator().route_explain(question)
+    return RouteExplainResponse(
+        route=explanation.route,
+        intent=explanation.intent,
+        priority=explanation.priority,
+        clause=list(explanation.clause),
+        language=explanation.language,
+        keywords=list(explanation.keywords),
+        config_version=explanation.version,
+        source=explanation.source,
+        confidence=explanation.confidence,
+    )
+
+
+@app.get("/index/stats", response_model=IndexStats)
+def index_stats() -> IndexStats:
+    return IndexStats(**get_retriever().index_stats())
+
+
 @app.post("/ask", response_model=AskResponse)
-def ask(payload: AskRequest, request: Request) -> AskResponse:
+async def ask(payload: AskRequest, request: Request) -> Response:
     actor = resolve_actor(payload.actor_id, payload.actor_role)
-    outcome = build_ask_outcome(payload.question, request.state.trace_id, actor=actor)
+    _check_rate([actor])
+    trace_id = request.state.trace_id
+    if_none_match = request.headers.get("If-None-Match")
+    cache = get_response_cache()
+    cache_key = ResponseCache.key(payload.question, actor.role.value, build_marker())
+    # Config versions are bumped by hand, so every hit re-checks the live guardrail and route.
+    cached = (
+        cache.get(cache_key, lambda entry: can_reuse_answer(payload.question, entry.chosen_agent))
+        if cache is not None
+        else None
+    )
+    if cached is not None:
+        return _cached_ask_response(request, cached, if_none_match, {"response_cache": "hit"})
+    semantic = get_semantic_cache() if cache is not None else None
+    near = semantic.get(*cache_key) if semantic is not None else None
+    if near is not None and can_reuse_answer(payload.question, near.chosen_agent, near.body):
+        cache_metrics = {"response_cache": "semantic_hit"}
+        return _cached_ask_response(request, near, if_none_match, cache_metrics)
+
+    outcome = await abuild_ask_outcome(
+        payload.question, trace_id, actor=actor, deadline=_request_deadline(request)
+    )
     request.state.chosen_agent = outcome.chosen_agent
     request.state.evidence_count = outcome.evidence_count
     request.state.usage = outcome.usage
-    workflow = outcome.response.workflow
+    request.state.metrics = outcome.metrics
+    await _save_pending_for(trace_id, outcome.response)
+    headers: dict[str, str] = {}
+    # A degraded answer is what the budget allowed this time, not the answer to replay.
+    if cache is not None and not outcome.response.degraded:
+        entry = cache.put(
+            cache_key,
+            outcome.response.model_dump(mode="json"),
+            outcome.chosen_agent,
+            outcome.evidence_count,
+        )
+        if entry is not None:
+            if semantic is not None:
+                semantic.put(*cache_key, entry)
+            headers["ETag"] = entry.etag
+            if etag_matches(if_none_match, entry.etag):
+                return Response(status_code=304, headers=headers)
+    # outcome.response was validated when built; serialize it without a second pass.
+    return FastJSONResponse(outcome.response, headers=headers)
+
+
+def _cached_ask_response(
+    request: Request,
+    cached: CachedResponse,
+    if_none_match: str | None,
+    cache_metrics: dict[str, Any],
+) -> Response:
+    request.state.chosen_agent = cached.chosen_agent
+    request.state.evidence_count = cached.evidence_count
+    request.state.metrics = cache_metrics
+    headers = {"ETag": cached.etag}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse({**cached.body, "trace_id": request.state.trace_id}, headers=headers)
+
+
+@app.get("/metrics")
+def metrics() -> dict[str, Any]:
+    cache = get_response_cache()
+    semantic = get_semantic_cache()
+    flight = get_singleflight()
+    admission = get_admission()
+    return {
+        "response_cache": cache.stats() if cache is not None else None,
+        "semantic_cache": semantic.stats() if semantic is not None else None,
+        "singleflight": flight.stats() if flight is not None else None,
+        "admission": admission.stats() if admission is not None else None,
+    }
+
+
+@app.post("/ask/stream")
+async def ask_stream(payload: AskRequest, request: Request) -> StreamingResponse:
+    actor = resolve_actor(payload.actor_id, payload.actor_role)
+    _check_rate([actor])
+    trace_id = request.state.trace_id
+    deadline = _request_deadline(request)
+
+    async def events() -> AsyncIterator[str]:
+        async for event in astream_ask_events(
+            payload.question, trace_id, actor=actor, deadline=deadline
+        ):
+            if event.outcome is not None:
+                await _save_pending_for(trace_id, event.outcome.response)
+                logger.info(
+                    json.dumps(
+                        {
+                            "event": "ask_stream_done",
+                            "trace_id": trace_id,
+                            "chosen_agent": event.outcome.chosen_agent,
+                            "evidence_count": event.outcome.evidence_count,
+                            "metrics": event.outcome.metrics,
+                        },
+                        ensure_ascii=False,
+                    )
+                )
+            data = json.dumps(event.data, ensure_ascii=False)
+            yield f"event: {event.event}\ndata: {data}\n\n"
+
+    # The middleware logs when headers go out, before the agent has run.
+    request.state.chosen_agent = "stream"
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _request_deadline(request: Request) -> Deadline:
+    """Budget from ``X-Request-Deadline`` (milliseconds from now), else ``REQUEST_DEADLINE_MS``."""
+    raw = request.headers.get("X-Request-Deadline")
+    if raw is None:
+        return Deadline.after_ms(float(os.getenv("REQUEST_DEADLINE_MS", str(REQUEST_DEADLINE_MS))))
+    try:
+        budget_ms = float(raw)
+    except ValueError:
+        budget_ms = -1.0
+    if not 0 < budget_ms < float("inf"):
+        raise HTTPException(status_code=400, detail="invalid_deadline")
+    return Deadline.after_ms(budget_ms)
+
+
+def _check_rate(actors: list[Actor], scope: str = "ask") -> None:
+    """Take one token per request from each actor's bucket, or raise 429 with Retry-After.
+
+    A batch spanning several actors is charged all at once: if any bucket is
+    short, no bucket pays.
+    """
+    admission = get_admission()
+    if admission is None:
+        return
+    costs: dict[str, float] = {}
+    for actor in actors:
+        key = actor_key(actor, scope)
+        costs[key] = costs.get(key, 0) + 1
+    rejection = admission.check_rates(costs)
+    if rejection is not None:
+        raise HTTPException(
+            status_code=rejection.status_code,
+            detail=rejection.reason,
+            headers=rejection.headers,
+        )
+
+
+async def _save_pending_for(trace_id: str, response: AskResponse) -> None:
+    workflow = response.workflow
     if workflow.requires_approval and workflow.pending_actions:
-        pending_store.save_pending(
-            request.state.trace_id,
-            [action.model_dump() for action in workflow.pending_actions],
+        await pending_store.asave_pending(
+            trace_id, [action.model_dump() for action in workflow.pending_actions]
         )
-    return outcome.response
+
+
+@app.post("/ask/batch", response_model=AskBatchResponse)
+async def ask_batch(payload: AskBatchRequest, request: Request) -> Response:
+    items = [
+        (item.question, str(uuid4()), resolve_actor(item.actor_id, item.actor_role))
+        for item in payload.items
+    ]
+    _check_rate([actor for _, _, actor in items])
+    outcomes = await abuild_ask_outcomes(items, deadline=_request_deadline(request))
+    request.state.chosen_agent = "batch"
+    request.state.evidence_count = sum(outcome.evidence_count for outcome in outcomes)
+    pending: list[tuple[str, list[dict[str, Any]]]] = []
+    for outcome in outcomes:
+        response = outcome.response
+        logger.info(
+            json.dumps(
+                {
+                    "event": "ask_batch_item",
+                    "trace_id": response.trace_id,
+                    "batch_trace_id": request.state.trace_id,
+                    "chosen_agent": outcome.chosen_agent,
+                    "evidence_count": outcome.evidence_count,
+                    "metrics": outcome.metrics,
+                },
+                ensure_ascii=False,
+            )
+        )
+        workflow = response.workflow
+        if workflow.requires_approval and workflow.pending_actions:
+            pending.append(
+                (response.trace_id, [action.model_dump() for action in workflow.pending_actions])
+            )
+    if pending:
+        await pending_store.asave_pending_many(pending)
+    return FastJSONResponse(AskBatchResponse(items=[outcome.response for outcome in outcomes]))
 
 
 @app.post("/approve", response_model=ApproveResponse)
-def approve(payload: ApproveRequest) -> ApproveResponse:
-    record = pending_store.get_action(payload.action_id)
+async def approve(payload: ApproveRequest, request: Request) -> ApproveResponse:
+    deadline = _request_deadline(request)
+    actor = resolve_actor(payload.approved_by, payload.approved_role)
+    _check_rate([actor], scope="approve")
+    record = await pending_store.aget_action(payload.action_id)
     if not record:
         raise HTTPException(status_code=404, detail="action_not_found")
-    actor = resolve_actor(payload.approved_by, payload.approved_role)
     if actor.role not in {ActorRole.operator, ActorRole.admin}:
         raise HTTPException(status_code=403, detail="insufficient_role")
 
@@ -102,7 +394,7 @@ def approve(payload: ApproveRequest) -> ApproveResponse:
     )
 
     if not payload.approve:
-        pending_store.reject_action(payload.action_id, payload.approved_by, actor.role.value)
+        await pending_store.areject_action(payload.action_id, payload.approved_by, actor.role.value)
         return ApproveResponse(
             trace_id=trace_id or "",
             action_id=payload.action_id,
@@ -143,7 +435,7 @@ def approve(payload: ApproveRequest) -> ApproveResponse:
         args = normalize_http_post_args(None, args)
     decision = evaluate_tool_access(actor, tool, args, trace_id=trace_id)
     if not decision.allowed:
-        pending_store.reject_action(payload.action_id, payload.approved_by, actor.role.value)
+        await pending_store.areject_action(payload.action_id, payload.approved_by, actor.role.value)
         return ApproveResponse(
             trace_id=trace_id or "",
             action_id=payload.action_id,
@@ -158,21 +450,21 @@ def approve(payload: ApproveRequest) -> ApproveResponse:
     if record.status == STATUS_RUNNING:
         if not payload.force or not _is_stale(record.started_at):
             return _running_response(trace_id, payload.action_id)
-        started = pending_store.start_action(
+        started = await pending_store.astart_action(
             payload.action_id,
             payload.approved_by,
             actor.role.value,
             [STATUS_RUNNING],
         )
     elif record.status in {STATUS_PENDING, STATUS_APPROVED}:
-        started = pending_store.start_action(
+        started = await pending_store.astart_action(
             payload.action_id,
             payload.approved_by,
             actor.role.value,
             [STATUS_PENDING, STATUS_APPROVED],
         )
     elif record.status == STATUS_FAILED and payload.retry:
-        started = pending_store.start_action(
+        started = await pending_store.astart_action(
             payload.action_id,
             payload.approved_by,
             actor.role.value,
@@ -180,7 +472,7 @@ def approve(payload: ApproveRequest) -> ApproveResponse:
         )
 
     if not started:
-        latest = pending_store.get_action(payload.action_id)
+        latest = await pending_store.aget_action(payload.action_id)
         if latest:
             latest_result = _tool_result_from_record(latest)
             if latest.status == STATUS_RUNNING:
@@ -191,14 +483,14 @@ def approve(payload: ApproveRequest) -> ApproveResponse:
                 if not payload.retry:
                     failed_result = latest_result or _fallback_tool_result(latest)
                     return _failed_response(latest.trace_id, payload.action_id, failed_result)
-                started = pending_store.start_action(
+                started = await pending_store.astart_action(
                     payload.action_id,
                     payload.approved_by,
                     actor.role.value,
                     [STATUS_FAILED],
                 )
             if latest.status == STATUS_APPROVED:
-                started = pending_store.start_action(
+                started = await pending_store.astart_action(
                     payload.action_id,
                     payload.approved_by,
                     actor.role.value,
@@ -208,18 +500,18 @@ def approve(payload: ApproveRequest) -> ApproveResponse:
             return _running_response(trace_id, payload.action_id)
 
     try:
-        result = run_tool(tool, args)
+        result = await arun_tool(tool, args, deadline=deadline)
     except Exception as exc:
         error = str(exc)
         result = {"tool": tool, "ok": False, "output": "", "error": error}
-        pending_store.fail_action(payload.action_id, result, error)
+        await pending_store.afail_action(payload.action_id, result, error)
         return _failed_response(trace_id, payload.action_id, ToolResult(**result))
     if result.get("ok", False):
-        pending_store.complete_action(payload.action_id, result)
+        await pending_store.acomplete_action(payload.action_id, result)
         return _completed_response(trace_id, payload.action_id, ToolResult(**result))
     else:
         error = str(result.get("error") or "tool_failed")
-        pending_store.fail_action(payload.action_id, result, error)
+        await pending_store.afail_action(payload.action_id, result, error)
         return _failed_response(trace_id, payload.action_id, ToolResult(**result))
 
 
@@ -1,26 +1,35 @@
 from __future__ import annotations
 
 import json
-import re
-from typing import Any
+from typing import Any, Callable
 
-_URL_WITH_LABEL = re.compile(r"url\s*[:=]\s*(https?://\S+)", re.IGNORECASE)
-_URL_ANY = re.compile(r"https?://\S+", re.IGNORECASE)
+from agents.query_context import JsonSpan, QueryContext, extract_url
 
 
-def normalize_http_post_args(question: str | None, args: dict[str, Any]) -> dict[str, Any]:
+def normalize_http_post_args(
+    question: str | None,
+    args: dict[str, Any],
+    context: QueryContext | None = None,
+) -> dict[str, Any]:
+    """Fill in ``url`` and ``payload`` for http_post from the args or the question text.
+
+    When ``context`` was built for ``question``, its already-extracted URL and
+    JSON spans are reused instead of scanning the question again.
+    """
     normalized: dict[str, Any] = dict(args or {})
     payload = normalized.get("payload")
     message = _extract_message(payload) or (question or "")
+    if context is not None and context.question != question:
+        context = None
 
     if not normalized.get("url"):
-        url = _extract_url(message) or _extract_url(question or "")
+        url = _url_of(message, context) or _url_of(question or "", context)
         if url:
             normalized["url"] = url
 
     payload_dict = payload if isinstance(payload, dict) else None
     if payload_dict is None or _payload_is_message_only(payload_dict):
-        extracted = _extract_payload(message) or _extract_payload(question or "")
+        extracted = _payload_of(message, context) or _payload_of(question or "", context)
         if extracted is not None:
             payload_dict = extracted
 
@@ -46,19 +55,22 @@ def _payload_is_message_only(payload: dict[str, Any]) -> bool:
     return set(payload.keys()) == {"message"}
 
 
-def _extract_url(text: str) -> str | None:
-    if not text:
-        return None
-    match = _URL_WITH_LABEL.search(text)
-    if match:
-        return match.group(1).rstrip(").,]")
-    match = _URL_ANY.search(text)
-    if not match:
-        return None
-    return match.group(0).rstrip(").,]")
+def _url_of(text: str, context: QueryContext | None) -> str | None:
+    if context is not None and text == context.question:
+        return context.url
+    return extract_url(text)
 
 
-def _extract_payload(text: str) -> dict[str, Any] | None:
+def _payload_of(text: str, context: QueryContext | None) -> dict[str, Any] | None:
+    if context is not None and text == context.question:
+        return _extract_payload(text, context.json_at)
+    return _extract_payload(text)
+
+
+def _extract_payload(
+    text: str,
+    json_at: Callable[[int], JsonSpan | None] | None = None,
+) -> dict[str, Any] | None:
     if not text:
         return None
     lowered = text.lower()
@@ -69,10 +81,14 @@ def _extract_payload(text: str) -> dict[str, Any] | None:
         brace_index = text.find("{", index)
         if brace_index == -1:
             continue
-        try:
-            parsed, _ = json.JSONDecoder().raw_decode(text[brace_index:])
-        except json.JSONDecodeError:
-            continue
+        if json_at is not None:
+            span = json_at(brace_index)
+            parsed = span.value if span is not None else None
+        else:
+            try:
+                parsed, _ = json.JSONDecoder().raw_decode(text[brace_index:])
+            except json.JSONDecodeError:
+                continue
         if isinstance(parsed, dict):
             return parsed
     return None
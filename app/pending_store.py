@@ -3,10 +3,14 @@ from __future__ import annotations
 import json
 import os
 import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any
 
+from agents.retrieval.executor import run_in_executor
+
 STATUS_PENDING = "PENDING"
 STATUS_RUNNING = "RUNNING"
 STATUS_COMPLETED = "COMPLETED"
@@ -35,35 +39,56 @@ class PendingActionRecord:
     error: str | None
 
 
+_db_executor_lock = threading.Lock()
+_db_executor: ThreadPoolExecutor | None = None
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """Dedicated pool for pending-action sqlite calls, sized by ``PENDING_DB_MAX_WORKERS``."""
+    global _db_executor
+    if _db_executor is None:
+        with _db_executor_lock:
+            if _db_executor is None:
+                workers = max(1, int(os.getenv("PENDING_DB_MAX_WORKERS", "4")))
+                _db_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+    return _db_executor
+
+
 class PendingActionStore:
     def __init__(self, db_path: str | None = None) -> None:
         self._db_path = db_path or os.getenv("PENDING_DB_PATH", "pending_actions.db")
         self._init_db()
 
     def save_pending(self, trace_id: str, pending_actions: list[dict[str, Any]]) -> None:
-        if not pending_actions:
-            return
+        self.save_pending_many([(trace_id, pending_actions)])
+
+    def save_pending_many(self, batch: list[tuple[str, list[dict[str, Any]]]]) -> None:
+        """Persist the pending actions of several traces in a single transaction."""
         created_at = _now_iso()
+        rows = [
+            (
+                str(action.get("action_id", "")),
+                trace_id,
+                STATUS_PENDING,
+                json.dumps(action),
+                created_at,
+            )
+            for trace_id, pending_actions in batch
+            for action in pending_actions
+            if action.get("action_id")
+        ]
+        if not rows:
+            return
         with self._connect() as conn:
-            for action in pending_actions:
-                action_id = str(action.get("action_id", ""))
-                if not action_id:
-                    continue
-                conn.execute(
-                    """
-                    INSERT OR IGNORE INTO pending_actions (
-                        id, trace_id, status, action_json, created_at
-                    )
-                    VALUES (?, ?, ?, ?, ?)
-                    """,
-                    (
-                        action_id,
-                        trace_id,
-                        STATUS_PENDING,
-                        json.dumps(action),
-                        created_at,
-                    ),
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO pending_actions (
+                    id, trace_id, status, action_json, created_at
                 )
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
 
     def get_entry(self, trace_id: str) -> PendingEntry | None:
         actions = self.list_actions(trace_id)
@@ -262,6 +287,47 @@ class PendingActionStore:
         with self._connect() as conn:
             conn.execute("DELETE FROM pending_actions WHERE trace_id = ?", (trace_id,))
 
+    # Async variants run the sync methods on the DB executor, so sqlite I/O
+    # never blocks the event loop or Starlette's shared threadpool.
+
+    async def asave_pending(self, trace_id: str, pending_actions: list[dict[str, Any]]) -> None:
+        await run_in_executor(get_db_executor(), self.save_pending, trace_id, pending_actions)
+
+    async def asave_pending_many(self, batch: list[tuple[str, list[dict[str, Any]]]]) -> None:
+        await run_in_executor(get_db_executor(), self.save_pending_many, batch)
+
+    async def aget_action(self, action_id: str) -> PendingActionRecord | None:
+        return await run_in_executor(get_db_executor(), self.get_action, action_id)
+
+    async def areject_action(
+        self, action_id: str, approved_by: str, approved_role: str | None
+    ) -> None:
+        await run_in_executor(
+            get_db_executor(), self.reject_action, action_id, approved_by, approved_role
+        )
+
+    async def astart_action(
+        self,
+        action_id: str,
+        approved_by: str,
+        approved_role: str | None,
+        allowed_statuses: list[str],
+    ) -> bool:
+        return await run_in_executor(
+            get_db_executor(),
+            self.start_action,
+            action_id,
+            approved_by,
+            approved_role,
+            allowed_statuses,
+        )
+
+    async def acomplete_action(self, action_id: str, result: dict[str, Any]) -> None:
+        await run_in_executor(get_db_executor(), self.complete_action, action_id, result)
+
+    async def afail_action(self, action_id: str, result: dict[str, Any], error: str) -> None:
+        await run_in_executor(get_db_executor(), self.fail_action, action_id, result, error)
+
     def _init_db(self) -> None:
         with self._connect() as conn:
             conn.execute(
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Final
+
+from agents.guardrails import get_guardrails
+from agents.routing import get_router
+from agents.text import normalize_text
+from app.retrieval import index_generation
+
+# Agents whose answers depend only on the question and the indexed docs. Workflow,
+# portfolio and content agents plan or record actions, and crypto analysis stores
+# a snapshot, so their responses are never replayed.
+CACHEABLE_AGENTS: Final[frozenset[str]] = frozenset({"doc_search", "direct_answer"})
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: dict[str, Any]
+    etag: str
+    chosen_agent: str
+    evidence_count: int
+    fingerprint: tuple[str, int, int]
+
+
+def response_etag(body: dict[str, Any]) -> str:
+    """Strong ETag over a response body that excludes ``trace_id``."""
+    raw = json.dumps(body, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def current_fingerprint(chosen_agent: str) -> tuple[str, int, int]:
+    """Index generation plus the guardrail and routing config versions.
+
+    Only ``doc_search`` answers depend on the index, so other agents' entries
+    carry an empty generation and survive a rebuild. The generation is the one
+    the retriever refresher last recorded; checking the docs here would put a
+    directory walk on the event loop for every lookup.
+    """
+    generation = (index_generation() or "") if chosen_agent == "doc_search" else ""
+    return generation, get_guardrails().version, get_router().version
+
+
+class ResponseCache:
+    """LRU of serialized ``AskResponse`` bodies for read-only agents.
+
+    Keys are ``(normalized question, actor role, build marker)``. Each entry
+    also records the index generation and guardrail/routing config versions it
+    was computed under, and is dropped on lookup once any of them change. The
+    version numbers are only bumped by hand, so callers also pass a ``reusable``
+    check that re-runs the current guardrail and routing on every hit.
+    """
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple[str, str, str], CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._stale = 0
+
+    @staticmethod
+    def key(question: str, role: str, build: str) -> tuple[str, str, str]:
+        return " ".join(normalize_text(question).split()), role, build
+
+    def get(
+        self,
+        key: tuple[str, str, str],
+        reusable: Callable[[CachedResponse], bool] | None = None,
+    ) -> CachedResponse | None:
+        """The entry for ``key``; one failing ``reusable`` is dropped as stale."""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and (
+            entry.fingerprint != current_fingerprint(entry.chosen_agent)
+            or (reusable is not None and not reusable(entry))
+        ):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+                self._stale += 1
+            entry = None
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return entry
+
+    def put(
+        self,
+        key: tuple[str, str, str],
+        body: dict[str, Any],
+        chosen_agent: str,
+        evidence_count: int,
+    ) -> CachedResponse | None:
+        """Store ``body`` (without ``trace_id``) unless ``chosen_agent`` has side effects."""
+        if chosen_agent not in CACHEABLE_AGENTS:
+            with self._lock:
+                self._bypassed += 1
+            return None
+        body = {name: value for name, value in body.items() if name != "trace_id"}
+        entry = CachedResponse(
+            body=body,
+            etag=response_etag(body),
+            chosen_agent=chosen_agent,
+            evidence_count=evidence_count,
+            fingerprint=current_fingerprint(chosen_agent),
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self._max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "bypassed": self._bypassed,
+                "stale": self._stale,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache_lock = threading.Lock()
+_cache: ResponseCache | None = None
+
+
+def get_response_cache() -> ResponseCache | None:
+    """Process-wide cache, or None when ``RESPONSE_CACHE_ENABLED`` is false."""
+    global _cache
+    if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024")))
+    return _cache
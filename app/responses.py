@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:  # optional: only speeds up plain-dict bodies
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None  # type: ignore[assignment]
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response that skips FastAPI's response_model pass.
+
+    Pydantic models are serialized straight to bytes by pydantic-core; dicts
+    (such as cached response bodies) go through orjson when it is installed
+    and ``json.dumps`` otherwise. Returning one from an endpoint bypasses
+    response_model validation, so only use it for models built from trusted
+    data.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        if orjson is not None:
+            return orjson.dumps(content)
+        return super().render(content)
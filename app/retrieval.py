@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+
+import anyio
+
+from agents.retrieval import TfidfRetriever
+
+_lock = threading.Lock()
+_retriever: TfidfRetriever | None = None
+_generation: str | None = None
+_checked_at = 0.0
+
+
+def get_retriever() -> TfidfRetriever:
+    """Process-wide retriever, swapped for a fresh one when the docs change.
+
+    Staleness is checked at most every ``INDEX_REFRESH_SECONDS``; a rebuilt index
+    gets a new generation, and everything derived from it (such as the suggest
+    prefix index) is rebuilt with it.
+    """
+    global _checked_at
+    interval = float(os.getenv("INDEX_REFRESH_SECONDS", "30"))
+    now = time.monotonic()
+    current = _retriever
+    if current is not None and now - _checked_at < interval:
+        return current
+    with _lock:
+        if _retriever is None or _retriever.is_stale():
+            _build()
+        _checked_at = now
+        return _retriever  # type: ignore[return-value]
+
+
+def index_generation() -> str | None:
+    """Generation of the current retriever, or None before the first build.
+
+    This only reads what ``get_retriever`` or the refresher last saw; it never
+    stats the docs or builds an index, so it is safe on the event loop.
+    """
+    return _generation
+
+
+def refresh_retriever() -> None:
+    """Rebuild the retriever now if its docs changed; a cold process stays cold."""
+    global _checked_at
+    with _lock:
+        if _retriever is None:
+            return
+        if _retriever.is_stale():
+            _build()
+        _checked_at = time.monotonic()
+
+
+async def keep_retriever_fresh() -> None:
+    """Re-check the docs every ``INDEX_REFRESH_SECONDS`` from a worker thread.
+
+    Cache hits never touch the retriever, so without this a process serving
+    only cached answers would not notice changed docs.
+    """
+    while True:
+        await anyio.sleep(float(os.getenv("INDEX_REFRESH_SECONDS", "30")))
+        await anyio.to_thread.run_sync(refresh_retriever)
+
+
+def _build() -> None:
+    global _retriever, _generation
+    _retriever = TfidfRetriever(
+        cache_dir=os.getenv("INDEX_CACHE_DIR", ".cache"),
+        analyzer=os.getenv("RETRIEVAL_ANALYZER", "word"),
+    )
+    _generation = _retriever.generation
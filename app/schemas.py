@@ -1,9 +1,11 @@
 from __future__ import annotations
 
-from typing import Literal
+from typing import Any, Literal
 
 from pydantic import BaseModel, Field
 
+from app.config import ASK_BATCH_MAX_ITEMS
+
 ActorRole = Literal["viewer", "operator", "admin"]
 
 
@@ -69,12 +71,76 @@ class AskResponse(BaseModel):
     evidence: list[str] = Field(..., description="Evidence snippets supporting the answer.")
     trace_id: str = Field(..., description="Trace identifier for observability.")
     citations: list[str] = Field(..., description="External citations, if any.")
-    guardrail: dict[str, str | bool] = Field(..., description="Guardrail evaluation result.")
+    guardrail: dict[str, Any] = Field(..., description="Guardrail evaluation result.")
     workflow: Workflow = Field(..., description="Workflow execution details.")
     usage: Usage | None = Field(default=None, description="Token usage when available.")
     model: str | None = Field(default=None, description="Model identifier when available.")
     human_review: HumanReview | None = Field(default=None, description="Human review hints.")
     build: str | None = Field(default=None, description="Build marker for debugging.")
+    degraded: bool = Field(
+        default=False,
+        description="True when the time budget forced a partial answer.",
+    )
+
+
+class AskBatchRequest(BaseModel):
+    items: list[AskRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=ASK_BATCH_MAX_ITEMS,
+        description="Questions to answer in one call.",
+    )
+
+
+class AskBatchResponse(BaseModel):
+    items: list[AskResponse] = Field(..., description="One response per item, in request order.")
+
+
+class Suggestion(BaseModel):
+    term: str
+    df: int = Field(..., description="Number of indexed chunks containing the term.")
+
+
+class SuggestResponse(BaseModel):
+    prefix: str
+    generation: str = Field(..., description="Index generation the suggestions came from.")
+    suggestions: list[Suggestion]
+
+
+class RouteExplainResponse(BaseModel):
+    route: str
+    intent: str | None = Field(
+        None, description="Rule that fired; null when the default route was used."
+    )
+    priority: int | None = None
+    clause: list[str] = Field(
+        default_factory=list, description="Features the firing clause required."
+    )
+    language: str | None = None
+    keywords: list[str] = Field(default_factory=list)
+    config_version: int
+    source: str = Field("rules", description="rules, default or classifier.")
+    confidence: float | None = None
+
+
+class IndexStats(BaseModel):
+    generation: str
+    analyzer: str
+    chunk_count: int
+    document_count: int
+    vocabulary_size: int
+    ngram_count: int
+    memory_bytes: dict[str, int] = Field(..., description="Approximate bytes per structure.")
+    build_ms: float = Field(..., description="Time spent building or loading the index.")
+    loaded_from_cache: bool
+
+
+class ReadyResponse(BaseModel):
+    ready: bool
+    status: str = Field(..., description="pending, running, done, skipped or failed.")
+    index_generation: str | None = None
+    timings_ms: dict[str, float] = Field(default_factory=dict)
+    error: str | None = None
 
 
 class ApproveRequest(BaseModel):
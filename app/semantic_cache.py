@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Final
+
+from agents.text import normalize_text
+from app.response_cache import CachedResponse, current_fingerprint
+
+_TOKEN_RE: Final[re.Pattern[str]] = re.compile(r"[0-9a-z가-힣]+")
+# Function words that reword a question without changing what it asks.
+_STOPWORDS: Final[frozenset[str]] = frozenset(
+    {
+        "a", "an", "and", "are", "can", "do", "does", "for", "how", "i", "in", "is", "me",
+        "my", "of", "on", "please", "the", "to", "what", "which", "with",
+    }
+)  # fmt: skip
+# Rough per-entry bookkeeping (key, token set, dataclass) on top of the body.
+_ENTRY_OVERHEAD_BYTES: Final[int] = 512
+
+# (actor role, build) and the question's content tokens.
+_Key = tuple[tuple[str, str], frozenset[str]]
+
+
+def content_tokens(text: str) -> frozenset[str]:
+    """The distinct non-stopword tokens of ``text``, after normalization."""
+    return frozenset(t for t in _TOKEN_RE.findall(normalize_text(text)) if t not in _STOPWORDS)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    response: CachedResponse
+    size: int
+
+
+class SemanticCache:
+    """Answer cache for rewordings of a question, keyed by its content tokens.
+
+    Two questions share an entry only when their sets of non-stopword tokens
+    are equal: order, repeats, case and filler words may differ, but every key
+    term must match, so "postgres backup steps" never serves "mysql backup
+    steps". Entries are evicted least-recently-used once the approximate size
+    of the stored bodies exceeds ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int = 8 << 20) -> None:
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[_Key, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+
+    def get(self, question: str, role: str, build: str) -> CachedResponse | None:
+        """The cached response for a question with the same content tokens, if any."""
+        tokens = content_tokens(question)
+        if not tokens:
+            return None
+        key = ((role, build), tokens)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry.response.fingerprint != current_fingerprint(
+            entry.response.chosen_agent
+        ):
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    self._remove(key)
+            entry = None
+        with self._lock:
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        return entry.response
+
+    def put(self, question: str, role: str, build: str, response: CachedResponse) -> None:
+        tokens = content_tokens(question)
+        if not tokens:
+            return
+        size = len(json.dumps(response.body, ensure_ascii=False)) + _ENTRY_OVERHEAD_BYTES
+        if size > self._max_bytes:
+            return
+        key = ((role, build), tokens)
+        with self._lock:
+            # A rewording already stored under the same tokens is replaced, not duplicated.
+            self._remove(key)
+            self._entries[key] = _Entry(response, size)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evicted += 1
+
+    def _remove(self, key: _Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self._max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evicted": self._evicted,
+                "hit_ratio": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_cache_lock = threading.Lock()
+_cache: SemanticCache | None = None
+
+
+def get_semantic_cache() -> SemanticCache | None:
+    """Process-wide cache, or None when ``SEMANTIC_CACHE_ENABLED`` is false."""
+    global _cache
+    if os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SemanticCache(
+                    max_bytes=int(os.getenv("SEMANTIC_CACHE_MAX_BYTES", str(8 << 20)))
+                )
+    return _cache
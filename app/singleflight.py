@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Generic, Hashable, TypeVar
+
+import anyio
+
+T = TypeVar("T")
+
+
+@dataclass
+class _Call(Generic[T]):
+    done: Any
+    result: T | None = None
+    error: BaseException | None = None
+
+
+@dataclass
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result (or exception). Nothing is
+    kept once the call finishes, so this deduplicates, it does not cache.
+    Threaded (``do``) and async (``ado``) callers are tracked separately,
+    because a thread cannot await an event loop's event and vice versa.
+    """
+
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _calls: dict[Hashable, _Call[Any]] = field(default_factory=dict)
+    _acalls: dict[Hashable, _Call[Any]] = field(default_factory=dict)
+    _executed: int = 0
+    _coalesced: int = 0
+
+    def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], T],
+        timeout: float | None = None,
+        on_timeout: Callable[[], T] | None = None,
+    ) -> tuple[T, bool]:
+        """``(result, coalesced)``, where ``coalesced`` means another caller ran ``fn``.
+
+        ``timeout`` and ``on_timeout`` bound a follower's wait as in ``ado``.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call(done=threading.Event())
+                self._executed += 1
+            else:
+                self._coalesced += 1
+        assert call is not None
+        if not leader:
+            if not call.done.wait(timeout):
+                if on_timeout is None:
+                    raise TimeoutError(f"single-flight call for {key!r} is still running")
+                return on_timeout(), False
+            if call.error is not None:
+                raise call.error
+            return call.result, True  # type: ignore[return-value]
+        try:
+            call.result = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    async def ado(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+        on_timeout: Callable[[], T] | None = None,
+    ) -> tuple[T, bool]:
+        """Async ``do``; a follower whose leader was cancelled runs ``fn`` itself.
+
+        A follower waits at most ``timeout`` seconds for the leader, then returns
+        ``on_timeout()`` (uncoalesced) instead, so a slow leader cannot hold it
+        past its own deadline. ``timeout`` only bounds followers; the leader's
+        ``fn`` is expected to respect its own.
+        """
+        with self._lock:
+            call = self._acalls.get(key)
+            leader = call is None
+            if leader:
+                call = self._acalls[key] = _Call(done=anyio.Event())
+                self._executed += 1
+            else:
+                self._coalesced += 1
+        assert call is not None
+        if not leader:
+            with anyio.move_on_after(timeout):
+                await call.done.wait()
+            if not call.done.is_set():
+                if on_timeout is None:
+                    raise TimeoutError(f"single-flight call for {key!r} is still running")
+                return on_timeout(), False
+            if call.error is None:
+                return call.result, True  # type: ignore[return-value]
+            if isinstance(call.error, Exception):
+                raise call.error
+            return await fn(), False
+        try:
+            call.result = await fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._acalls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            total = self._executed + self._coalesced
+            return {
+                "in_flight": len(self._calls) + len(self._acalls),
+                "executed": self._executed,
+                "coalesced": self._coalesced,
+                "coalesced_ratio": round(self._coalesced / total, 4) if total else 0.0,
+            }
+
+
+_instance_lock = threading.Lock()
+_instance: SingleFlight | None = None
+
+
+def get_singleflight() -> SingleFlight | None:
+    """Process-wide coalescer, or None when ``ASK_COALESCING_ENABLED`` is false."""
+    global _instance
+    if os.getenv("ASK_COALESCING_ENABLED", "true").lower() != "true":
+        return None
+    if _instance is None:
+        with _instance_lock:
+            if _instance is None:
+                _instance = SingleFlight()
+    return _instance
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Final
+
+import anyio
+
+from agents.guardrails import evaluate_question, get_guardrail_model, get_guardrails
+from agents.orchestrator import get_orchestrator
+from agents.routing import get_route_classifier, get_router
+from app.ask_logic import abuild_ask_outcome
+from app.pending_store import PendingActionStore
+from app.retrieval import get_retriever
+
+logger = logging.getLogger("app")
+
+# Read-only questions that exercise the guardrails, routing, doc search (index,
+# search executor, reranker) and direct answers without planning any action.
+DEFAULT_WARMUP_QUERIES: Final[tuple[str, ...]] = (
+    "Day-1 /ask endpoint?",
+    "runbook database backup verification steps?",
+    "What does this service do?",
+)
+
+
+def warmup_queries() -> list[str]:
+    """``WARMUP_QUERIES`` split on ``|``, or the defaults when unset."""
+    raw = os.getenv("WARMUP_QUERIES")
+    if raw is None:
+        return list(DEFAULT_WARMUP_QUERIES)
+    return [query.strip() for query in raw.split("|") if query.strip()]
+
+
+class WarmupState:
+    """Readiness of this process, filled in step by step by ``run_warmup``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._status = "pending"
+        self._timings_ms: dict[str, float] = {}
+        self._error: str | None = None
+
+    def reset(self) -> None:
+        with self._lock:
+            self._status = "pending"
+            self._timings_ms = {}
+            self._error = None
+
+    def start(self) -> None:
+        with self._lock:
+            self._status = "running"
+
+    def record(self, step: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._timings_ms[step] = round(elapsed_ms, 2)
+
+    def finish(self, status: str, error: str | None = None) -> None:
+        with self._lock:
+            self._status = status
+            self._error = error
+
+    @property
+    def ready(self) -> bool:
+        return self._status in {"done", "skipped"}
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "status": self._status,
+                "timings_ms": dict(self._timings_ms),
+                "error": self._error,
+            }
+
+
+warmup_state = WarmupState()
+
+
+def _prepare_routing() -> None:
+    get_router()
+    get_route_classifier()
+    get_orchestrator().route_explain("warmup")
+
+
+def _prepare_guardrails() -> None:
+    get_guardrails()
+    get_guardrail_model()
+    evaluate_question("warmup")
+
+
+# Steps that only build in-memory structures: no threads, executors or DB
+# connections, so they are safe to run in a master process before it forks.
+PRELOAD_STEPS: Final[tuple[tuple[str, Callable[[], object]], ...]] = (
+    ("retriever", get_retriever),
+    ("routing", _prepare_routing),
+    ("guardrails", _prepare_guardrails),
+)
+
+
+def preload(state: WarmupState = warmup_state) -> None:
+    """Run ``PRELOAD_STEPS`` inline, recording their timings on ``state``."""
+    for step, fn in PRELOAD_STEPS:
+        start = time.perf_counter()
+        fn()
+        state.record(step, (time.perf_counter() - start) * 1000)
+
+
+async def run_warmup(
+    store: PendingActionStore,
+    queries: list[str] | None = None,
+    state: WarmupState = warmup_state,
+) -> None:
+    """Load and exercise everything the first real request would otherwise pay for.
+
+    Steps run in order (retriever, routing, guardrails, pending DB, synthetic
+    queries), each off the event loop, and their timings are recorded on
+    ``state``. A failing step marks the process ``failed`` rather than raising,
+    so ``/ready`` keeps reporting it instead of the app refusing to start.
+    """
+    state.start()
+    total_start = time.perf_counter()
+    try:
+        for step, fn in PRELOAD_STEPS:
+            start = time.perf_counter()
+            await anyio.to_thread.run_sync(fn)
+            state.record(step, (time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        # Opens a connection on a DB executor thread, as /approve will.
+        await store.aget_action("warmup")
+        state.record("pending_db", (time.perf_counter() - start) * 1000)
+        start = time.perf_counter()
+        for i, question in enumerate(queries if queries is not None else warmup_queries()):
+            await abuild_ask_outcome(question, f"warmup-{i}")
+        state.record("queries", (time.perf_counter() - start) * 1000)
+    except Exception as exc:
+        state.finish("failed", error=f"{type(exc).__name__}: {exc}")
+    else:
+        state.finish("done")
+    state.record("total", (time.perf_counter() - total_start) * 1000)
+    logger.info(json.dumps({"event": "warmup", **state.snapshot()}, ensure_ascii=False))
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import anyio
+import anyio.to_thread
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from tools import registry  # noqa: E402
+
+# Mirrors the webhook step of /approve: the sync path holds a worker thread for
+# the whole POST, the async path only awaits it. The webhook is simulated with
+# httpx.MockTransport so no network is needed.
+WEBHOOK_ARGS = {"url": "https://example.com/hook", "payload": {"ping": "pong"}}
+
+
+def _fake_getaddrinfo(host: str, port: int, type: int | None = None):
+    return [(None, None, None, None, ("93.184.216.34", port))]
+
+
+def _install_transports(delay_s: float) -> None:
+    def sync_handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(delay_s)
+        return httpx.Response(200, json={"ok": True})
+
+    async def async_handler(request: httpx.Request) -> httpx.Response:
+        await anyio.sleep(delay_s)
+        return httpx.Response(200, json={"ok": True})
+
+    sync_client, async_client = httpx.Client, httpx.AsyncClient
+
+    def make_sync(*args, **kwargs) -> httpx.Client:
+        return sync_client(*args, transport=httpx.MockTransport(sync_handler), **kwargs)
+
+    def make_async(*args, **kwargs) -> httpx.AsyncClient:
+        return async_client(*args, transport=httpx.MockTransport(async_handler), **kwargs)
+
+    httpx.Client = make_sync  # type: ignore[misc]
+    httpx.AsyncClient = make_async  # type: ignore[misc]
+    registry.socket.getaddrinfo = _fake_getaddrinfo  # type: ignore[assignment]
+
+
+async def _run(mode: str, webhooks: int, probes: int, threads: int) -> tuple[float, list[float]]:
+    # One limiter stands in for Starlette's threadpool, shared by every sync handler.
+    limiter = anyio.CapacityLimiter(threads)
+    probe_ms: list[float] = []
+
+    async def webhook() -> None:
+        if mode == "sync":
+            await anyio.to_thread.run_sync(
+                registry.run_tool, "http_post", WEBHOOK_ARGS, limiter=limiter
+            )
+        else:
+            await registry.arun_tool("http_post", WEBHOOK_ARGS)
+
+    async def probe() -> None:
+        # A cheap request (e.g. a sqlite read) that needs a worker thread.
+        start = time.perf_counter()
+        await anyio.to_thread.run_sync(time.sleep, 0.001, limiter=limiter)
+        probe_ms.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    async with anyio.create_task_group() as tg:
+        for _ in range(webhooks):
+            tg.start_soon(webhook)
+        await anyio.sleep(0.01)
+        for _ in range(probes):
+            tg.start_soon(probe)
+    return time.perf_counter() - start, probe_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare sync and async webhook execution.")
+    parser.add_argument("--webhooks", type=int, default=40)
+    parser.add_argument("--probes", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--delay-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    _install_transports(args.delay_ms / 1000.0)
+    print("Approve concurrency benchmark")
+    print(
+        f"Webhooks: {args.webhooks} x {args.delay_ms:.0f} ms, "
+        f"worker threads: {args.threads}, probes: {args.probes}"
+    )
+    for mode in ("sync", "async"):
+        elapsed, probe_ms = anyio.run(_run, mode, args.webhooks, args.probes, args.threads)
+        print(
+            f"{mode:>5}: wall {elapsed * 1000:8.1f} ms | probe latency "
+            f"p50 {statistics.median(probe_ms):7.1f} ms, max {max(probe_ms):7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
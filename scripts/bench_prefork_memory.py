@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+MODES: dict[str, list[str]] = {
+    "import per worker": ["--no-preload"],
+    "preload": ["--no-freeze"],
+    "preload + gc.freeze": [],
+}
+QUESTIONS = (
+    "Day-1 /ask endpoint?",
+    "runbook database backup verification steps?",
+    "What does this service do?",
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def smaps_rollup(pid: int) -> dict[str, int]:
+    """kB counters from /proc/<pid>/smaps_rollup (Linux only)."""
+    values: dict[str, int] = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, _, rest = line.partition(":")
+        values[key] = int(rest.split()[0])
+    return values
+
+
+def measure(mode_args: list[str], workers: int, requests: int) -> list[dict[str, int]]:
+    port = _free_port()
+    proc = subprocess.Popen(
+        [
+            sys.executable,
+            "scripts/serve_prefork.py",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            *mode_args,
+        ],
+        cwd=PROJECT_ROOT,
+        # Every /ask should reach retrieval rather than the response cache.
+        env={**os.environ, "RESPONSE_CACHE_ENABLED": "false"},
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+    )
+    try:
+        pids: list[int] = []
+        assert proc.stdout is not None
+        for line in proc.stdout:
+            event = json.loads(line)
+            if event["event"] == "workers_started":
+                pids = event["pids"]
+                break
+        base_url = f"http://127.0.0.1:{port}"
+        with httpx.Client(base_url=base_url, timeout=10) as client:
+            deadline = time.monotonic() + 30
+            ready = 0
+            # Each probe lands on some worker; a run of 200s means all have warmed up.
+            while ready < 4 * workers and time.monotonic() < deadline:
+                try:
+                    ready = ready + 1 if client.get("/ready").status_code == 200 else 0
+                except httpx.TransportError:
+                    ready = 0
+                time.sleep(0.02)
+            for i in range(requests):
+                question = QUESTIONS[i % len(QUESTIONS)]
+                client.post("/ask", json={"question": question}).raise_for_status()
+        return [smaps_rollup(pid) for pid in pids]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=15)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-worker unique vs shared memory of the prefork launcher."
+    )
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"Prefork memory: {args.workers} workers, {args.requests} /ask requests")
+    print(f"{'mode':<20} {'rss':>9} {'pss':>9} {'shared':>9} {'unique':>9}  (kB, mean per worker)")
+    for label, mode_args in MODES.items():
+        samples = measure(mode_args, args.workers, args.requests)
+
+        def mean(*keys: str) -> float:
+            return sum(sum(s.get(k, 0) for k in keys) for s in samples) / len(samples)
+
+        print(
+            f"{label:<20} {mean('Rss'):9.0f} {mean('Pss'):9.0f} "
+            f"{mean('Shared_Clean', 'Shared_Dirty'):9.0f} "
+            f"{mean('Private_Clean', 'Private_Dirty'):9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Coroutine
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from fastapi.responses import JSONResponse, Response  # noqa: E402
+from fastapi.routing import APIRoute, serialize_response  # noqa: E402
+
+from agents.guardrails import evaluate_question  # noqa: E402
+from agents.orchestrator import get_orchestrator  # noqa: E402
+from agents.query_context import QueryContext  # noqa: E402
+from app.ask_logic import _agent_outcome  # noqa: E402
+from app.main import app  # noqa: E402
+from app.responses import FastJSONResponse, orjson  # noqa: E402
+from app.schemas import AskResponse, HumanReview, Usage, Workflow  # noqa: E402
+
+QUESTIONS = {
+    "doc_search": "runbook database backup verification steps?",
+    "workflow": "create ticket and generate runbook for payments prod outage, notify ops",
+}
+
+
+def _per_call_us(fn: Callable[[], Any], iterations: int) -> float:
+    for _ in range(min(iterations, 200)):
+        fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def _run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    # serialize_response never awaits for async endpoints, so no event loop is needed.
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    raise RuntimeError("serialize_response awaited unexpectedly")
+
+
+def _fields(response: AskResponse) -> dict[str, Any]:
+    fields = {name: getattr(response, name) for name in AskResponse.model_fields}
+    fields["human_review"] = fields["human_review"].model_dump()
+    fields["usage"] = fields["usage"].model_dump() if fields["usage"] else None
+    return fields
+
+
+def _build_validated(fields: dict[str, Any], workflow: dict[str, Any]) -> AskResponse:
+    return AskResponse(
+        **{
+            **fields,
+            "human_review": HumanReview(**fields["human_review"]),
+            "usage": Usage(**fields["usage"]) if fields["usage"] else None,
+            "workflow": Workflow(**workflow),
+        }
+    )
+
+
+def _build_constructed(fields: dict[str, Any], workflow: dict[str, Any]) -> AskResponse:
+    # model_construct runs in Python; kept here to show it loses to pydantic-core validation.
+    return AskResponse.model_construct(
+        **{
+            **fields,
+            "human_review": HumanReview.model_construct(**fields["human_review"]),
+            "usage": Usage.model_construct(**fields["usage"]) if fields["usage"] else None,
+            "workflow": Workflow.model_validate(workflow),
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Per-request AskResponse build + serialize cost.")
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    field = next(
+        r for r in app.routes if isinstance(r, APIRoute) and r.path == "/ask"
+    ).response_field
+    print(
+        f"AskResponse build + serialize, {args.iterations} iterations (orjson={orjson is not None})"
+    )
+    for label, question in QUESTIONS.items():
+        context = QueryContext.build(question)
+        chosen, result = get_orchestrator().route_with_choice(
+            question, trace_id="b", context=context
+        )
+        guardrail = evaluate_question(question, context=context)
+        response = _agent_outcome(context, "b", guardrail, chosen, result).response
+
+        def json_response_default() -> None:
+            # FastAPI's own path when an endpoint returns a model under response_model.
+            JSONResponse(_run_sync(serialize_response(field=field, response_content=response)))
+
+        def json_response_dump_json() -> None:
+            # Newer FastAPI releases serialize straight to bytes after validating.
+            body = _run_sync(
+                serialize_response(field=field, response_content=response, dump_json=True)
+            )
+            Response(body, media_type="application/json")
+
+        fields = _fields(response)
+        workflow = result.workflow or response.workflow.model_dump()
+        assert (
+            _build_validated(fields, workflow).model_dump_json()
+            == _build_constructed(fields, workflow).model_dump_json()
+        )
+
+        timings = {
+            "build validated": lambda: _build_validated(fields, workflow),
+            "build model_construct": lambda: _build_constructed(fields, workflow),
+            "response_model + JSONResponse": json_response_default,
+            "response_model + dump_json": json_response_dump_json,
+            "FastJSONResponse(model)": lambda: FastJSONResponse(response),
+        }
+        body_bytes = len(FastJSONResponse(response).body)
+        print(f"{label}: {chosen}, {body_bytes} bytes")
+        for name, fn in timings.items():
+            print(f"  {name:<31} {_per_call_us(fn, args.iterations):8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+# Runs in a fresh interpreter: import the app, then serve one doc_search question.
+_FIRST_REQUEST = """
+import json, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+import anyio, httpx
+
+async def ask():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        asked = time.perf_counter()
+        response = await client.post("/ask", json={"question": "Day-1 /ask endpoint?"})
+        response.raise_for_status()
+    return asked
+
+asked = anyio.run(ask)
+done = time.perf_counter()
+print(json.dumps({"import_ms": (imported - start) * 1e3, "first_ask_ms": (done - asked) * 1e3}))
+"""
+
+
+def import_profile(top: int) -> tuple[float, list[tuple[str, float]]]:
+    """Total ``import app.main`` time and the slowest top-level packages, from -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    by_package: dict[str, float] = {}
+    total_us = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if name == "app.main":
+            total_us = float(cumulative_us)
+        elif depth == 0:
+            # Output is post-order: anything before the last other root is not under app.main.
+            by_package.clear()
+        elif depth == 1:
+            # Direct imports of app.main, grouped by top-level package.
+            package = name.split(".")[0]
+            by_package[package] = by_package.get(package, 0.0) + float(cumulative_us)
+    slowest = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    return total_us / 1000, [(name, us / 1000) for name, us in slowest]
+
+
+def first_request(cache_dir: str) -> dict[str, float]:
+    env = {**os.environ, "INDEX_CACHE_DIR": cache_dir}
+    proc = subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Measure cold-start import and first-request time."
+    )
+    parser.add_argument("--top", type=int, default=8)
+    parser.add_argument("--cache-dir", default=os.getenv("INDEX_CACHE_DIR", ".cache"))
+    args = parser.parse_args()
+
+    total_ms, slowest = import_profile(args.top)
+    print("Startup benchmark")
+    print(f"import app.main: {total_ms:.1f} ms")
+    for name, ms in slowest:
+        print(f"  {name:<24} {ms:8.1f} ms")
+
+    with tempfile.TemporaryDirectory() as empty_cache:
+        cases = {"prebuilt index": args.cache_dir, "no index artifact": empty_cache}
+        for label, cache_dir in cases.items():
+            timings = first_request(cache_dir)
+            print(
+                f"{label:<18} import {timings['import_ms']:7.1f} ms | "
+                f"first /ask {timings['first_ask_ms']:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from agents.retrieval import TfidfRetriever  # noqa: E402
+from agents.retrieval.tfidf import ANALYZERS  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Prebuild the retrieval index so a fresh process only has to load it."
+    )
+    parser.add_argument("--root", default="docs")
+    parser.add_argument("--cache-dir", default=os.getenv("INDEX_CACHE_DIR", ".cache"))
+    parser.add_argument(
+        "--analyzer",
+        action="append",
+        choices=sorted(ANALYZERS),
+        default=None,
+        help="Analyzer to build (repeatable). Defaults to RETRIEVAL_ANALYZER or word.",
+    )
+    parser.add_argument(
+        "--build-marker",
+        default=None,
+        help="Also write this build identifier to BUILD_MARKER_FILE (default build_marker.txt).",
+    )
+    args = parser.parse_args()
+
+    analyzers = args.analyzer or [os.getenv("RETRIEVAL_ANALYZER", "word")]
+    print("Index build")
+    for analyzer in analyzers:
+        retriever = TfidfRetriever(root=args.root, cache_dir=args.cache_dir, analyzer=analyzer)
+        stats = retriever.index_stats()
+        source = "cache (already current)" if stats["loaded_from_cache"] else "built"
+        print(
+            f"{analyzer}: {stats['chunk_count']} chunks, {stats['vocabulary_size']} terms, "
+            f"{stats['build_ms']:.1f} ms, {source}, generation {retriever.generation}"
+        )
+
+    if args.build_marker:
+        marker_path = Path(os.getenv("BUILD_MARKER_FILE", "build_marker.txt"))
+        marker_path.write_text(args.build_marker.strip() + "\n", encoding="utf-8")
+        print(f"Build marker: {args.build_marker.strip()} -> {marker_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import signal
+import socket
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _serve(app: object, sock: socket.socket, log_level: str) -> None:
+    import uvicorn
+
+    config = uvicorn.Config(app, log_level=log_level, lifespan="on")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Load the app and index once, freeze them out of the GC, then fork workers that "
+            "share those pages copy-on-write."
+        )
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "2")))
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument(
+        "--no-preload",
+        action="store_true",
+        help="Import the app in each worker after fork instead (for comparison).",
+    )
+    parser.add_argument(
+        "--no-freeze", action="store_true", help="Preload but skip gc.freeze() (for comparison)."
+    )
+    args = parser.parse_args()
+
+    # Collections in the master would only touch (and so un-share) object headers.
+    gc.disable()
+    app = None
+    if not args.no_preload:
+        from app.main import app
+        from app.warmup import preload, warmup_state
+
+        preload()
+        print(json.dumps({"event": "preload", **warmup_state.snapshot()}), flush=True)
+        gc.collect()
+        if not args.no_freeze:
+            # Move everything allocated so far to the permanent generation: later
+            # collections in the workers never scan (and so never write to) it.
+            gc.freeze()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers: list[int] = []
+    for _ in range(args.workers):
+        pid = os.fork()
+        if pid == 0:
+            gc.enable()
+            if app is None:
+                from app.main import app
+            _serve(app, sock, args.log_level)
+            os._exit(0)
+        workers.append(pid)
+    print(json.dumps({"event": "workers_started", "pids": workers}), flush=True)
+
+    def forward(signum: int, _frame: object) -> None:
+        for pid in workers:
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for pid in workers:
+        os.waitpid(pid, 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from agents.classifier import train_classifier  # noqa: E402
+
+DATASET_PATH = Path("evals/guardrail_labels.json")
+MODEL_PATH = Path("config/guardrail_model.json")
+
+
+def load_examples(path: Path) -> list[tuple[str, str]]:
+    return [(case["text"], case["label"]) for case in json.loads(path.read_text(encoding="utf-8"))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the second-stage guardrail classifier.")
+    parser.add_argument("--dataset", default=str(DATASET_PATH))
+    parser.add_argument("--output", default=str(MODEL_PATH))
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=60)
+    args = parser.parse_args()
+
+    examples = load_examples(Path(args.dataset))
+    model = train_classifier(examples, dim=args.dim, epochs=args.epochs, analyzer="char")
+    model.save(args.output)
+
+    correct = sum(model.predict(text)[0] == label for text, label in examples)
+    start = time.perf_counter()
+    for text, _ in examples:
+        model.predict(text)
+    per_question_us = (time.perf_counter() - start) * 1e6 / max(1, len(examples))
+    print("Guardrail classifier")
+    print(f"Examples: {len(examples)}")
+    print(f"Labels: {', '.join(model.labels)}")
+    print(f"Training accuracy: {correct / max(1, len(examples)):.3f}")
+    print(f"Inference: {per_question_us:.1f} us/question")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from agents.classifier import train_classifier  # noqa: E402
+
+DATASET_PATH = Path("evals/golden_routing.json")
+MODEL_PATH = Path("config/router_model.json")
+# Golden cases name agents; the classifier predicts route keys.
+ROUTE_NAME_MAP = {
+    "DocSearchAgent": "doc_search",
+    "DirectAnswerAgent": "direct_answer",
+    "portfolio_manager": "portfolio_workflow",
+}
+# Guardrail cases never reach the router.
+SKIPPED_LABELS = {"guardrail"}
+
+
+def load_examples(paths: list[Path]) -> list[tuple[str, str]]:
+    examples: list[tuple[str, str]] = []
+    for path in paths:
+        for case in json.loads(path.read_text(encoding="utf-8")):
+            label = ROUTE_NAME_MAP.get(case["expected_agent"], case["expected_agent"])
+            if label not in SKIPPED_LABELS:
+                examples.append((case["query"], label))
+    return examples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Train the hashed n-gram routing classifier.")
+    parser.add_argument("--dataset", action="append", default=None)
+    parser.add_argument("--output", default=str(MODEL_PATH))
+    parser.add_argument("--dim", type=int, default=4096)
+    parser.add_argument("--epochs", type=int, default=60)
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in (args.dataset or [str(DATASET_PATH)])]
+    examples = load_examples(paths)
+    model = train_classifier(examples, dim=args.dim, epochs=args.epochs)
+    model.save(args.output)
+
+    correct = sum(model.predict(text)[0] == label for text, label in examples)
+    start = time.perf_counter()
+    for text, _ in examples:
+        model.predict(text)
+    per_question_us = (time.perf_counter() - start) * 1e6 / max(1, len(examples))
+    print("Routing classifier")
+    print(f"Examples: {len(examples)}")
+    print(f"Labels: {', '.join(model.labels)}")
+    print(f"Training accuracy: {correct / max(1, len(examples)):.3f}")
+    print(f"Inference: {per_question_us:.1f} us/question")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import anyio
+import httpx
+import pytest
+
+import app.admission as admission_module
+import app.main as main
+from app.admission import AdmissionController, ConcurrencyGate, TokenBucketLimiter
+from app.main import app
+
+
+def _use_admission(monkeypatch, controller: AdmissionController) -> None:
+    monkeypatch.setattr(admission_module, "get_admission", lambda: controller)
+    monkeypatch.setattr(main, "get_admission", lambda: controller)
+
+
+def test_token_bucket_limits_per_key() -> None:
+    limiter = TokenBucketLimiter(rate=1.0, burst=2.0)
+    assert limiter.try_acquire("viewer:a") == 0.0
+    assert limiter.try_acquire("viewer:a") == 0.0
+    assert 0.0 < limiter.try_acquire("viewer:a") <= 1.0
+    assert limiter.try_acquire("viewer:b") == 0.0
+    assert limiter.try_acquire("viewer:b", cost=5) == float("inf")
+
+
+def test_token_bucket_charges_several_keys_all_or_nothing() -> None:
+    limiter = TokenBucketLimiter(rate=1.0, burst=2.0)
+    assert limiter.try_acquire("viewer:b", cost=2) == 0.0
+    # viewer:b is short, so viewer:a must not pay either.
+    assert limiter.try_acquire_many({"viewer:a": 2, "viewer:b": 1}) > 0.0
+    assert limiter.try_acquire("viewer:a", cost=2) == 0.0
+
+
+@pytest.mark.anyio
+async def test_concurrency_gate_queues_then_sheds() -> None:
+    gate = ConcurrencyGate(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+    results: list[bool] = []
+
+    async def waiter() -> None:
+        results.append(await gate.acquire())
+
+    assert await gate.acquire()
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(waiter)
+        await anyio.sleep(0.01)
+        assert gate.waiting == 1
+        assert await gate.acquire() is False
+        gate.release()
+    assert results == [True]
+    assert (gate.active, gate.waiting) == (1, 0)
+    gate.release()
+    assert gate.active == 0
+
+
+@pytest.mark.anyio
+async def test_ask_is_rate_limited_per_actor(monkeypatch) -> None:
+    controller = AdmissionController(
+        TokenBucketLimiter(rate=0.5, burst=1.0),
+        ConcurrencyGate(max_concurrent=8, max_queue=8, queue_timeout=1.0),
+    )
+    _use_admission(monkeypatch, controller)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/ask", json={"question": "Day-1 /ask endpoint?"})
+        limited = await client.post("/ask", json={"question": "Day-1 /ask endpoint?"})
+        other = await client.post(
+            "/ask", json={"question": "Day-1 /ask endpoint?", "actor_id": "someone-else"}
+        )
+        approve = await client.post(
+            "/approve",
+            json={"action_id": "missing", "approved_by": "ops", "approved_role": "operator"},
+        )
+        metrics = (await client.get("/metrics")).json()["admission"]
+
+    assert first.status_code == 200
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert other.status_code == 200
+    assert approve.status_code == 404
+    assert metrics["rate_limited"] == 1 and metrics["admitted"] == 3
+
+
+@pytest.mark.anyio
+async def test_ask_is_shed_while_probes_pass(monkeypatch) -> None:
+    controller = AdmissionController(
+        TokenBucketLimiter(rate=100.0, burst=100.0),
+        ConcurrencyGate(max_concurrent=0, max_queue=0, queue_timeout=0.1),
+    )
+    _use_admission(monkeypatch, controller)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        shed = await client.post("/ask", json={"question": "Day-1 /ask endpoint?"})
+        health = await client.get("/health")
+
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "1"
+    assert shed.json() == {"detail": "overloaded"}
+    assert "X-Trace-Id" in shed.headers
+    assert health.status_code == 200
+    assert controller.stats()["shed"] == 1
+
+
+@pytest.mark.anyio
+async def test_approve_is_rate_limited_per_approver(monkeypatch) -> None:
+    controller = AdmissionController(
+        TokenBucketLimiter(rate=0.5, burst=1.0),
+        ConcurrencyGate(max_concurrent=0, max_queue=0, queue_timeout=0.1),
+    )
+    _use_admission(monkeypatch, controller)
+    body = {"action_id": "missing", "approved_by": "ops", "approved_role": "operator"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.post("/approve", json=body)
+        limited = await client.post("/approve", json=body)
+        other = await client.post("/approve", json={**body, "approved_by": "ops-2"})
+
+    # Not shed while /ask would be (no concurrency slots), but still rate limited.
+    assert first.status_code == 404
+    assert limited.status_code == 429
+    assert limited.headers["Retry-After"] == "2"
+    assert other.status_code == 404
@@ -0,0 +1,92 @@
+from app.response_cache import CachedResponse, current_fingerprint
+from app.semantic_cache import SemanticCache, content_tokens
+
+
+def _cached(answer: str) -> CachedResponse:
+    return CachedResponse(
+        body={"answer": answer},
+        etag=f'"{answer}"',
+        chosen_agent="doc_search",
+        evidence_count=0,
+        fingerprint=current_fingerprint("doc_search"),
+    )
+
+
+def test_content_tokens_ignore_order_and_stopwords() -> None:
+    assert content_tokens("DB backup verify steps?") == content_tokens(
+        "steps to verify the DB backup"
+    )
+    assert content_tokens("the to of") == frozenset()
+
+
+def test_semantic_cache_never_serves_a_question_with_another_key_term() -> None:
+    cache = SemanticCache()
+    cache.put("postgres backup verify steps", "viewer", "b1", _cached("postgres"))
+
+    assert cache.get("mysql backup verify steps", "viewer", "b1") is None
+    assert cache.get("postgres backup verify steps restore", "viewer", "b1") is None
+    hit = cache.get("steps to verify the postgres backup", "viewer", "b1")
+    assert hit is not None and hit.body == {"answer": "postgres"}
+
+
+def test_semantic_cache_partitions_by_role_and_evicts_lru_by_size() -> None:
+    cache = SemanticCache(max_bytes=3 * 540)
+    for topic in ("backup", "restore", "failover"):
+        cache.put(f"database {topic} steps", "viewer", "b1", _cached(topic))
+    assert cache.get("steps for database backup", "operator", "b1") is None
+    hit = cache.get("steps for database backup", "viewer", "b1")
+    assert hit is not None and hit.body == {"answer": "backup"}
+
+    cache.put("database replication steps", "viewer", "b1", _cached("replication"))
+
+    assert cache.stats()["evicted"] == 1
+    assert cache.get("database restore steps", "viewer", "b1") is None
+    assert cache.get("database backup steps", "viewer", "b1") is not None
+
+
+def test_response_cache_reads_the_recorded_index_generation(monkeypatch) -> None:
+    from app import response_cache, retrieval
+    from app.response_cache import ResponseCache
+
+    def no_retriever():
+        raise AssertionError("cache lookups must not resolve the retriever")
+
+    monkeypatch.setattr(retrieval, "get_retriever", no_retriever)
+    monkeypatch.setattr(response_cache, "index_generation", lambda: "g1")
+    cache = ResponseCache(max_entries=8)
+    cache.put(("doc", "viewer", "b1"), {"answer": "doc"}, "doc_search", 1)
+    cache.put(("hi", "viewer", "b1"), {"answer": "hi"}, "direct_answer", 0)
+    assert cache.get(("doc", "viewer", "b1")) is not None
+
+    monkeypatch.setattr(response_cache, "index_generation", lambda: "g2")
+
+    # A rebuilt index invalidates doc answers only.
+    assert cache.get(("doc", "viewer", "b1")) is None
+    assert cache.get(("hi", "viewer", "b1")) is not None
+
+
+def test_refresh_retriever_swaps_changed_docs_and_leaves_a_cold_process_cold(
+    tmp_path, monkeypatch
+) -> None:
+    from app import retrieval
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(retrieval, "_retriever", None)
+    monkeypatch.setattr(retrieval, "_generation", None)
+    monkeypatch.setattr(retrieval, "_checked_at", 0.0)
+    monkeypatch.setenv("INDEX_CACHE_DIR", str(tmp_path / ".cache"))
+
+    retrieval.refresh_retriever()
+    assert retrieval.index_generation() is None
+
+    first = retrieval.get_retriever().generation
+    assert retrieval.index_generation() == first
+    (docs / "b.md").write_text("oracle database tuning", encoding="utf-8")
+
+    retrieval.refresh_retriever()
+
+    assert retrieval.index_generation() not in (None, first)
+    assert retrieval.get_retriever().generation == retrieval.index_generation()
@@ -1,3 +1,9 @@
+import pytest
+
+from agents.deadline import Deadline
+from agents.doc_search_agent import DocSearchAgent
+from agents.query_context import QueryContext
+from agents.retrieval import Reranker, SearchHit, executor
 from agents.retrieval.tfidf import TfidfRetriever
 
 
@@ -13,3 +19,209 @@ def test_tfidf_retriever_returns_hits(tmp_path, monkeypatch):
     hits = r.search("password reset", top_k=3)
     assert hits
     assert "password" in hits[0].text.lower()
+
+
+def test_reranker_mmr_prefers_distinct_documents():
+    class SameDocSource:
+        def similarities(self, hit, others):
+            return [1.0 if other.doc_id == hit.doc_id else 0.0 for other in others]
+
+        def doc_mtime(self, doc_id):
+            return None
+
+    hits = [
+        SearchHit(score=0.9, doc_id="docs/a.md", chunk_id="0", text="backup verify steps"),
+        SearchHit(score=0.85, doc_id="docs/a.md", chunk_id="1", text="backup verify steps"),
+        SearchHit(score=0.6, doc_id="docs/b.md", chunk_id="0", text="backup verify checklist"),
+    ]
+    result = Reranker(mmr_lambda=0.5).rerank("backup verify", hits, top_k=2, source=SameDocSource())
+    assert result.skipped is False
+    assert [hit.doc_id for hit in result.hits] == ["docs/a.md", "docs/b.md"]
+
+
+def test_tfidf_hangul_ngram_analyzer_matches_particles(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("DB 백업 검증 절차", encoding="utf-8")
+    (docs / "b.md").write_text("네트워크 장애 대응", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    assert TfidfRetriever(root="docs", cache_dir=".cache").search("백업을 검증절차") == []
+
+    r = TfidfRetriever(root="docs", cache_dir=".cache", analyzer="hangul_ngram")
+    hits = r.search("백업을 검증절차", top_k=3)
+    assert [hit.doc_id for hit in hits] == ["docs/a.md"]
+
+    cached = TfidfRetriever(root="docs", cache_dir=".cache", analyzer="hangul_ngram")
+    assert [hit.doc_id for hit in cached.search("백업을", top_k=3)] == ["docs/a.md"]
+
+
+def test_tfidf_search_with_stats_reports_work_and_cache_hits(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide", encoding="utf-8")
+    (docs / "b.md").write_text("password rotation policy", encoding="utf-8")
+    (docs / "c.md").write_text("oracle database tuning", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    r = TfidfRetriever(root="docs", cache_dir=".cache")
+    hits, stats = r.search_with_stats("password reset", top_k=1)
+    assert len(hits) == 1
+    assert stats.query_terms == 2
+    assert stats.postings_scanned == 3
+    assert stats.candidates_scored == 2
+    assert stats.pruned == 1
+    assert stats.cache_hit is False
+    assert "score" in stats.stage_us
+
+    cached_hits, cached_stats = r.search_with_stats("Password  RESET", top_k=1)
+    assert cached_stats.cache_hit is True
+    assert cached_hits == hits
+
+    index = r.index_stats()
+    assert index["chunk_count"] == 3
+    assert index["generation"] == r.generation
+    assert index["memory_bytes"]["postings"] > 0
+
+
+def test_tfidf_search_many_matches_single_searches(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide", encoding="utf-8")
+    (docs / "b.md").write_text("password rotation policy", encoding="utf-8")
+    (docs / "c.md").write_text("oracle database reset", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    queries = ["password reset", "database reset", "", "PASSWORD reset", "rotation"]
+
+    batched = TfidfRetriever(root="docs", cache_dir=".cache")
+    single = TfidfRetriever(root="docs", cache_dir=".cache")
+    results = batched.search_many_with_stats(queries, top_k=3)
+
+    assert [hits for hits, _ in results] == [single.search(q, top_k=3) for q in queries]
+    assert results[0][1].postings_scanned == 4
+    assert results[2][1].query_terms == 0
+    assert not results[3][1].cache_hit  # same batch, scored once with the first
+    assert batched.search_with_stats("password reset", top_k=3)[1].cache_hit
+
+
+@pytest.mark.anyio
+async def test_tfidf_asearch_matches_search_on_bounded_executor(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("hello world\n\npassword reset guide", encoding="utf-8")
+    (docs / "b.md").write_text("oracle database tuning", encoding="utf-8")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("RETRIEVAL_MAX_WORKERS", "2")
+    executor.shutdown_search_executor()
+    try:
+        r = TfidfRetriever(root="docs", cache_dir=".cache")
+        assert await r.asearch("password reset", top_k=3) == r.search("password reset", top_k=3)
+        assert executor.get_search_executor()._max_workers == 2
+    finally:
+        executor.shutdown_search_executor()
+
+
+def test_doc_search_skips_rerank_when_budget_is_short(tmp_path, monkeypatch):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide\n\nreset the password", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    agent = DocSearchAgent(
+        retriever=TfidfRetriever(root="docs", cache_dir=".cache"),
+        reranker=Reranker(budget_ms=25.0),
+    )
+    question = "password reset"
+
+    roomy = agent.run(
+        question, context=QueryContext.build(question, deadline=Deadline.after_ms(5000))
+    )
+    short = agent.run(
+        question, context=QueryContext.build(question, deadline=Deadline.after_ms(10))
+    )
+    expired = agent.run(
+        question, context=QueryContext.build(question, deadline=Deadline.after_ms(0))
+    )
+
+    assert not roomy.degraded and roomy.metrics["rerank"]["reason"] != "deadline"
+    assert short.degraded and short.evidence
+    assert short.metrics["rerank"] == {"elapsed_ms": 0.0, "skipped": True, "reason": "deadline"}
+    assert short.metrics["degraded"] == ["rerank"]
+    assert expired.degraded and expired.evidence == []
+    assert expired.metrics == {"degraded": ["retrieval"]}
+
+
+def test_rerank_slots_are_shared_across_agents(tmp_path, monkeypatch):
+    from agents import doc_search_agent
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide\n\nreset the password", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    slots = doc_search_agent.RerankSlots(limit=1)
+    monkeypatch.setattr(doc_search_agent, "_slots", slots)
+    retriever = TfidfRetriever(root="docs", cache_dir=".cache")
+    first, second = DocSearchAgent(retriever=retriever), DocSearchAgent(retriever=retriever)
+
+    assert slots.try_acquire() and not slots.try_acquire()
+    # Another agent's rerank holds the only slot, so this one is shed.
+    assert second.run("password reset").metrics["rerank"]["reason"] == "load"
+    slots.release()
+    assert first.run("password reset").metrics["rerank"]["reason"] != "load"
+    assert slots.inflight == 0
+
+
+@pytest.mark.anyio
+async def test_doc_search_arun_resolves_shared_retriever_off_the_event_loop(tmp_path, monkeypatch):
+    import threading
+
+    from agents import doc_search_agent
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide\n\nreset the password", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    retriever = TfidfRetriever(root="docs", cache_dir=".cache")
+    loop_thread = threading.get_ident()
+    resolved_on: list[int] = []
+
+    def fake_get_retriever() -> TfidfRetriever:
+        resolved_on.append(threading.get_ident())
+        return retriever
+
+    monkeypatch.setattr(doc_search_agent, "get_retriever", fake_get_retriever)
+    result = await DocSearchAgent().arun("password reset")
+
+    assert result.evidence
+    assert resolved_on and loop_thread not in resolved_on
+
+
+@pytest.mark.anyio
+async def test_batched_doc_search_keeps_each_items_context(tmp_path, monkeypatch):
+    from agents.orchestrator import Orchestrator, RouteRequest
+
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.md").write_text("password reset guide\n\nreset the password", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    agent = DocSearchAgent(
+        retriever=TfidfRetriever(root="docs", cache_dir=".cache"),
+        reranker=Reranker(budget_ms=25.0),
+    )
+    orchestrator = Orchestrator(doc_search=agent, speculative=False)
+    questions = ["password reset docs", "reset password docs", "docs for password reset"]
+    deadlines = [None, Deadline.after_ms(10), Deadline.after_ms(0)]
+    requests = [
+        RouteRequest(question, context=QueryContext.build(question, deadline=deadline))
+        for question, deadline in zip(questions, deadlines)
+    ]
+
+    routed = await orchestrator.aroute_many(requests)
+
+    (roomy_route, roomy), (_, short), (_, expired) = routed
+    assert roomy_route == "doc_search"
+    assert not roomy.degraded and roomy.metrics["rerank"]["reason"] != "deadline"
+    assert short.degraded and short.evidence
+    assert short.metrics["rerank"]["reason"] == "deadline"
+    assert expired.degraded and expired.evidence == []
+    assert expired.metrics == {"degraded": ["retrieval"]}
@@ -0,0 +1,335 @@
+import concurrent.futures
+import json
+import os
+import time
+
+import pytest
+
+from agents.base import AgentResult
+from agents.classifier import HashedNgramClassifier, train_classifier
+from agents.deadline import Deadline
+from agents.orchestrator import (
+    DEFAULT_AGENT_FACTORIES,
+    Orchestrator,
+    RouteRequest,
+    get_orchestrator,
+)
+from agents.query_context import QueryContext
+from agents.routing import (
+    AGENT_ROUTES,
+    KeywordMatcher,
+    ReloadingRouter,
+    get_router,
+    parse_routing_config,
+)
+
+
+def test_keyword_matcher_reports_overlapping_keywords_in_one_scan() -> None:
+    matcher = KeywordMatcher({"a": ("x post",), "b": ("post now",), "c": ("ask",), "d": ("/ask",)})
+    mask = matcher.scan("X POST now via /ask")
+    assert matcher.features(mask) == {"a", "b", "c", "d"}
+
+
+def test_router_resolves_priority_from_mask() -> None:
+    assert get_router().route("publish the draft thread") == "portfolio_workflow"
+    assert get_router().route("runbook for backups") == "doc_search"
+    assert get_router().route("write a runbook") == "content_creator"
+    assert get_router().route("create a ticket for the runbook") == "workflow"
+    assert get_router().route("VPN 장애 티켓 만들어줘") == "workflow"
+    assert get_router().route("What is FastAPI?") == "direct_answer"
+
+
+def test_orchestrator_builds_agents_lazily_per_route() -> None:
+    def fail() -> None:
+        raise AssertionError("doc_search must not be constructed for workflow questions")
+
+    orchestrator = Orchestrator(factories={"doc_search": fail})
+    chosen, result = orchestrator.route_with_choice("VPN 장애 티켓 만들어줘")
+    assert chosen == "workflow"
+    assert result.workflow is not None
+    assert orchestrator.is_loaded("workflow")
+    assert not orchestrator.is_loaded("doc_search")
+    assert orchestrator.agent("workflow") is orchestrator.agent("workflow")
+
+
+def test_get_orchestrator_keeps_agents_across_requests() -> None:
+    from app.ask_logic import build_ask_outcome
+
+    build_ask_outcome("Day-1 /ask endpoint?", "t1")
+    agent = get_orchestrator().agent("doc_search")
+    build_ask_outcome("runbook database backup verification steps?", "t2")
+    assert get_orchestrator() is get_orchestrator()
+    assert get_orchestrator().agent("doc_search") is agent
+
+
+def test_reloading_router_swaps_rules_when_config_changes(tmp_path) -> None:
+    path = tmp_path / "routing.json"
+    config = {
+        "version": 1,
+        "features": {"ticket": {"en": ["ticket"]}, "verb": {"en": ["open"], "ko": ["열어"]}},
+        "rules": [{"intent": "workflow", "priority": 1, "when": [["ticket", "verb"]]}],
+    }
+    path.write_text(json.dumps(config), encoding="utf-8")
+    reloading = ReloadingRouter(path, interval=0)
+    assert reloading.current().route("open a ticket") == "workflow"
+    assert reloading.current().route("ticket 열어") == "direct_answer"
+
+    config["version"] = 2
+    config["features"]["ticket"]["ko"] = ["티켓"]
+    path.write_text(json.dumps(config), encoding="utf-8")
+    os.utime(path, (1, 1))
+    assert reloading.current().explain("티켓 열어").version == 2
+    assert reloading.current().route("티켓 열어") == "workflow"
+
+    path.write_text("{not json", encoding="utf-8")
+    os.utime(path, (2, 2))
+    assert reloading.current().config.version == 2
+
+    for mtime, broken in enumerate(
+        (
+            {**config, "rules": [{"intent": "workflow", "when": [["ticket"], 5]}]},
+            {**config, "rules": [{"intent": "doc_serach", "when": [["ticket"]]}]},
+            {**config, "default": "nowhere"},
+            {**config, "features": {**config["features"], "verb": {"en": "open"}}},
+        ),
+        start=3,
+    ):
+        path.write_text(json.dumps(broken), encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+        assert reloading.current().config.version == 2
+        with pytest.raises(ValueError):
+            parse_routing_config(broken)
+
+
+def test_agent_routes_match_orchestrator_factories() -> None:
+    assert set(DEFAULT_AGENT_FACTORIES) == AGENT_ROUTES
+
+
+def test_route_classifier_overrides_rules_only_above_threshold(tmp_path) -> None:
+    examples = [
+        ("how do I rotate the oncall pager", "doc_search"),
+        ("where is the oncall escalation guide", "doc_search"),
+        ("tell me a joke", "direct_answer"),
+        ("say hello nicely", "direct_answer"),
+    ]
+    model = train_classifier(examples, dim=1024, epochs=40)
+    path = tmp_path / "model.json"
+    model.save(path)
+    loaded = HashedNgramClassifier.load(path)
+    batch = loaded.predict_batch(["oncall pager guide", "tell me a joke"])
+    assert [label for label, _ in batch] == ["doc_search", "direct_answer"]
+    assert abs(batch[0][1] - model.predict("oncall pager guide")[1]) < 1e-4
+
+    confident = Orchestrator(classifier=loaded, classifier_threshold=0.5)
+    assert confident.choose("oncall pager guide") == "doc_search"
+    assert confident.route_explain("oncall pager guide").source == "classifier"
+    # Never trained on workflow, so the ticket rule keeps its route.
+    assert confident.choose("create a ticket about the oncall pager") == "workflow"
+    assert confident.choose_batch(["oncall pager guide", "hello"]) == [
+        "doc_search",
+        "direct_answer",
+    ]
+
+    cautious = Orchestrator(classifier=loaded, classifier_threshold=1.01)
+    assert cautious.choose("oncall pager guide") == "direct_answer"
+
+
+class _FakeAgent:
+    def __init__(self, name: str, result: AgentResult, delay: float = 0.0) -> None:
+        self.name = name
+        self.result = result
+        self.delay = delay
+        self.calls: list[dict[str, object]] = []
+
+    def run(self, question, actor=None, trace_id=None, **kwargs) -> AgentResult:
+        self.calls.append(kwargs)
+        time.sleep(self.delay)
+        return self.result
+
+
+def _speculative_orchestrator(doc_delay: float = 0.0) -> tuple[Orchestrator, _FakeAgent]:
+    crypto = _FakeAgent("crypto_analysis", AgentResult(answer="no portfolio", evidence=[]))
+    orchestrator = Orchestrator(
+        doc_search=_FakeAgent(
+            "doc_search", AgentResult(answer="doc", evidence=["a"], confidence=0.6), doc_delay
+        ),
+        crypto_analysis=crypto,
+        direct_answer=_FakeAgent("direct_answer", AgentResult(answer="hi", evidence=[])),
+        speculative=True,
+        speculation_deadline_ms=100,
+    )
+    return orchestrator, crypto
+
+
+def test_speculative_routing_picks_best_read_only_candidate() -> None:
+    orchestrator, crypto = _speculative_orchestrator()
+    question = "crypto portfolio runbook in the docs"
+    assert orchestrator.speculation_candidates(question) == [
+        "crypto_analysis",
+        "doc_search",
+        "direct_answer",
+    ]
+    assert orchestrator.speculation_candidates("publish the crypto docs") == []
+
+    chosen, result = orchestrator.route_with_choice(question)
+    assert chosen == "doc_search"
+    assert [call["dry_run"] for call in crypto.calls] == [True]
+    candidates = result.metrics["speculation"]["candidates"]
+    assert candidates["crypto_analysis"]["score"] == 0.0
+    assert all("latency_ms" in item for item in candidates.values())
+
+
+def test_speculation_skips_candidates_when_the_pool_is_saturated(monkeypatch) -> None:
+    import threading
+
+    from agents import orchestrator as orchestrator_module
+
+    slots = threading.BoundedSemaphore(1)
+    pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(orchestrator_module, "_speculation_pool", pool)
+    monkeypatch.setattr(orchestrator_module, "_speculation_slots", slots)
+    orchestrator, crypto = _speculative_orchestrator()
+    question = "crypto portfolio runbook in the docs"
+
+    assert slots.acquire(blocking=False)  # another request holds the only worker
+    chosen, result = orchestrator.route_with_choice(question)
+    slots.release()
+    pool.shutdown()
+
+    candidates = result.metrics["speculation"]["candidates"]
+    assert chosen == "crypto_analysis" and len(crypto.calls) == 1
+    assert candidates["doc_search"] == candidates["direct_answer"] == {"completed": False}
+
+
+def test_speculation_bounds_the_primary_by_the_request_deadline() -> None:
+    slow = _FakeAgent("crypto_analysis", AgentResult(answer="late", evidence=["x"]), delay=0.5)
+    orchestrator = Orchestrator(
+        doc_search=_FakeAgent("doc_search", AgentResult(answer="doc", evidence=[], confidence=0.1)),
+        crypto_analysis=slow,
+        direct_answer=_FakeAgent("direct_answer", AgentResult(answer="hi", evidence=[])),
+        speculative=True,
+    )
+    question = "crypto portfolio runbook in the docs"
+    context = QueryContext.build(question, deadline=Deadline.after_ms(50))
+
+    started = time.perf_counter()
+    chosen, result = orchestrator.route_with_choice(question, context=context)
+
+    assert time.perf_counter() - started < 0.4
+    assert result.metrics["speculation"]["candidates"]["crypto_analysis"]["completed"]
+    assert chosen == "direct_answer" and result.answer == "hi"
+
+
+@pytest.mark.anyio
+async def test_speculative_crypto_winner_commits_its_dry_run(monkeypatch, tmp_path) -> None:
+    import sqlite3
+
+    from agents.crypto_analysis_agent import CryptoAnalysisAgent
+
+    db_path = tmp_path / "app.db"
+    monkeypatch.setenv("APP_DB_PATH", str(db_path))
+    runs: list[bool] = []
+
+    class CountingCrypto(CryptoAnalysisAgent):
+        def run(self, question, actor=None, trace_id=None, **kwargs) -> AgentResult:
+            runs.append(kwargs.get("dry_run", False))
+            return super().run(question, actor=actor, trace_id=trace_id, **kwargs)
+
+    orchestrator = Orchestrator(
+        doc_search=_FakeAgent("doc_search", AgentResult(answer="doc", evidence=[], confidence=0.1)),
+        crypto_analysis=CountingCrypto(),
+        direct_answer=_FakeAgent("direct_answer", AgentResult(answer="hi", evidence=[])),
+        speculative=True,
+        speculation_deadline_ms=500,
+    )
+    question = 'crypto portfolio docs {"positions":[{"symbol":"BTC","qty":1}]}'
+
+    sync_chosen, sync_result = orchestrator.route_with_choice(question, trace_id="t-sync")
+    chosen, result = await orchestrator.aroute_with_choice(question, trace_id="t-async")
+
+    assert sync_chosen == chosen == "crypto_analysis"
+    assert runs == [True, True]  # each request ran the analysis once, as a dry run
+    assert sync_result.commit is None and result.commit is None
+    assert any(item.startswith("snapshot_id=") for item in result.evidence)
+    with sqlite3.connect(db_path) as conn:
+        traces = [row[0] for row in conn.execute("SELECT trace_id FROM analysis_snapshots")]
+    assert sorted(traces) == ["t-async", "t-sync"]
+
+
+@pytest.mark.anyio
+async def test_speculative_routing_drops_candidates_past_deadline() -> None:
+    orchestrator, _ = _speculative_orchestrator(doc_delay=0.5)
+    chosen, result = await orchestrator.aroute_with_choice("crypto portfolio runbook in the docs")
+    speculation = result.metrics["speculation"]
+    assert speculation["candidates"]["doc_search"] == {"completed": False}
+    assert chosen == speculation["winner"] == "direct_answer"
+
+
+@pytest.mark.anyio
+async def test_orchestrator_abandons_read_only_agent_at_request_deadline() -> None:
+    slow = _FakeAgent("doc_search", AgentResult(answer="doc", evidence=["a"]), delay=0.5)
+    orchestrator = Orchestrator(doc_search=slow)
+    question = "runbook database backup verification steps?"
+    context = QueryContext.build(question, deadline=Deadline.after_ms(50))
+
+    started = time.perf_counter()
+    chosen, result = await orchestrator.aroute_with_choice(question, context=context)
+
+    assert time.perf_counter() - started < 0.4
+    assert chosen == "doc_search"
+    assert result.degraded and result.evidence == []
+    assert result.metrics == {"degraded": ["doc_search"]}
+
+
+def test_deadline_answer_reports_the_agent_name_not_the_route() -> None:
+    orchestrator = Orchestrator()
+    question = "rebalance my portfolio"
+    context = QueryContext.build(question, deadline=Deadline.after_ms(0))
+
+    chosen, result = orchestrator.route_with_choice(question, context=context)
+
+    assert orchestrator.choose(question, context) == "portfolio_workflow"
+    assert not orchestrator.is_loaded("portfolio_workflow")
+    assert chosen == "portfolio_manager"
+    assert result.metrics == {"degraded": ["portfolio_manager"]}
+
+
+def test_query_context_normalizes_and_extracts_once() -> None:
+    question = 'ＤＯＣＳ WEBHOOK url=https://Hooks.example.com/x, payload={"a": {"b": 1}} tail}'
+    ctx = QueryContext.build(question)
+    assert ctx.text.startswith("docs webhook")
+    assert ctx.url == "https://Hooks.example.com/x"
+    assert [span.value for span in ctx.json_spans] == [{"a": {"b": 1}}]
+    assert {"doc:en", "action:en"} <= ctx.features
+    assert Orchestrator().choose(question, ctx) == "workflow"
+
+
+@pytest.mark.anyio
+async def test_aroute_many_classifies_the_batch_in_one_call() -> None:
+    model = train_classifier(
+        [("how do I rotate the oncall pager", "doc_search"), ("tell me a joke", "direct_answer")],
+        dim=1024,
+        epochs=40,
+    )
+    batches: list[list[str]] = []
+    predict_batch = model.predict_batch
+
+    def spy(texts):
+        batches.append(list(texts))
+        return predict_batch(texts)
+
+    model.predict_batch = spy  # type: ignore[method-assign]
+    doc = _FakeAgent("doc_search", AgentResult(answer="doc", evidence=["a"]))
+    orchestrator = Orchestrator(
+        doc_search=doc,
+        direct_answer=_FakeAgent("direct_answer", AgentResult(answer="hi", evidence=[])),
+        classifier=model,
+        classifier_threshold=0.5,
+        speculative=False,
+    )
+    routed = await orchestrator.aroute_many(
+        [RouteRequest("rotate the oncall pager"), RouteRequest("tell me a joke")]
+    )
+
+    assert [route for route, _ in routed] == ["doc_search", "direct_answer"]
+    assert len(batches) == 1 and len(batches[0]) == 2
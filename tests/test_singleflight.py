@@ -0,0 +1,106 @@
+import threading
+
+import anyio
+import pytest
+
+from app.singleflight import SingleFlight
+
+
+@pytest.mark.anyio
+async def test_ado_coalesces_concurrent_identical_calls() -> None:
+    flight = SingleFlight()
+    calls = {"count": 0}
+    results: list[tuple[str, bool]] = []
+
+    async def compute() -> str:
+        calls["count"] += 1
+        await anyio.sleep(0.05)
+        return "answer"
+
+    async def caller(key: str) -> None:
+        results.append(await flight.ado(key, compute))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(5):
+            tg.start_soon(caller, "same")
+        tg.start_soon(caller, "other")
+
+    assert calls["count"] == 2
+    assert sorted(coalesced for _, coalesced in results) == [False, False, True, True, True, True]
+    assert {value for value, _ in results} == {"answer"}
+    assert flight.stats() == {
+        "in_flight": 0,
+        "executed": 2,
+        "coalesced": 4,
+        "coalesced_ratio": round(4 / 6, 4),
+    }
+
+
+@pytest.mark.anyio
+async def test_ado_shares_leader_exception() -> None:
+    flight = SingleFlight()
+    errors: list[str] = []
+
+    async def fail() -> str:
+        await anyio.sleep(0.02)
+        raise RuntimeError("boom")
+
+    async def caller() -> None:
+        try:
+            await flight.ado("key", fail)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    async with anyio.create_task_group() as tg:
+        for _ in range(3):
+            tg.start_soon(caller)
+
+    assert errors == ["boom"] * 3
+    assert flight.stats()["executed"] == 1
+
+
+def test_do_coalesces_threads() -> None:
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = {"count": 0}
+    results: list[tuple[int, bool]] = []
+
+    def compute() -> int:
+        calls["count"] += 1
+        release.wait(timeout=2)
+        return 42
+
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("key", compute))) for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["coalesced"] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls["count"] == 1
+    assert sorted(results) == [(42, False), (42, True), (42, True), (42, True)]
+
+
+@pytest.mark.anyio
+async def test_ado_follower_gives_up_after_its_timeout() -> None:
+    flight = SingleFlight()
+    results: dict[str, tuple[str, bool]] = {}
+
+    async def slow() -> str:
+        await anyio.sleep(0.3)
+        return "answer"
+
+    async def caller(name: str, timeout: float | None) -> None:
+        results[name] = await flight.ado("key", slow, timeout=timeout, on_timeout=lambda: "late")
+
+    with anyio.fail_after(0.25):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(caller, "leader", None)
+            await anyio.sleep(0.01)
+            await caller("follower", 0.02)
+            assert results == {"follower": ("late", False)}
+            tg.cancel_scope.cancel()
@@ -1,7 +1,11 @@
 import json
+import time
 
+import anyio
 import httpx
+import pytest
 
+from agents.deadline import Deadline
 from tools import registry
 
 
@@ -20,7 +24,7 @@ def test_http_post_with_mock_transport(monkeypatch) -> None:
         return [(None, None, None, None, ("93.184.216.34", port))]
 
     monkeypatch.delenv("TOOL_HTTP_POST_ALLOWED_DOMAINS", raising=False)
-    monkeypatch.setattr(registry.httpx, "Client", client_factory)
+    monkeypatch.setattr(httpx, "Client", client_factory)
     monkeypatch.setattr(registry.socket, "getaddrinfo", fake_getaddrinfo)
     result = registry.http_post({"url": "https://example.com", "payload": {"ping": "pong"}})
 
@@ -40,3 +44,63 @@ def test_http_post_blocks_private_ips(monkeypatch) -> None:
     result = registry.http_post({"url": "https://example.com", "payload": {"ping": "pong"}})
     assert result["ok"] is False
     assert result["error"] == "blocked_ip"
+
+
+@pytest.mark.anyio
+async def test_arun_tool_posts_with_async_client(monkeypatch) -> None:
+    seen: list[bytes] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.content)
+        return httpx.Response(503, text="busy")
+
+    transport = httpx.MockTransport(handler)
+    real_client = httpx.AsyncClient
+
+    def client_factory(*args, **kwargs) -> httpx.AsyncClient:
+        kwargs["transport"] = transport
+        return real_client(*args, **kwargs)
+
+    def fake_getaddrinfo(host: str, port: int, type: int | None = None):
+        return [(None, None, None, None, ("93.184.216.34", port))]
+
+    monkeypatch.delenv("TOOL_HTTP_POST_ALLOWED_DOMAINS", raising=False)
+    monkeypatch.setattr(httpx, "AsyncClient", client_factory)
+    monkeypatch.setattr(registry.socket, "getaddrinfo", fake_getaddrinfo)
+    result = await registry.arun_tool(
+        "http_post", {"url": "https://example.com", "payload": {"ping": "pong"}}
+    )
+
+    assert result["ok"] is False
+    assert result["error"] == "status_503"
+    assert json.loads(result["output"])["truncated_body"] == "busy"
+    assert seen == [b'{"ping":"pong"}']
+
+
+@pytest.mark.anyio
+async def test_arun_tool_runs_sync_tools_inline() -> None:
+    result = await registry.arun_tool("notify", {"channel": "ops", "message": "ping"})
+    assert result == {"tool": "notify", "ok": True, "output": "Notified ops: ping"}
+
+
+@pytest.mark.anyio
+async def test_arun_tool_cuts_off_at_deadline(monkeypatch) -> None:
+    async def slow_post(args: dict[str, object]) -> dict[str, object]:
+        await anyio.sleep(5)
+        return {"tool": "http_post", "ok": True, "output": ""}
+
+    monkeypatch.setitem(registry.ASYNC_TOOL_REGISTRY, "http_post", slow_post)
+    started = time.perf_counter()
+    result = await registry.arun_tool(
+        "http_post", {"url": "https://example.com"}, deadline=Deadline.after_ms(50)
+    )
+
+    assert time.perf_counter() - started < 1
+    assert result == {
+        "tool": "http_post",
+        "ok": False,
+        "output": "",
+        "error": "deadline_exceeded",
+    }
+    expired = Deadline.after_ms(0)
+    assert registry.run_tool("notify", {"channel": "ops"}, expired)["error"] == "deadline_exceeded"
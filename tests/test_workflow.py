@@ -124,11 +124,13 @@ async def test_approve_is_idempotent(monkeypatch, tmp_path) -> None:
 
     calls = {"count": 0}
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         calls["count"] += 1
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-1",
@@ -163,11 +165,13 @@ async def test_approve_http_post_uses_normalized_args(monkeypatch, tmp_path) ->
 
     captured: dict[str, object] = {}
 
-    def fake_run_tool(tool: str, args: dict[str, object]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, object], deadline: object = None
+    ) -> dict[str, object]:
         captured["args"] = args
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     question = 'Send webhook url=https://example.com payload={"ping":"pong"}'
     async with httpx.AsyncClient(
@@ -199,10 +203,12 @@ async def test_approve_marks_running_then_completed(monkeypatch, tmp_path) -> No
     store = PendingActionStore(db_path=str(tmp_path / "pending_actions.db"))
     monkeypatch.setattr(main, "pending_store", store)
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-2",
@@ -239,11 +245,13 @@ async def test_approve_running_does_not_reexecute(monkeypatch, tmp_path) -> None
 
     calls = {"count": 0}
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         calls["count"] += 1
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-3",
@@ -279,11 +287,13 @@ async def test_approve_legacy_approved_recovery(monkeypatch, tmp_path) -> None:
 
     calls = {"count": 0}
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         calls["count"] += 1
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-4",
@@ -323,11 +333,13 @@ async def test_approve_failed_start_action_no_retry(monkeypatch, tmp_path) -> No
 
     calls = {"count": 0}
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         calls["count"] += 1
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-5",
@@ -376,11 +388,13 @@ async def test_approve_failed_start_action_retry_executes(monkeypatch, tmp_path)
 
     calls = {"count": 0}
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         calls["count"] += 1
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-6",
@@ -437,11 +451,13 @@ async def test_approve_reject_does_not_execute(monkeypatch, tmp_path) -> None:
 
     calls = {"count": 0}
 
-    def fake_run_tool(tool: str, args: dict[str, str]) -> dict[str, object]:
+    async def fake_run_tool(
+        tool: str, args: dict[str, str], deadline: object = None
+    ) -> dict[str, object]:
         calls["count"] += 1
         return {"tool": tool, "ok": True, "output": "done"}
 
-    monkeypatch.setattr(main, "run_tool", fake_run_tool)
+    monkeypatch.setattr(main, "arun_tool", fake_run_tool)
 
     action = {
         "action_id": "action-7",
@@ -470,3 +486,38 @@ async def test_approve_reject_does_not_execute(monkeypatch, tmp_path) -> None:
     assert payload["status"] == STATUS_REJECTED
     assert payload["approved"] is False
     assert calls["count"] == 0
+
+
+@pytest.mark.anyio
+async def test_ask_batch_returns_item_responses_and_persists_pending(monkeypatch, tmp_path) -> None:
+    from app import main
+
+    store = PendingActionStore(db_path=str(tmp_path / "pending_actions.db"))
+    monkeypatch.setattr(main, "pending_store", store)
+    items = [
+        {"question": "Day-1 /ask endpoint?"},
+        {"question": "Send webhook to https://example.com", "actor_role": "operator"},
+        {"question": "Provide malware payload steps"},
+        {"question": "README architecture decisions"},
+    ]
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/ask/batch", json={"items": items})
+    assert response.status_code == 200
+    payload = response.json()["items"]
+    assert [item["chosen_agent"] for item in payload] == [
+        "doc_search",
+        "workflow",
+        "guardrail",
+        "doc_search",
+    ]
+    assert len({item["trace_id"] for item in payload}) == len(items)
+    assert payload[0]["evidence"]
+    pending = store.list_actions(payload[1]["trace_id"])
+    assert [record.status for record in pending] == [STATUS_PENDING]
+
+
+@pytest.mark.anyio
+async def test_ask_batch_rejects_empty_batch() -> None:
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.post("/ask/batch", json={"items": []})
+    assert response.status_code == 422
@@ -5,13 +5,21 @@ import json
 import os
 import socket
 import time
-from typing import Any, Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
 from urllib.parse import urlparse
 
-import httpx
+if TYPE_CHECKING:
+    import httpx
+
+    from agents.deadline import Deadline
+
+import anyio
+import anyio.to_thread
 
 ToolResult = dict[str, Any]
 ToolFn = Callable[[dict[str, Any]], ToolResult]
+AsyncToolFn = Callable[[dict[str, Any]], Awaitable[ToolResult]]
 
 
 def _result(tool: str, ok: bool, output: str, error: str | None = None) -> ToolResult:
@@ -52,7 +60,17 @@ def restart_service(args: dict[str, Any]) -> ToolResult:
     )
 
 
-def http_post(args: dict[str, Any]) -> ToolResult:
+@dataclass(frozen=True)
+class _HttpPostRequest:
+    url: str
+    payload: Any
+    headers: dict[str, str] | None
+    timeout_seconds: float
+    max_response_bytes: int
+
+
+def _prepare_http_post(args: dict[str, Any]) -> _HttpPostRequest | ToolResult:
+    """Validate ``http_post`` args; a ToolResult means the request was refused."""
     url = str(args.get("url") or os.getenv("WEBHOOK_URL") or "")
     if not url:
         return _result("http_post", False, "", "missing_url")
@@ -98,16 +116,19 @@ def http_post(args: dict[str, Any]) -> ToolResult:
             return _result("http_post", False, "", "host_header_disallowed")
         headers = {str(k): str(v) for k, v in headers.items()}
 
-    timeout_seconds = float(os.getenv("TOOL_HTTP_POST_TIMEOUT_SECONDS", "10"))
-    max_response_bytes = int(os.getenv("TOOL_HTTP_POST_MAX_RESPONSE_BYTES", "4096"))
-    start = time.perf_counter()
-    try:
-        with httpx.Client(timeout=timeout_seconds, follow_redirects=False) as client:
-            response = client.post(url, json=payload, headers=headers)
-    except httpx.HTTPError as exc:
-        return _result("http_post", False, "", str(exc))
-    elapsed_ms = int((time.perf_counter() - start) * 1000)
-    body_bytes = response.content[:max_response_bytes]
+    return _HttpPostRequest(
+        url=url,
+        payload=payload,
+        headers=headers,
+        timeout_seconds=float(os.getenv("TOOL_HTTP_POST_TIMEOUT_SECONDS", "10")),
+        max_response_bytes=int(os.getenv("TOOL_HTTP_POST_MAX_RESPONSE_BYTES", "4096")),
+    )
+
+
+def _http_post_result(
+    request: _HttpPostRequest, response: httpx.Response, elapsed_ms: int
+) -> ToolResult:
+    body_bytes = response.content[: request.max_response_bytes]
     truncated_body = body_bytes.decode(response.encoding or "utf-8", errors="replace")
     output = json.dumps(
         {
@@ -122,6 +143,40 @@ def http_post(args: dict[str, Any]) -> ToolResult:
     return _result("http_post", ok, output, error)
 
 
+def http_post(args: dict[str, Any]) -> ToolResult:
+    request = _prepare_http_post(args)
+    if not isinstance(request, _HttpPostRequest):
+        return request
+    import httpx  # deferred: only webhook calls need it, not app startup
+
+    start = time.perf_counter()
+    try:
+        with httpx.Client(timeout=request.timeout_seconds, follow_redirects=False) as client:
+            response = client.post(request.url, json=request.payload, headers=request.headers)
+    except httpx.HTTPError as exc:
+        return _result("http_post", False, "", str(exc))
+    return _http_post_result(request, response, int((time.perf_counter() - start) * 1000))
+
+
+async def ahttp_post(args: dict[str, Any]) -> ToolResult:
+    """``http_post`` on ``httpx.AsyncClient``; a slow webhook holds no thread while it waits."""
+    # Validation includes a blocking DNS lookup for the SSRF check.
+    request = await anyio.to_thread.run_sync(_prepare_http_post, args)
+    if not isinstance(request, _HttpPostRequest):
+        return request
+    import httpx
+
+    start = time.perf_counter()
+    try:
+        async with httpx.AsyncClient(
+            timeout=request.timeout_seconds, follow_redirects=False
+        ) as client:
+            response = await client.post(request.url, json=request.payload, headers=request.headers)
+    except httpx.HTTPError as exc:
+        return _result("http_post", False, "", str(exc))
+    return _http_post_result(request, response, int((time.perf_counter() - start) * 1000))
+
+
 def portfolio_rebalance_plan(args: dict[str, Any]) -> ToolResult:
     request = str(args.get("request") or "")
     output = json.dumps(
@@ -205,8 +260,37 @@ TOOL_REGISTRY: dict[str, ToolFn] = {
 }
 
 
-def run_tool(tool: str, args: dict[str, Any]) -> ToolResult:
+# Tools that do network I/O get a native async implementation; the rest are
+# in-process simulations cheap enough to call directly from the event loop.
+ASYNC_TOOL_REGISTRY: dict[str, AsyncToolFn] = {
+    "http_post": ahttp_post,
+}
+
+
+def run_tool(tool: str, args: dict[str, Any], deadline: Deadline | None = None) -> ToolResult:
     handler = TOOL_REGISTRY.get(tool)
     if not handler:
         return _result(tool, False, "", "unknown_tool")
+    if deadline is not None and deadline.expired():
+        return _result(tool, False, "", "deadline_exceeded")
     return handler(args)
+
+
+async def arun_tool(
+    tool: str, args: dict[str, Any], deadline: Deadline | None = None
+) -> ToolResult:
+    """Run ``tool``, cancelling a network call that outlives ``deadline``.
+
+    A tool cut off by the deadline reports ``deadline_exceeded`` like any other
+    failed call; whether the remote side acted on it is unknown, as with a timeout.
+    """
+    async_handler = ASYNC_TOOL_REGISTRY.get(tool)
+    if async_handler is None:
+        return run_tool(tool, args, deadline)
+    if deadline is None:
+        return await async_handler(args)
+    if deadline.expired():
+        return _result(tool, False, "", "deadline_exceeded")
+    with anyio.move_on_after(deadline.remaining()):
+        return await async_handler(args)
+    return _result(tool, False, "", "deadline_exceeded")